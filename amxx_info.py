@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Разбор .amxx: заголовок контейнера с секциями под размер ячейки, сжатые zlib образы AMX;
+размеры кода, данных и стека/кучи, public, natives и библиотеки плагина, сравнение между сборками"""
+import os, sys, json, zlib, struct, argparse
+
+AMXX_MAGIC = 0x414D5858          # "XXMA" в файле
+AMX_MAGICS = {0xF1E0: 4, 0xF1E1: 8}
+AMX_FLAG_DEBUG = 0x02
+
+BIN_HEADER = struct.Struct('<IhB')       # magic, version, число секций
+SECTION = struct.Struct('<BIIII')        # cellsize, disksize, imagesize, memsize, offset
+AMX_HEADER = struct.Struct('<iHBBhhiiiiiiiiiii')
+AMX_HEADER_FIELDS = ('size', 'magic', 'file_version', 'amx_version', 'flags', 'defsize', 'cod', 'dat',
+                     'hea', 'stp', 'cip', 'publics', 'natives', 'libraries', 'pubvars', 'tags', 'nametable')
+
+# #pragma reqlib/loadlib/reqclass amxxpc 1.75+ пишет не в таблицу библиотек, а в таблицу тегов
+LIBRARY_TAGS = ('?rl_', '?el_', '?f_')   # reqlib, expectlib, loadlib
+CLASS_TAGS = ('?rc_', '?ec_')            # reqclass, expectclass
+
+# Поля, рост которых сравнивается между сборками
+SIZE_FIELDS = ('code', 'data', 'stack_heap')
+COUNT_FIELDS = ('publics', 'natives')
+
+class AmxxError(ValueError):
+    """Файл не является корректным .amxx"""
+
+def read_name(image, offset):
+    end = image.find(b'\0', offset)
+    if offset >= len(image) or end < 0:
+        raise AmxxError(f"name at {offset} is outside the image")
+    return image[offset:end].decode('utf-8', errors='replace')
+
+def read_table(image, header, start, end, cellsize):
+    """Имена записей таблицы (public, natives, библиотеки) между смещениями start и end"""
+    defsize = header['defsize']
+    if defsize <= 0 or end < start or end > len(image):
+        raise AmxxError("corrupt AMX tables")
+    names = []
+    for offset in range(start, end - defsize + 1, defsize):
+        if defsize == cellsize + 4:
+            # AMX_FUNCSTUBNT: адрес и смещение имени в таблице имен
+            names.append(read_name(image, struct.unpack_from('<I', image, offset + cellsize)[0]))
+        else:
+            # старый AMX_FUNCSTUB: имя хранится в самой записи
+            names.append(image[offset + cellsize:offset + defsize].split(b'\0', 1)[0].decode('utf-8', errors='replace'))
+    return names
+
+def tag_names(tags, prefixes):
+    """Имена из служебных тегов с данными префиксами, без повторов"""
+    names = []
+    for tag in tags:
+        prefix = next((p for p in prefixes if tag.startswith(p)), None)
+        if prefix and tag[len(prefix):] not in names:
+            names.append(tag[len(prefix):])
+    return names
+
+def parse_amx(image, cellsize=None):
+    """Сводка образа AMX: размеры сегментов и таблицы имен"""
+    if len(image) < AMX_HEADER.size:
+        raise AmxxError("AMX image is truncated")
+    header = dict(zip(AMX_HEADER_FIELDS, AMX_HEADER.unpack_from(image)))
+    if header['magic'] not in AMX_MAGICS:
+        raise AmxxError(f"bad AMX magic {header['magic']:#06x}")
+    cellsize = cellsize or AMX_MAGICS[header['magic']]
+    if not 0 < header['cod'] <= header['dat'] <= header['hea'] <= header['stp']:
+        raise AmxxError("corrupt AMX segment offsets")
+    tags = read_table(image, header, header['tags'], header['nametable'], cellsize)
+    libraries = read_table(image, header, header['libraries'], header['pubvars'], cellsize)
+    return {
+        'cellsize': cellsize,
+        'file_version': header['file_version'],
+        'debug': bool(header['flags'] & AMX_FLAG_DEBUG),
+        'code': header['dat'] - header['cod'],
+        'data': header['hea'] - header['dat'],
+        'stack_heap': header['stp'] - header['hea'],
+        'memory': header['stp'],
+        'publics': read_table(image, header, header['publics'], header['natives'], cellsize),
+        'natives': read_table(image, header, header['natives'], header['libraries'], cellsize),
+        'libraries': libraries + [name for name in tag_names(tags, LIBRARY_TAGS) if name not in libraries],
+        'classes': tag_names(tags, CLASS_TAGS),
+        'pubvars': read_table(image, header, header['pubvars'], header['tags'], cellsize),
+        'tags': [tag for tag in tags if not tag.startswith('?')],
+    }
+
+def read_amxx(data):
+    """Секции .amxx (или один несжатый образ .amx) с разобранными образами"""
+    if len(data) >= 6 and struct.unpack_from('<H', data, 4)[0] in AMX_MAGICS:
+        return [dict(parse_amx(data), disk_size=len(data))]
+    if len(data) < BIN_HEADER.size:
+        raise AmxxError("file is truncated")
+    magic, version, count = BIN_HEADER.unpack_from(data)
+    if magic != AMXX_MAGIC:
+        raise AmxxError(f"bad AMXX magic {magic:#010x}")
+    if not count or len(data) < BIN_HEADER.size + count * SECTION.size:
+        raise AmxxError("section table is truncated")
+    sections = []
+    for i in range(count):
+        cellsize, disksize, imagesize, memsize, offset = SECTION.unpack_from(data, BIN_HEADER.size + i * SECTION.size)
+        if offset + disksize > len(data):
+            raise AmxxError(f"section {i} is outside the file")
+        try:
+            image = zlib.decompress(data[offset:offset + disksize])
+        except zlib.error as e:
+            raise AmxxError(f"section {i}: {e}") from None
+        if len(image) != imagesize:
+            raise AmxxError(f"section {i}: image is {len(image)} bytes, header says {imagesize}")
+        sections.append(dict(parse_amx(image, cellsize), disk_size=disksize, image_size=imagesize, memsize=memsize))
+    return sections
+
+def amxx_summary(path):
+    """Запись для отчета сборки: секция с 32-битной ячейкой (ее грузит сервер) или error"""
+    try:
+        with open(path, 'rb') as f:
+            sections = read_amxx(f.read())
+    except (OSError, AmxxError) as e:
+        return {'error': str(e)}
+    section = next((s for s in sections if s['cellsize'] == 4), sections[0])
+    summary = {field: section[field] for field in ('code', 'data', 'stack_heap', 'memory', 'debug')}
+    summary.update({field: len(section[field]) for field in COUNT_FIELDS})
+    summary['libraries'] = section['libraries']
+    summary['sections'] = [s['cellsize'] for s in sections]
+    return summary
+
+def size_changes(previous, records, max_growth=None):
+    """Изменения размеров плагинов относительно предыдущего отчета;
+    regression - рост code/data/stack_heap больше max_growth % или уменьшение стека"""
+    before = {r['plugin']: r['amxx'] for r in (previous or {}).get('plugins', [])
+              if r.get('amxx') and 'error' not in r['amxx']}
+    changes = []
+    for record in records:
+        old, new = before.get(record['plugin']), record.get('amxx')
+        if not old or not new or 'error' in new:
+            continue
+        fields = {}
+        for field in SIZE_FIELDS + COUNT_FIELDS:
+            if old.get(field) is not None and old[field] != new[field]:
+                delta = new[field] - old[field]
+                fields[field] = {'old': old[field], 'new': new[field], 'delta': delta,
+                                 'percent': round(100 * delta / old[field], 1) if old[field] else None}
+        if not fields:
+            continue
+        regressions = []
+        if max_growth is not None:
+            for field in SIZE_FIELDS:
+                change = fields.get(field)
+                if change and change['delta'] > 0 and (change['percent'] is None or change['percent'] > max_growth):
+                    regressions.append(f"{field} +{change['delta']} B")
+            if fields.get('stack_heap', {}).get('delta', 0) < 0:
+                regressions.append(f"stack_heap {fields['stack_heap']['delta']} B")
+        changes.append({'plugin': record['plugin'], 'fields': fields, 'regressions': regressions})
+    return changes
+
+def format_bytes(value):
+    return f"{value / 1024:.1f} KiB" if abs(value) >= 1024 else f"{value} B"
+
+def format_change(change):
+    parts = []
+    for field, c in change['fields'].items():
+        percent = f" ({c['percent']:+.1f}%)" if c['percent'] is not None else ""
+        delta = f"{c['delta']:+d}" if field in COUNT_FIELDS else f"{'+' if c['delta'] > 0 else '-'}{format_bytes(abs(c['delta']))}"
+        parts.append(f"{field} {delta}{percent}")
+    return ", ".join(parts)
+
+def print_info(path, summary, verbose):
+    if 'error' in summary:
+        print(f"❓ {path}: {summary['error']}")
+        return
+    debug = ", debug info" if summary['debug'] else ""
+    print(f"📦 {path}: code {format_bytes(summary['code'])}, data {format_bytes(summary['data'])}, "
+          f"stack/heap {format_bytes(summary['stack_heap'])}, {summary['publics']} publics, "
+          f"{summary['natives']} natives{debug}")
+    if summary['libraries']:
+        print(f"   📚 libraries: {', '.join(summary['libraries'])}")
+    if verbose:
+        with open(path, 'rb') as f:
+            sections = read_amxx(f.read())
+        section = next((s for s in sections if s['cellsize'] == 4), sections[0])
+        print(f"   publics: {', '.join(section['publics'])}")
+        print(f"   natives: {', '.join(section['natives'])}")
+
+def main(argv):
+    from compile_diagnostics import load_report, REPORT_FILE
+
+    parser = argparse.ArgumentParser(description="Inspect .amxx files and compare plugin sizes between builds")
+    sub = parser.add_subparsers(dest='command')
+    show = sub.add_parser('show', help="code/data/stack sizes, publics and natives of .amxx files")
+    show.add_argument('files', nargs='*', help=".amxx files (default: compiled/*.amxx)")
+    show.add_argument('-v', '--verbose', action='store_true', help="list public and native names")
+    show.add_argument('--json', action='store_true')
+    diff = sub.add_parser('diff', help="size changes between two compile reports")
+    diff.add_argument('old', help="report of the previous build")
+    diff.add_argument('new', nargs='?', default=REPORT_FILE)
+    diff.add_argument('--max-growth', type=float, default=None, metavar='PCT',
+                      help="fail when code/data/stack grows more than PCT percent or the stack shrinks")
+    diff.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    if args.command == 'show':
+        files = args.files
+        if not files:
+            from compile_plugins import load_config
+            compiled = load_config()['compiled']
+            files = [os.path.join(compiled, name) for name in sorted(os.listdir(compiled))
+                     if name.endswith('.amxx')] if os.path.isdir(compiled) else []
+        summaries = {path: amxx_summary(path) for path in files}
+        if args.json:
+            print(json.dumps(summaries, indent=2))
+        else:
+            for path, summary in summaries.items():
+                print_info(path, summary, args.verbose)
+        return all('error' not in s for s in summaries.values())
+
+    if args.command != 'diff':
+        parser.print_help()
+        return True
+
+    try:
+        old, new = load_report(args.old), load_report(args.new)
+    except (OSError, ValueError) as e:
+        print(f"❌ Cannot read report: {e}")
+        return False
+    changes = size_changes(old, new['plugins'], args.max_growth)
+    regressions = [c for c in changes if c['regressions']]
+    if args.json:
+        print(json.dumps(changes, indent=2))
+    else:
+        for change in changes:
+            mark = "❌" if change['regressions'] else "📐"
+            print(f"{mark} {change['plugin']}: {format_change(change)}")
+        print(f"📊 {len(changes)} plugins changed size, {len(regressions)} regressions")
+    return not regressions
+
+if __name__ == "__main__":
+    sys.exit(0 if main(sys.argv[1:]) else 1)
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""Контентно-адресуемый кэш скомпилированных .amxx (локальный каталог или HTTP)"""
+import os, sys, json, time, hashlib, argparse, functools, threading
+import urllib.request, urllib.error
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from fileutil import atomic_write, file_lock
+
+CACHE_KEY_VERSION = "1"
+DEFAULT_CACHE_DIR = os.path.join(".build_cache", "artifacts")
+DEFAULT_MAX_MB = 512
+EVICT_TO = 0.9
+HTTP_TIMEOUT = 10
+
+@functools.lru_cache(maxsize=None)
+def _file_digest(path, size, mtime):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def file_digest(path):
+    """sha256 файла (кэшируется на процесс по mtime/size)"""
+    stat = os.stat(path)
+    return _file_digest(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+def cache_key(inputs, compiler, flags):
+    """Ключ записи: хеши всех входов препроцессора, бинарник компилятора и флаги.
+    inputs - {ключ файла: sha256} из графа include"""
+    h = hashlib.sha256()
+    h.update(f"mirgame-amxx-cache:{CACHE_KEY_VERSION}\n".encode())
+    try:
+        h.update(f"compiler:{file_digest(compiler)}\n".encode())
+    except OSError:
+        h.update(f"compiler:{compiler}\n".encode())
+    for flag in flags:
+        h.update(f"flag:{flag}\n".encode())
+    for name in sorted(inputs):
+        h.update(f"input:{name}:{inputs[name]}\n".encode())
+    return h.hexdigest()
+
+class LocalCache:
+    """Каталог objects/<xx>/<key>.amxx|.json с LRU-вытеснением по размеру"""
+
+    def __init__(self, path=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.path = os.path.abspath(path)
+        self.max_bytes = max_bytes
+        # Оценка размера кэша: каталог обходится один раз на процесс и при вытеснении, а не на каждый put
+        self._size = None
+        self._size_lock = threading.Lock()
+
+    def __str__(self):
+        return self.path
+
+    def _entry(self, key):
+        base = os.path.join(self.path, 'objects', key[:2], key)
+        return base + '.amxx', base + '.json'
+
+    def get(self, key):
+        """(байты .amxx, метаданные) или None"""
+        artifact, meta = self._entry(key)
+        try:
+            with open(meta, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+            with open(artifact, 'rb') as f:
+                data = f.read()
+        except (OSError, ValueError):
+            return None
+        if hashlib.sha256(data).hexdigest() != metadata.get('sha256'):
+            return None
+        now = time.time()
+        for path in (artifact, meta):
+            try:
+                os.utime(path, (now, now))
+            except OSError:
+                pass
+        return data, metadata
+
+    def put(self, key, data, metadata):
+        artifact, meta = self._entry(key)
+        metadata = dict(metadata, sha256=hashlib.sha256(data).hexdigest(), size=len(data))
+        atomic_write(artifact, data)
+        atomic_write(meta, json.dumps(metadata, indent=1))
+        self.added(key)
+
+    def added(self, key):
+        """Учитывает новую запись в оценке размера; вытеснение - только когда оценка выше лимита"""
+        if not self.max_bytes:
+            return
+        entry_size = 0
+        for path in self._entry(key):
+            try:
+                entry_size += os.stat(path).st_size
+            except OSError:
+                pass
+        with self._size_lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self.entries())
+            else:
+                self._size += entry_size
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def entries(self):
+        """[(время использования, размер, ключ)] всех записей"""
+        found = []
+        objects = os.path.join(self.path, 'objects')
+        if not os.path.isdir(objects):
+            return found
+        for bucket in os.listdir(objects):
+            bucket_dir = os.path.join(objects, bucket)
+            for name in os.listdir(bucket_dir):
+                if not name.endswith('.amxx'):
+                    continue
+                key = name[:-5]
+                size = 0
+                used = 0
+                for path in self._entry(key):
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    size += stat.st_size
+                    used = max(used, stat.st_mtime)
+                found.append((used, size, key))
+        return found
+
+    def evict(self):
+        """Удаляет давно не использованные записи, пока кэш больше лимита
+        (с запасом до EVICT_TO лимита, чтобы следующие put не вытесняли снова)"""
+        if not self.max_bytes:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        with file_lock(os.path.join(self.path, '.lock')):
+            entries = sorted(self.entries())
+            total = sum(size for _, size, _ in entries)
+            limit = self.max_bytes * EVICT_TO if total > self.max_bytes else total
+            for _, size, key in entries:
+                if total <= limit:
+                    break
+                for path in self._entry(key):
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+                total -= size
+            with self._size_lock:
+                self._size = total
+
+class HttpCache:
+    """Простой HTTP-протокол: GET/PUT {url}/{key}.amxx и {url}/{key}.json"""
+
+    def __init__(self, url, timeout=HTTP_TIMEOUT):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def __str__(self):
+        return self.url
+
+    def _request(self, method, name, body=None, content_type='application/octet-stream'):
+        request = urllib.request.Request(f"{self.url}/{name}", data=body, method=method)
+        if body is not None:
+            request.add_header('Content-Type', content_type)
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return response.read()
+
+    def get(self, key):
+        try:
+            metadata = json.loads(self._request('GET', f"{key}.json"))
+            data = self._request('GET', f"{key}.amxx")
+        except (urllib.error.URLError, OSError, ValueError):
+            return None
+        if hashlib.sha256(data).hexdigest() != metadata.get('sha256'):
+            return None
+        return data, metadata
+
+    def put(self, key, data, metadata):
+        metadata = dict(metadata, sha256=hashlib.sha256(data).hexdigest(), size=len(data))
+        try:
+            # .amxx первым: запись становится видимой только вместе с метаданными
+            self._request('PUT', f"{key}.amxx", data)
+            self._request('PUT', f"{key}.json", json.dumps(metadata).encode('utf-8'), 'application/json')
+        except (urllib.error.URLError, OSError):
+            pass
+
+def open_cache(location=None, max_mb=None):
+    """Бэкенд по адресу: http(s)://... или каталог; 'off' отключает кэш.
+    По умолчанию берется MIRGAME_CACHE / MIRGAME_CACHE_MAX_MB"""
+    location = location or os.getenv('MIRGAME_CACHE') or DEFAULT_CACHE_DIR
+    if location.lower() in ('off', 'none', '0'):
+        return None
+    if location.startswith(('http://', 'https://')):
+        return HttpCache(location)
+    max_mb = max_mb if max_mb is not None else int(os.getenv('MIRGAME_CACHE_MAX_MB', DEFAULT_MAX_MB))
+    return LocalCache(location, max_mb * 1024 * 1024)
+
+def make_handler(store):
+    """HTTP-обработчик поверх LocalCache (локальная замена удаленного кэша)"""
+
+    class CacheHandler(BaseHTTPRequestHandler):
+        def _key(self):
+            name = self.path.strip('/').rsplit('/', 1)[-1]
+            key, _, ext = name.partition('.')
+            if len(key) != 64 or ext not in ('amxx', 'json') or not all(c in '0123456789abcdef' for c in key):
+                return None, None
+            return key, ext
+
+        def do_GET(self):
+            key, ext = self._key()
+            artifact, meta = store._entry(key) if key else (None, None)
+            path = artifact if ext == 'amxx' else meta
+            if not path or not os.path.isfile(path):
+                self.send_error(404)
+                return
+            with open(path, 'rb') as f:
+                body = f.read()
+            os.utime(path)
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_PUT(self):
+            key, ext = self._key()
+            if not key:
+                self.send_error(400)
+                return
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            artifact, meta = store._entry(key)
+            atomic_write(artifact if ext == 'amxx' else meta, body)
+            if ext == 'json':
+                store.added(key)
+            self.send_response(201)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    return CacheHandler
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="MirGame compiled-artifact cache")
+    sub = parser.add_subparsers(dest='command')
+    serve = sub.add_parser('serve', help="serve a local cache directory over HTTP")
+    serve.add_argument('--dir', default=DEFAULT_CACHE_DIR)
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--max-mb', type=int, default=DEFAULT_MAX_MB)
+    stats = sub.add_parser('stats', help="show local cache size")
+    stats.add_argument('--dir', default=DEFAULT_CACHE_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        store = LocalCache(args.dir, args.max_mb * 1024 * 1024)
+        server = ThreadingHTTPServer((args.host, args.port), make_handler(store))
+        print(f"🗄️ Serving {store.path} on http://{args.host}:{server.server_port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return True
+
+    if args.command == 'stats':
+        entries = LocalCache(args.dir).entries()
+        total = sum(size for _, size, _ in entries)
+        print(f"🗄️ {len(entries)} entries, {total / 1024:.1f} KiB in {os.path.abspath(args.dir)}")
+        return True
+
+    parser.print_help()
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main(sys.argv[1:]) else 1)
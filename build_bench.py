@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""Бенчмарки конвейера сборки на синтетических деревьях (N плагинов, M include, K словарей)
+с детерминированной заменой amxxpc: update_version.py, номер сборки, метаданные, полная
+и инкрементальная компиляция, git hooks; результаты сравниваются с JSON-базой bench/baseline.json
+(она в репозитории; обновляется --save-baseline или last.json из артефакта CI)"""
+import os, re, sys, json, time, random, shutil, struct, zlib, argparse, datetime, platform, statistics
+import subprocess, tempfile
+
+from fileutil import atomic_write
+from amxx_info import AMXX_MAGIC, AMX_HEADER, BIN_HEADER, SECTION
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCH_DIR = os.path.join(".build_cache", "bench")
+BASELINE_FILE = os.path.join("bench", "baseline.json")
+RESULTS_VERSION = 1
+LATENCY_ENV = "BENCH_AMXXPC_LATENCY"
+DEFAULT_LATENCY = 0.05
+DEFAULT_TOLERANCE = 25.0
+NOISE_FLOOR = 0.05
+
+# Масштаб -> (плагины, include, словари)
+SCALES = {
+    'small': (20, 10, 5),
+    'medium': (100, 40, 20),
+    'large': (400, 120, 60),
+}
+
+# Переменные config.sh и CI: в синтетическом дереве пути и ветка должны быть его собственными
+ISOLATED_ENV = ('ROOT_DIR', 'SCRIPTING_DIR', 'COMPILED_DIR', 'INCLUDE_DIR', 'PLUGINS_DIR', 'COMPILER',
+                'COMPILE_SCRIPT', 'COMPILE_DRIVER', 'UPDATE_SCRIPT', 'VERSION_FILE', 'CONFIG_FILE', 'LOG_FILE',
+                'COMPILER_FLAGS', 'DEFAULT_OUTPUT', 'LANG_DIR', 'LANGUAGES', 'CONFIGS_DIR', 'DEPLOY_TARGETS',
+                'REPORT_FILE', 'MIRGAME_CACHE', 'MIRGAME_TRACE', 'GIT_DIR', 'GIT_WORK_TREE',
+                'GITHUB_ACTIONS', 'GITHUB_REF')
+
+FAKE_COMPILER = '''#!/usr/bin/env python3
+"""Детерминированная замена amxxpc для build_bench.py"""
+import os, sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from build_bench import fake_compile
+sys.exit(fake_compile(sys.argv[1:]))
+'''
+
+BUILT_TREE_SCENARIOS = {'compile-noop', 'compile-incremental', 'hook-pre-push'}
+PUBLIC_RE = re.compile(r'^public\s+(\w+)\s*\(', re.MULTILINE)
+
+def fake_amxx(text):
+    """Корректный .amxx (одна секция с 32-битной ячейкой), размеры которого зависят от исходника"""
+    publics = sorted(set(PUBLIC_RE.findall(text)))
+    nametable = b''.join(name.encode('utf-8') + b'\0' for name in publics)
+    table = AMX_HEADER.size
+    names = table + 8 * len(publics) + 2
+    offsets, position = [], names
+    for name in publics:
+        offsets.append(position)
+        position += len(name) + 1
+    cod = (position + 3) // 4 * 4
+    dat = cod + len(text) // 8 * 4
+    hea = dat + text.count('new ') * 16
+    stp = hea + 16384
+    header = AMX_HEADER.pack(hea, 0xF1E0, 8, 8, 0, 8, cod, dat, hea, stp, 0,
+                             table, names - 2, names - 2, names - 2, names - 2, names - 2)
+    image = header + b''.join(struct.pack('<II', 0, offset) for offset in offsets) + struct.pack('<H', 31) + nametable
+    image += b'\0' * (hea - len(image))
+    packed = zlib.compress(image)
+    offset = BIN_HEADER.size + SECTION.size
+    return (BIN_HEADER.pack(AMXX_MAGIC, 0x0300, 1) + SECTION.pack(4, len(packed), len(image), stp, offset)
+            + packed)
+
+def fake_compile(argv):
+    """amxxpc SOURCE -oOUTPUT [-iDIR...]: ждет $BENCH_AMXXPC_LATENCY секунд и пишет fake_amxx"""
+    source = argv[0]
+    output = next((a[2:] for a in argv[1:] if a.startswith('-o')), os.path.splitext(source)[0] + '.amxx')
+    print("AMX Mod X Compiler 1.9.0.5294 (build_bench)")
+    with open(source, 'r', encoding='utf-8', errors='replace') as f:
+        text = f.read()
+    time.sleep(float(os.getenv(LATENCY_ENV, DEFAULT_LATENCY)))
+    if '#error' in text:
+        print(f"{source}(1) : error 017: undefined symbol \"bench\"")
+        return 1
+    with open(output, 'wb') as f:
+        f.write(fake_amxx(text))
+    print("Done.")
+    return 0
+
+def tool_files(root):
+    """Файлы системы сборки, которые копируются в синтетическое дерево"""
+    files = [name for name in sorted(os.listdir(root)) if name.endswith(('.py', '.sh'))]
+    files += [os.path.join('.githooks', name) for name in sorted(os.listdir(os.path.join(root, '.githooks')))]
+    include = os.path.join('scripting', 'include')
+    files += [os.path.join(include, name) for name in sorted(os.listdir(os.path.join(root, include)))
+              if name.endswith('.inc') and name != 'version_build.inc']
+    return files
+
+def write_include(path, index, rng):
+    lines = [f"#if defined _bench_{index}_included", "\t#endinput", "#endif",
+             f"#define _bench_{index}_included", ""]
+    if index and rng.random() < 0.5:
+        lines += [f"#include <bench_{rng.randrange(index)}>", ""]
+    for i in range(20):
+        lines.append(f"#define BENCH_{index}_CONST_{i} {rng.randrange(1000)}")
+    lines.append("")
+    for i in range(8):
+        lines += [f"stock bench_{index}_stock_{i}(value)", "{",
+                  f"\treturn value * {i + 1} + BENCH_{index}_CONST_{i};", "}", ""]
+    atomic_write(path, "\n".join(lines))
+
+def write_plugin(path, index, includes, langs, rng):
+    used = sorted(rng.sample(range(includes), min(3, includes)))
+    lines = ["#include <amxmodx>", "#include <version>", "#tryinclude <version_build>"]
+    lines += [f"#include <bench_{i}>" for i in used]
+    lines += ["", f'#define PLUGIN_NAME "Bench {index}"', f'#define PLUGIN_VERSION "1.0.{index}"', "",
+              f"new g_counter_{index};", "", "public plugin_init()", "{",
+              "\tregister_plugin(PLUGIN_NAME, PLUGIN_VERSION, PROJECT_AUTHOR);"]
+    if langs:
+        lines.append(f'\tregister_dictionary("bench_{rng.randrange(langs)}.txt");')
+    lines += [f'\tregister_clcmd("say /bench{index}", "cmd_bench");', "}", "",
+              "public cmd_bench(id)", "{"]
+    for i in used:
+        lines.append(f"\tg_counter_{index} += bench_{i}_stock_{rng.randrange(8)}(id);")
+    lines += ['\tclient_print(id, print_chat, "%L", id, "BENCH_KEY_0");', "\treturn PLUGIN_HANDLED;", "}", ""]
+    for i in range(10):
+        lines += [f"helper_{i}(value)", "{", f"\tnew result = value + {i};",
+                  "\tfor (new step = 0; step < 4; step++)", "\t\tresult += step;", "\treturn result;", "}", ""]
+    atomic_write(path, "\n".join(lines))
+
+def write_lang(path, index):
+    sections = []
+    for lang in ('en', 'ru', 'de'):
+        sections.append(f"[{lang}]")
+        sections += [f"BENCH_KEY_{i} = {lang} message {index}.{i} %s" for i in range(50)]
+        sections.append("")
+    atomic_write(path, "\n".join(sections))
+
+def git(tree, *args):
+    subprocess.run(['git', '-c', 'user.name=bench', '-c', 'user.email=bench@localhost', *args], cwd=tree,
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def generate_tree(tree, plugins, includes, langs, source_root=ROOT_DIR, seed=0):
+    """Синтетический проект: копия системы сборки, плагины, заголовки, словари и git-репозиторий"""
+    rng = random.Random(seed)
+    for rel in tool_files(source_root):
+        target = os.path.join(tree, rel)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(os.path.join(source_root, rel), target)
+    include_dir = os.path.join(tree, 'scripting', 'include')
+    for i in range(includes):
+        write_include(os.path.join(include_dir, f"bench_{i}.inc"), i, rng)
+    for i in range(plugins):
+        write_plugin(os.path.join(tree, 'scripting', f"bench_{i:04d}.sma"), i, includes, langs, rng)
+    for i in range(langs):
+        write_lang(os.path.join(tree, 'lang', f"bench_{i}.txt"), i)
+    atomic_write(os.path.join(tree, 'amxxpc'), FAKE_COMPILER, 0o755)
+    atomic_write(os.path.join(tree, '.gitignore'), "/compiled/\n/.build_cache/\n/compile.log\n/compile-report.*\n")
+    subprocess.run(['git', 'init', '-q', '-b', 'main'], cwd=tree, check=True)
+    git(tree, 'add', '-A')
+    git(tree, 'commit', '-q', '-m', 'bench tree')
+
+def touch_include(tree):
+    """Правка заголовка, от которого зависит часть плагинов (инкрементальная сборка)"""
+    path = os.path.join(tree, 'scripting', 'include', 'bench_0.inc')
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(f"// {time.time_ns()}\n")
+
+def remove_meta_cache(tree):
+    try:
+        os.remove(os.path.join(tree, '.build_cache', 'plugin_meta.json'))
+    except FileNotFoundError:
+        pass
+
+def scenarios(jobs):
+    """[(имя, подготовка перед замером, команда)]; порядок важен - сборки опираются на предыдущие"""
+    python = sys.executable
+    compile_args = ['bash', 'compile.sh', '--no-cache', '-j', str(jobs)]
+    return [
+        ('version-bump', None, [python, 'update_version.py', 'patch']),
+        ('build-number', None, [python, 'update_version.py', 'build-mirgame']),
+        ('version-batch', None, [python, 'update_version.py', 'run', 'build-mirgame', 'info', '--json']),
+        ('meta-scan-cold', remove_meta_cache, [python, 'plugin_meta.py', '-o', os.devnull]),
+        ('meta-scan-warm', None, [python, 'plugin_meta.py', '-o', os.devnull]),
+        ('compile-full', None, compile_args + ['--force']),
+        ('compile-noop', None, compile_args),
+        ('compile-incremental', touch_include, compile_args),
+        ('hook-pre-commit', None, ['bash', os.path.join('.githooks', 'pre-commit')]),
+        ('hook-pre-push', None, ['bash', os.path.join('.githooks', 'pre-push')]),
+    ]
+
+def bench_env(latency):
+    env = {k: v for k, v in os.environ.items() if k not in ISOLATED_ENV}
+    env[LATENCY_ENV] = str(latency)
+    return env
+
+def run_scale(tree, repeat, latency, jobs, selected=None):
+    """{сценарий: {median, min, runs, ok}} для одного дерева"""
+    env = bench_env(latency)
+    # noop/incremental сборки и pre-push меряются поверх уже собранного дерева
+    prepare = bool(selected and BUILT_TREE_SCENARIOS & set(selected))
+    results = {}
+    for name, setup, command in scenarios(jobs):
+        wanted = not selected or name in selected
+        if not wanted and not (name == 'compile-full' and prepare):
+            continue
+        runs, ok = [], True
+        for _ in range(repeat if wanted else 1):
+            if setup:
+                setup(tree)
+            started = time.perf_counter()
+            proc = subprocess.run(command, cwd=tree, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            runs.append(round(time.perf_counter() - started, 4))
+            ok = ok and proc.returncode == 0
+        if wanted:
+            results[name] = {'median': round(statistics.median(runs), 4), 'min': min(runs), 'runs': runs, 'ok': ok}
+    return results
+
+def incomparable(baseline, results):
+    """Почему замеры нельзя сравнить с базой (None - можно): абсолютные времена зависят
+    от задержки компилятора, числа CPU и -j"""
+    if baseline.get('latency') != results['latency']:
+        return f"compiler latency {baseline.get('latency')}s vs {results['latency']}s"
+    old, new = baseline.get('machine', {}), results['machine']
+    for field in ('cpus', 'jobs'):
+        if old.get(field) != new[field]:
+            return f"{field} {old.get(field)} vs {new[field]}"
+    return None
+
+def compare(baseline, results, tolerance=DEFAULT_TOLERANCE):
+    """Сценарии, медиана которых выросла больше чем на tolerance % (и больше шума NOISE_FLOOR)"""
+    regressions = []
+    for scale, entry in results['scales'].items():
+        base = baseline.get('scales', {}).get(scale)
+        if not base or base['params'] != entry['params']:
+            continue
+        for name, current in entry['scenarios'].items():
+            old = base['scenarios'].get(name)
+            if not old:
+                continue
+            delta = current['median'] - old['median']
+            if delta > NOISE_FLOOR and current['median'] > old['median'] * (1 + tolerance / 100):
+                regressions.append({'scale': scale, 'scenario': name, 'baseline': old['median'],
+                                    'median': current['median'], 'percent': round(100 * delta / old['median'], 1)})
+    return regressions
+
+def print_results(results, baseline):
+    for scale, entry in results['scales'].items():
+        plugins, includes, langs = entry['params']
+        print(f"⏱️ {scale}: {plugins} plugins, {includes} includes, {langs} lang files")
+        base = baseline.get('scales', {}).get(scale, {}) if baseline else {}
+        for name, r in entry['scenarios'].items():
+            old = base.get('scenarios', {}).get(name) if base.get('params') == entry['params'] else None
+            versus = f"  (baseline {old['median']:.3f}s, {100 * (r['median'] / old['median'] - 1):+.0f}%)" \
+                if old and old['median'] else ""
+            mark = "✅" if r['ok'] else "❌"
+            print(f"   {mark} {name:<22} {r['median']:>8.3f}s  min {r['min']:.3f}s{versus}")
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the build tooling on synthetic plugin trees")
+    parser.add_argument('--scale', default='small', help=f"comma-separated presets: {', '.join(SCALES)}")
+    parser.add_argument('--plugins', type=int, help="custom scale: number of plugins")
+    parser.add_argument('--includes', type=int, default=10, help="custom scale: number of include files")
+    parser.add_argument('--langs', type=int, default=5, help="custom scale: number of lang files")
+    parser.add_argument('-n', '--repeat', type=int, default=3, help="runs per scenario (median is compared)")
+    parser.add_argument('--latency', type=float, default=DEFAULT_LATENCY, help="seconds per fake amxxpc call")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--scenario', action='append', help="run only these scenarios")
+    parser.add_argument('--baseline', default=os.path.join(ROOT_DIR, BASELINE_FILE), help="baseline JSON")
+    parser.add_argument('--save-baseline', action='store_true', help="store the results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown of a scenario median, percent")
+    parser.add_argument('--keep', help="generate the trees in this directory and keep them")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    if args.plugins:
+        scales = {'custom': (args.plugins, args.includes, args.langs)}
+    else:
+        unknown = [s for s in args.scale.split(',') if s not in SCALES]
+        if unknown:
+            print(f"❌ Unknown scale: {', '.join(unknown)}")
+            return False
+        scales = {s: SCALES[s] for s in args.scale.split(',')}
+
+    results = {
+        'version': RESULTS_VERSION,
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                    'cpus': os.cpu_count(), 'jobs': args.jobs},
+        'latency': args.latency,
+        'scales': {},
+    }
+    for scale, params in scales.items():
+        if not args.json:
+            print(f"🏗️ Generating {scale} tree...", flush=True)
+        if args.keep:
+            tree = os.path.join(os.path.abspath(args.keep), scale)
+            shutil.rmtree(tree, ignore_errors=True)
+            os.makedirs(tree)
+        else:
+            tree = tempfile.mkdtemp(prefix=f"mirgame-bench-{scale}-")
+        try:
+            generate_tree(tree, *params)
+            scenarios_results = run_scale(tree, max(1, args.repeat), args.latency, max(1, args.jobs), args.scenario)
+        finally:
+            if not args.keep:
+                shutil.rmtree(tree, ignore_errors=True)
+        results['scales'][scale] = {'params': list(params), 'scenarios': scenarios_results}
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    mismatch = incomparable(baseline, results) if baseline else None
+    if mismatch:
+        baseline = None
+    regressions = compare(baseline, results, args.tolerance) if baseline else []
+    failed = [f"{scale}/{name}" for scale, entry in results['scales'].items()
+              for name, r in entry['scenarios'].items() if not r['ok']]
+    atomic_write(os.path.join(ROOT_DIR, BENCH_DIR, "last.json"), json.dumps(results, indent=2) + "\n")
+    if args.save_baseline:
+        atomic_write(args.baseline, json.dumps(results, indent=2) + "\n")
+
+    if args.json:
+        print(json.dumps(dict(results, regressions=regressions, failed=failed, baseline_mismatch=mismatch),
+                         indent=2))
+    else:
+        print_results(results, baseline)
+        for r in regressions:
+            print(f"❌ {r['scale']}/{r['scenario']}: {r['baseline']:.3f}s -> {r['median']:.3f}s (+{r['percent']}%)")
+        for name in failed:
+            print(f"❌ {name}: command failed")
+        if args.save_baseline:
+            print(f"💾 Baseline saved: {args.baseline}")
+        elif mismatch:
+            print(f"ℹ️ Baseline not comparable ({mismatch}): timings not checked")
+        elif not baseline:
+            print("ℹ️ No baseline to compare with (--save-baseline to create one)")
+    return not regressions and not failed
+
+if __name__ == "__main__":
+    sys.exit(0 if main(sys.argv[1:]) else 1)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""История сборок MirGame: снапшот .build_history.json + журнал выделенных номеров"""
+import os, sys, json, time, datetime, tempfile, argparse
+
+from fileutil import atomic_write, file_lock
+from pipeline_trace import span
+
+BUILD_HISTORY_FILE = ".build_history.json"
+JOURNAL_SUFFIX = ".journal"
+LOCK_SUFFIX = ".lock"
+COMPACT_THRESHOLD = 64
+
+def empty_history():
+    return {
+        "major_version": 1,
+        "branch_builds": {},
+        "total_builds": 0,
+        "last_build_date": ""
+    }
+
+def journal_path(path):
+    return os.path.splitext(path)[0] + JOURNAL_SUFFIX
+
+def lock_path(path):
+    return os.path.splitext(path)[0] + LOCK_SUFFIX
+
+def _read_snapshot(path):
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            return json.load(f)
+    return empty_history()
+
+def _read_journal(path):
+    """Читает журнал; оборванная последняя строка (сбой при записи) пропускается"""
+    entries = []
+    journal = journal_path(path)
+    if os.path.exists(journal):
+        with open(journal, 'r') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+    return entries
+
+def _apply(history, entry):
+    """Применяет запись журнала; записи хранят абсолютные значения,
+    поэтому повторное применение (после сбоя при компактизации) безопасно"""
+    branch = entry["branch"]
+    history["branch_builds"][branch] = max(history["branch_builds"].get(branch, 0), entry["build"])
+    history["total_builds"] = max(history["total_builds"], entry["total"])
+    history["major_version"] = entry["major"]
+    history["last_build_date"] = entry["date"]
+
+def _load(path):
+    history = _read_snapshot(path)
+    entries = _read_journal(path)
+    for entry in entries:
+        _apply(history, entry)
+    return history, len(entries)
+
+def load_history(path=BUILD_HISTORY_FILE):
+    """Текущее состояние истории (снапшот + журнал)"""
+    if not os.path.exists(path) and not os.path.exists(journal_path(path)):
+        return empty_history()
+    with file_lock(lock_path(path), exclusive=False):
+        return _load(path)[0]
+
+def load_journal(path=BUILD_HISTORY_FILE):
+    """Записи журнала, еще не свернутые в снапшот (номер, ветка, дата)"""
+    with file_lock(lock_path(path), exclusive=False):
+        return _read_journal(path)
+
+def save_history(history, path=BUILD_HISTORY_FILE):
+    """Перезаписывает снапшот целиком и очищает журнал"""
+    with file_lock(lock_path(path)):
+        _compact(history, path)
+
+def _compact(history, path):
+    atomic_write(path, json.dumps(history, indent=2))
+    journal = journal_path(path)
+    if os.path.exists(journal):
+        os.truncate(journal, 0)
+
+def _append_journal(path, entry):
+    line = json.dumps(entry) + "\n"
+    with open(journal_path(path), 'ab+') as f:
+        # Оборванную строку от прошлого сбоя закрываем, чтобы не склеить записи
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                line = "\n" + line
+        f.write(line.encode('utf-8'))
+        f.flush()
+        os.fsync(f.fileno())
+
+def allocate_build(branch_code, major_version, path=BUILD_HISTORY_FILE, compact_threshold=COMPACT_THRESHOLD):
+    """Выделяет следующий номер сборки ветки под блокировкой ОС.
+    Возвращает (номер, история после выделения)"""
+    with span('allocate build', 'build-history', branch=branch_code), file_lock(lock_path(path)):
+        history, journal_size = _load(path)
+        entry = {
+            "branch": branch_code,
+            "build": history["branch_builds"].get(branch_code, 0) + 1,
+            "total": history["total_builds"] + 1,
+            "major": major_version,
+            "date": datetime.datetime.now().isoformat(),
+        }
+        _append_journal(path, entry)
+        _apply(history, entry)
+
+        if journal_size + 1 >= compact_threshold:
+            _compact(history, path)
+    return entry["build"], history
+
+def _bench_worker(path, branch_code, count, queue):
+    numbers = [allocate_build(branch_code, 1, path)[0] for _ in range(count)]
+    queue.put(numbers)
+
+def run_benchmark(processes, allocations, branch_code="D"):
+    """Стресс-тест: N процессов параллельно выделяют номера одной ветки"""
+    import multiprocessing
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, BUILD_HISTORY_FILE)
+        queue = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=_bench_worker, args=(path, branch_code, allocations, queue))
+                   for _ in range(processes)]
+
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        numbers = []
+        for _ in workers:
+            numbers.extend(queue.get())
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        final = load_history(path)
+
+    expected = processes * allocations
+    duplicates = len(numbers) - len(set(numbers))
+    return {
+        "processes": processes,
+        "allocations": expected,
+        "duplicates": duplicates,
+        "contiguous": sorted(numbers) == list(range(1, expected + 1)),
+        "final_counter": final["branch_builds"].get(branch_code, 0),
+        "seconds": round(elapsed, 4),
+        "allocations_per_second": round(expected / elapsed, 1) if elapsed else None,
+    }
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="MirGame build history tools")
+    sub = parser.add_subparsers(dest="command")
+    bench = sub.add_parser("bench", help="stress-test concurrent build number allocation")
+    bench.add_argument("-p", "--processes", type=int, default=8)
+    bench.add_argument("-n", "--allocations", type=int, default=200, help="allocations per process")
+    bench.add_argument("--json", action="store_true")
+    sub.add_parser("compact", help="fold the journal into .build_history.json")
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        result = run_benchmark(args.processes, args.allocations)
+        if args.json:
+            print(json.dumps(result, indent=2))
+        else:
+            print(f"🔧 {result['processes']} processes, {result['allocations']} allocations")
+            print(f"   Duplicates: {result['duplicates']}")
+            print(f"   Contiguous: {result['contiguous']}")
+            print(f"   Throughput: {result['allocations_per_second']} allocations/s ({result['seconds']}s)")
+        ok = result["duplicates"] == 0 and result["contiguous"] and result["final_counter"] == result["allocations"]
+        print("✅ No duplicate build numbers" if ok else "❌ Build number allocation is not unique")
+        return ok
+
+    if args.command == "compact":
+        with file_lock(lock_path(BUILD_HISTORY_FILE)):
+            history, _ = _load(BUILD_HISTORY_FILE)
+            _compact(history, BUILD_HISTORY_FILE)
+        print("✅ Build history compacted")
+        return True
+
+    parser.print_help()
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main(sys.argv[1:]) else 1)
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""Матрица сборки: одни и те же плагины под несколько вариантов (с ReAPI и без, под разные
+игровые модули) одним пулом задач вариант×плагин. Варианты описаны в build-matrix.json
+(в репозитории только шаблон build-matrix.example.json, обычная сборка матрицу не читает):
+определения для amxxpc, дополнительные каталоги включений (ищутся раньше общего), каталог
+сборки и фильтр плагинов. Метаданные, граф include и кэш артефактов общие; плагин, которому
+определения и каталоги варианта не видны, компилируется один раз на все такие варианты"""
+import os, re, sys, json, time, fnmatch, argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from fileutil import atomic_write
+from include_graph import IncludeGraph, GRAPH_FILE, CACHE_DIR, hash_bytes
+from artifact_cache import open_cache
+from plugin_meta import PluginMetaCache, resolve_info
+from compile_diagnostics import ReportWriter, collect_diagnostics, load_report
+from compile_plugins import (load_config, find_plugins, read_project_info, compile_plugin, compiler_signature,
+                             cache_flags, make_result, output_path, format_plugin_report, write_log_header,
+                             STATUS_FAILED)
+from tar_index import read_source
+from pipeline_trace import span, enable as enable_trace
+
+MATRIX_FILE = "build-matrix.json"
+MATRIX_EXAMPLE = "build-matrix.example.json"
+MATRIX_REPORT = "matrix-report.json"
+VARIANT_NAME_RE = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]*$')
+DEFINE_NAME_RE = re.compile(r'^[A-Za-z_@][A-Za-z0-9_@]*$')
+
+class MatrixError(ValueError):
+    """Некорректное описание матрицы"""
+
+def load_matrix(path, config):
+    """Варианты из файла матрицы: [{name, config, plugins, exclude}] в порядке файла"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    variants = data.get('variants') if isinstance(data, dict) else None
+    if not isinstance(variants, dict) or not variants:
+        raise MatrixError(f"{path}: no \"variants\"")
+    output = os.path.join(config['root'], data.get('output', os.path.relpath(config['compiled'], config['root'])))
+    loaded = []
+    for name, spec in variants.items():
+        if not VARIANT_NAME_RE.match(name):
+            raise MatrixError(f"bad variant name {name!r}")
+        if not isinstance(spec, dict):
+            raise MatrixError(f"variant {name}: expected an object")
+        loaded.append({'name': name, 'config': variant_config(config, name, spec, output),
+                       'plugins': list(spec.get('plugins', [])), 'exclude': list(spec.get('exclude', []))})
+    return loaded
+
+def variant_config(config, name, spec, output):
+    """Конфигурация сборки варианта поверх общей"""
+    defines = {}
+    for define, value in (spec.get('defines') or {}).items():
+        if not DEFINE_NAME_RE.match(define):
+            raise MatrixError(f"variant {name}: bad define name {define!r}")
+        if isinstance(value, bool):
+            value = int(value)
+        if not isinstance(value, (int, str)) or not re.match(r'^-?\w+$', str(value)):
+            raise MatrixError(f"variant {name}: {define} must be a number or a symbol")
+        defines[define] = value
+    compiled = os.path.abspath(os.path.join(config['root'], spec['output'])) if spec.get('output') \
+        else os.path.join(output, name)
+    variant = dict(config)
+    variant.update({
+        'variant': name,
+        'compiled': compiled,
+        'include_dirs': [os.path.abspath(os.path.join(config['root'], d)) for d in spec.get('include_dirs', [])],
+        'defines': defines,
+        'log_file': os.path.join(compiled, 'compile.log'),
+        'report_file': os.path.join(compiled, os.path.basename(config['report_file'])),
+        'profile': False,
+    })
+    return variant
+
+def select_plugins(plugins, variant, root):
+    """Плагины варианта: маски "plugins" (по умолчанию все) без масок "exclude" (пути от корня)"""
+    def matches(path, patterns):
+        rel = os.path.relpath(path, root).replace(os.sep, '/')
+        return any(fnmatch.fnmatch(rel, p) or fnmatch.fnmatch(os.path.basename(path), p) for p in patterns)
+    return [p for p in plugins if (not variant['plugins'] or matches(p, variant['plugins']))
+            and not matches(p, variant['exclude'])]
+
+def graph_path(root, include_dirs):
+    """Граф общего набора каталогов - тот же, что у compile_plugins.py; у остальных наборов свой файл"""
+    if len(include_dirs) == 1:
+        return os.path.join(root, GRAPH_FILE)
+    digest = hash_bytes("\n".join(include_dirs).encode('utf-8'))[:12]
+    return os.path.join(root, CACHE_DIR, f"include_graph.{digest}.json")
+
+class DefineScanner:
+    """Какие определения матрицы упоминаются во входах плагина (по файлу с хешем - один раз)"""
+
+    def __init__(self, names):
+        self.pattern = re.compile(r'\b(' + '|'.join(map(re.escape, sorted(names))) + r')\b') if names else None
+        self.files = {}
+
+    def mentioned(self, graph, inputs):
+        found = set()
+        if self.pattern is None:
+            return found
+        for key, digest in inputs.items():
+            if (key, digest) not in self.files:
+                text = read_source(graph.abspath(key)).decode('utf-8', errors='replace')
+                self.files[(key, digest)] = set(self.pattern.findall(text))
+            found |= self.files[(key, digest)]
+        return found
+
+def effective_config(config, inputs, base_inputs, mentioned):
+    """Флаги, которые реально влияют на плагин: неупомянутые определения и каталоги,
+    не изменившие разрешение #include, отбрасываются - одинаковые задачи вариантов совпадают"""
+    if None in inputs.values():
+        return config
+    effective = dict(config)
+    effective['defines'] = {name: value for name, value in config['defines'].items() if name in mentioned}
+    if inputs == base_inputs:
+        effective['include_dirs'] = []
+    return effective
+
+def run_matrix(plugins, config, variants, project, jobs, force=False, cache=None, max_growth=None):
+    """Собирает все варианты одним пулом; возвращает {вариант: результаты}"""
+    started = time.perf_counter()
+    selected = {v['name']: select_plugins(plugins, v, config['root']) for v in variants}
+    wanted = [p for p in plugins if any(p in s for s in selected.values())]
+    with span('metadata scan', 'build'):
+        meta = PluginMetaCache(config['root'])
+        infos = {sma: resolve_info(meta.scan(sma), project['author']) for sma in wanted}
+        meta.save()
+
+    graphs = {}
+
+    def graph_for(vconfig):
+        dirs = tuple(vconfig['include_dirs'] + [vconfig['include']])
+        if dirs not in graphs:
+            graphs[dirs] = IncludeGraph(config['root'], list(dirs), graph_path(config['root'], list(dirs)))
+        return graphs[dirs]
+
+    base_graph = graph_for(dict(config, include_dirs=[]))
+    scanner = DefineScanner({name for v in variants for name in v['config']['defines']})
+    closures = {}
+
+    def closure(graph, sma):
+        if (id(graph), sma) not in closures:
+            closures[(id(graph), sma)] = graph.closure(sma)
+        return closures[(id(graph), sma)]
+
+    # Задачи с одинаковыми входами и значимыми флагами компилируются один раз
+    jobs_by_key = {}
+    skipped = []
+    with span('plan matrix', 'build', variants=len(variants), plugins=len(wanted)):
+        for variant in variants:
+            vconfig = variant['config']
+            graph = graph_for(vconfig)
+            signature = compiler_signature(vconfig)
+            for sma in selected[variant['name']]:
+                inputs = closure(graph, sma)
+                reasons = ["forced"] if force else graph.rebuild_reasons(
+                    sma, output_path(sma, vconfig), signature, inputs, variant=variant['name'])
+                if not reasons:
+                    skipped.append((variant['name'], sma))
+                    continue
+                effective = effective_config(vconfig, inputs, closure(base_graph, sma),
+                                             scanner.mentioned(graph, inputs))
+                key = (sma, tuple(sorted(inputs.items())), tuple(cache_flags(effective))) \
+                    if effective is not vconfig else (variant['name'], sma)
+                jobs_by_key.setdefault(key, []).append((variant, sma, effective, reasons, inputs, signature))
+
+    for variant in variants:
+        os.makedirs(variant['config']['compiled'], exist_ok=True)
+    logs = {v['name']: open(v['config']['log_file'], 'w', encoding='utf-8') for v in variants}
+    writers = {v['name']: ReportWriter(v['config']['report_file'], config['root'], max_growth) for v in variants}
+    results = {v['name']: [] for v in variants}
+
+    def report(name, result):
+        result['diagnostics'] = collect_diagnostics(result, config['root'])
+        writers[name].add(result)
+        console, log_lines = format_plugin_report(result)
+        if not result['skipped']:
+            print("\n".join(f"[{name}] {line}" for line in console), flush=True)
+        logs[name].write("\n".join(log_lines) + "\n")
+        results[name].append(result)
+
+    try:
+        for log in logs.values():
+            write_log_header(log, project)
+        by_name = {v['name']: v for v in variants}
+        for name, sma in skipped:
+            report(name, make_result(sma, infos[sma], skipped=True, output_file=output_path(sma, by_name[name]['config'])))
+
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = {}
+            for group in jobs_by_key.values():
+                _, sma, effective, reasons, inputs, _ = group[0]
+                futures[pool.submit(compile_plugin, sma, effective, infos[sma], reasons, cache, inputs)] = group
+            for future in as_completed(futures):
+                first, group = future.result(), futures[future]
+                for index, (variant, sma, effective, reasons, inputs, signature) in enumerate(group):
+                    result = first if not index else share_result(first, group[0][2], effective, infos[sma], reasons)
+                    graph = graph_for(variant['config'])
+                    if result['returncode'] == 0:
+                        graph.record_build(sma, signature, inputs, variant=variant['name'])
+                    else:
+                        graph.forget(sma, variant=variant['name'])
+                    report(variant['name'], result)
+    finally:
+        for log in logs.values():
+            log.close()
+
+    with span('save caches and reports', 'build'):
+        for graph in graphs.values():
+            graph.save()
+        seconds = time.perf_counter() - started
+        for name, writer in writers.items():
+            writer.close(project, seconds)
+    for variant_results in results.values():
+        variant_results.sort(key=lambda r: r['base_name'])
+    return results
+
+def share_result(result, source_config, config, info, reasons):
+    """Результат общей задачи для другого варианта: .amxx копируется в его каталог"""
+    output_file = output_path(result['file'], config)
+    if result['returncode'] == 0:
+        with open(output_path(result['file'], source_config), 'rb') as f:
+            atomic_write(output_file, f.read())
+    return make_result(result['file'], info, result['returncode'], result['output'], 0.0, reasons,
+                       cache='hit' if result['returncode'] == 0 else result['cache'], output_file=output_file)
+
+def matrix_summary(results, variants, seconds):
+    """Итоги по вариантам для консоли и matrix-report.json"""
+    summary = {'seconds': round(seconds, 3), 'variants': []}
+    for variant in variants:
+        rows = results[variant['name']]
+        built = [r for r in rows if not r['skipped']]
+        summary['variants'].append({
+            'variant': variant['name'],
+            'output': variant['config']['compiled'],
+            'defines': variant['config']['defines'],
+            'plugins': len(rows),
+            'rebuilt': len(built),
+            'shared': sum(1 for r in built if r['cache'] == 'hit'),
+            'failed': sum(1 for r in rows if r['status'] == STATUS_FAILED),
+            'warnings': sum(len(r['missing']) for r in rows),
+            'compile_seconds': round(sum(r['seconds'] for r in built), 3),
+            'amxx_bytes': sum(r['size'] or 0 for r in rows),
+        })
+    return summary
+
+def print_matrix_summary(summary, results, project):
+    print(""); print("==========================================")
+    print(f"📊 [{project['name']}] Build matrix: {len(summary['variants'])} variants in {summary['seconds']:.2f}s "
+          f"(version {project['full_version']}, build {project['build']})")
+    print(f"{'Variant':<18} | {'Plugins':>7} | {'Rebuilt':>7} | {'Cached':>6} | {'Failed':>6} | {'CPU s':>7} | Size")
+    print("-" * 76)
+    for v in summary['variants']:
+        print(f"{v['variant']:<18} | {v['plugins']:>7} | {v['rebuilt']:>7} | {v['shared']:>6} | {v['failed']:>6} | "
+              f"{v['compile_seconds']:>7.2f} | {v['amxx_bytes'] / 1024:.1f} KiB")
+    print("-" * 76)
+    for v in summary['variants']:
+        for r in results[v['variant']]:
+            if r['status'] == STATUS_FAILED:
+                print(f"❌ [{v['variant']}] {r['base_name']}: see {os.path.join(v['output'], 'compile.log')}")
+    print(f"📂 Artifacts: {', '.join(sorted({os.path.dirname(v['output']) for v in summary['variants']}))}/<variant>")
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Build every plugin for every variant of the build matrix")
+    parser.add_argument('plugins', nargs='*', help=".sma files (default: every .sma under scripting/)")
+    parser.add_argument('-m', '--matrix', help=f"matrix file (default: $MATRIX_FILE or {MATRIX_FILE})")
+    parser.add_argument('--variant', action='append', help="build only this variant (repeatable)")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help="amxxpc processes shared by all variants (default: CPU count)")
+    parser.add_argument('--compiler', help="path to amxxpc")
+    parser.add_argument('--force', action='store_true', help="rebuild every plugin of every variant")
+    parser.add_argument('--cache', help="artifact cache: directory or http(s) URL "
+                                        "(default: $MIRGAME_CACHE or .build_cache/artifacts)")
+    parser.add_argument('--no-cache', action='store_true', help="always run amxxpc")
+    parser.add_argument('--max-growth', type=float, metavar='PCT',
+                        help="fail when a plugin of any variant grows more than PCT percent or its stack shrinks")
+    parser.add_argument('--trace', metavar='FILE', help="write a Chrome trace of the matrix build")
+    parser.add_argument('--list', action='store_true', help="only show the variants and their plugins")
+    parser.add_argument('--json', action='store_true', help="print the matrix summary as JSON")
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        enable_trace(args.trace, fresh=True)
+    config = load_config()
+    if args.compiler:
+        config['compiler'] = args.compiler
+    matrix_file = args.matrix or os.getenv('MATRIX_FILE', os.path.join(config['root'], MATRIX_FILE))
+    if not os.path.exists(matrix_file):
+        print(f"❌ No build matrix at {matrix_file}: copy {MATRIX_EXAMPLE} and describe the variants "
+              f"your plugins check with #if defined")
+        return False
+    try:
+        variants = load_matrix(matrix_file, config)
+    except (OSError, ValueError) as e:
+        print(f"❌ Cannot read build matrix: {e}")
+        return False
+    if args.variant:
+        unknown = set(args.variant) - {v['name'] for v in variants}
+        if unknown:
+            print(f"❌ Unknown variants: {', '.join(sorted(unknown))}")
+            return False
+        variants = [v for v in variants if v['name'] in args.variant]
+
+    if args.plugins:
+        plugins = [os.path.abspath(p) for p in args.plugins]
+    elif os.path.isdir(config['scripting']):
+        plugins = find_plugins(config['scripting'])
+    else:
+        print(f"❌ Scripting directory not found: {config['scripting']}")
+        return False
+
+    if args.list:
+        for variant in variants:
+            names = [os.path.basename(p) for p in select_plugins(plugins, variant, config['root'])]
+            defines = " ".join(f"{k}={v}" for k, v in variant['config']['defines'].items()) or "-"
+            print(f"🧩 {variant['name']}: {defines} -> {variant['config']['compiled']} ({len(names)} plugins)")
+            print(f"   {', '.join(names)}")
+        return True
+
+    project = read_project_info(config)
+    print(f"🔨 [{project['name']}] Building {len(variants)} variants × {len(plugins)} plugins "
+          f"with {max(1, args.jobs)} jobs...")
+    cache = None if args.no_cache else open_cache(args.cache)
+    started = time.perf_counter()
+    results = run_matrix(plugins, config, variants, project, max(1, args.jobs), args.force, cache, args.max_growth)
+    summary = matrix_summary(results, variants, time.perf_counter() - started)
+    atomic_write(os.path.join(config['compiled'], MATRIX_REPORT), json.dumps(summary, indent=2) + "\n")
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_matrix_summary(summary, results, project)
+
+    failed = sum(v['failed'] for v in summary['variants'])
+    if args.max_growth is not None:
+        grown = [v['variant'] for v in variants
+                 if any(c['regressions'] for c in load_report(v['config']['report_file']).get('size_changes', []))]
+        if grown:
+            print(f"❌ Plugin memory grew more than {args.max_growth:g}% or stack shrank in: {', '.join(grown)}")
+            return False
+    return failed == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if main(sys.argv[1:]) else 1)
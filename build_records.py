@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""Записи сборок в SQLite (.build_history.db): номер, ветка, суффикс, коммит, длительность,
+число плагинов, ошибки и размеры артефактов; выборки по ветке, времени и номеру сборки,
+тренды по неделям и импорт существующего .build_history.json"""
+import os, sys, json, sqlite3, argparse, datetime, statistics, contextlib
+
+from build_history import BUILD_HISTORY_FILE, load_history, load_journal
+from pipeline_trace import span
+
+RECORDS_FILE = os.path.splitext(BUILD_HISTORY_FILE)[0] + ".db"
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY,
+    build TEXT,
+    branch TEXT NOT NULL,
+    counter INTEGER,
+    major INTEGER,
+    suffix TEXT,
+    build_type TEXT,
+    branch_name TEXT,
+    commit_hash TEXT,
+    version TEXT,
+    started REAL,
+    seconds REAL,
+    plugins INTEGER,
+    compiled INTEGER,
+    failed INTEGER,
+    errors INTEGER,
+    warnings INTEGER,
+    cache_hits INTEGER,
+    amxx_bytes INTEGER,
+    compiles INTEGER NOT NULL DEFAULT 0,
+    source TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS builds_branch_started ON builds (branch, started);
+CREATE INDEX IF NOT EXISTS builds_started ON builds (started);
+CREATE INDEX IF NOT EXISTS builds_build ON builds (build);
+CREATE UNIQUE INDEX IF NOT EXISTS builds_branch_counter ON builds (branch, counter);
+CREATE TABLE IF NOT EXISTS artifacts (
+    build_id INTEGER NOT NULL REFERENCES builds (id) ON DELETE CASCADE,
+    plugin TEXT NOT NULL,
+    status TEXT,
+    seconds REAL,
+    amxx_size INTEGER,
+    code INTEGER,
+    data INTEGER,
+    stack_heap INTEGER,
+    PRIMARY KEY (build_id, plugin)
+);
+"""
+
+BUILD_COLUMNS = ('id', 'build', 'branch', 'counter', 'major', 'suffix', 'build_type', 'branch_name', 'commit_hash',
+                 'version', 'started', 'seconds', 'plugins', 'compiled', 'failed', 'errors', 'warnings',
+                 'cache_hits', 'amxx_bytes', 'compiles', 'source')
+REPORT_TOTALS = ('plugins', 'compiled', 'failed', 'errors', 'warnings', 'cache_hits', 'amxx_bytes')
+METRICS = ('seconds', 'plugins', 'failed', 'errors', 'warnings', 'amxx_bytes')
+PERIODS = {'day': '%Y-%m-%d', 'week': '%G-W%V', 'month': '%Y-%m'}
+
+def timestamp(value):
+    """ISO-дата или время -> секунды эпохи (None для пустых)"""
+    if not value:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.datetime.fromisoformat(value).timestamp()
+
+def isoformat(value):
+    return datetime.datetime.fromtimestamp(value).isoformat(timespec='seconds') if value is not None else None
+
+def split_build_number(build):
+    """'01D0004l' -> (major, ветка, счетчик, суффикс); None для чужого формата"""
+    if not build or len(build) < 7 or not build[:2].isdigit() or not build[3:7].isdigit():
+        return None
+    return int(build[:2]), build[2], int(build[3:7]), build[7:]
+
+class BuildRecords:
+    """SQLite-хранилище записей сборок; все записи - в транзакциях, параллельные процессы ждут блокировку"""
+
+    def __init__(self, path=RECORDS_FILE, history=None):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA foreign_keys = ON")
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            with self.db:
+                self.db.executescript(SCHEMA)
+                self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            # Новая база сразу получает сборки из существующего .build_history.json
+            if version == 0 and history and os.path.exists(history):
+                self.import_history(history)
+
+    def close(self):
+        self.db.close()
+
+    def add_build(self, build, branch, counter, major, suffix=None, build_type=None, branch_name=None,
+                  commit_hash=None, version=None, started=None, source='allocate'):
+        """Запись о выделенном номере сборки; повтор того же счетчика ветки обновляет ее"""
+        with span('record build', 'build-records'), self.db:
+            self.db.execute(
+                "INSERT INTO builds (build, branch, counter, major, suffix, build_type, branch_name, commit_hash,"
+                " version, started, source) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (branch, counter) DO UPDATE SET build = excluded.build, major = excluded.major,"
+                " suffix = excluded.suffix, build_type = excluded.build_type, branch_name = excluded.branch_name,"
+                " commit_hash = excluded.commit_hash, version = excluded.version,"
+                " started = COALESCE(excluded.started, started), source = excluded.source",
+                (build, branch, counter, major, suffix, build_type, branch_name, commit_hash, version,
+                 timestamp(started) or datetime.datetime.now().timestamp(), source))
+        return self.find(build)
+
+    def record_report(self, report):
+        """Итоги compile-report.json для сборки с его номером; без выделенного номера
+        (локальная сборка без build-mirgame) запись создается по разбору номера"""
+        project = report.get('project', {})
+        build = project.get('build')
+        parts = split_build_number(build)
+        if not parts:
+            return None
+        major, branch, counter, suffix = parts
+        with span('record compile report', 'build-records'), self.db:
+            row = self.db.execute("SELECT id FROM builds WHERE branch = ? AND counter = ?",
+                                  (branch, counter)).fetchone()
+            if row is None:
+                cursor = self.db.execute(
+                    "INSERT INTO builds (build, branch, counter, major, suffix, version, started, source)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, 'compile')",
+                    (build, branch, counter, major, suffix, project.get('full_version'),
+                     timestamp(report.get('started'))))
+                build_id = cursor.lastrowid
+            else:
+                build_id = row['id']
+            totals = report.get('totals', {})
+            self.db.execute(
+                "UPDATE builds SET seconds = ?, plugins = ?, compiled = ?, failed = ?, errors = ?, warnings = ?,"
+                " cache_hits = ?, amxx_bytes = ?, compiles = compiles + 1, version = COALESCE(version, ?)"
+                " WHERE id = ?",
+                (report.get('seconds'), *(totals.get(field) for field in REPORT_TOTALS),
+                 project.get('full_version'), build_id))
+            self.db.execute("DELETE FROM artifacts WHERE build_id = ?", (build_id,))
+            self.db.executemany(
+                "INSERT INTO artifacts (build_id, plugin, status, seconds, amxx_size, code, data, stack_heap)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(build_id, r['plugin'], r['status'], r['seconds'], r['amxx_size'],
+                  *((r.get('amxx') or {}).get(field) for field in ('code', 'data', 'stack_heap')))
+                 for r in report.get('plugins', [])])
+        return build_id
+
+    def find(self, build):
+        row = self.db.execute("SELECT * FROM builds WHERE build = ? ORDER BY id DESC LIMIT 1", (build,)).fetchone()
+        return as_dict(row)
+
+    def query(self, branch=None, since=None, until=None, build=None, limit=None):
+        """Записи по ветке, интервалу времени [since, until) и номеру, новые первыми"""
+        where, params = [], []
+        if branch:
+            where.append("branch = ?")
+            params.append(branch)
+        if since:
+            where.append("started >= ?")
+            params.append(timestamp(since))
+        if until:
+            where.append("started < ?")
+            params.append(timestamp(until))
+        if build:
+            where.append("build = ?")
+            params.append(build)
+        sql = "SELECT * FROM builds" + (" WHERE " + " AND ".join(where) if where else "")
+        sql += " ORDER BY started DESC, id DESC" + (" LIMIT ?" if limit else "")
+        return [as_dict(row) for row in self.db.execute(sql, params + ([limit] if limit else []))]
+
+    def artifacts(self, build_id):
+        return [dict(row) for row in self.db.execute(
+            "SELECT plugin, status, seconds, amxx_size, code, data, stack_heap FROM artifacts"
+            " WHERE build_id = ? ORDER BY plugin", (build_id,))]
+
+    def trend(self, metric='seconds', period='week', branch=None, since=None, until=None):
+        """[{period, builds, median, mean, min, max}] метрики собранных сборок по периодам"""
+        if metric not in METRICS or period not in PERIODS:
+            raise ValueError(f"unknown metric or period: {metric}, {period}")
+        where, params = [f"{metric} IS NOT NULL", "started IS NOT NULL"], []
+        for clause, value in (("branch = ?", branch), ("started >= ?", timestamp(since)),
+                              ("started < ?", timestamp(until))):
+            if value is not None:
+                where.append(clause)
+                params.append(value)
+        groups = {}
+        for started, value in self.db.execute(
+                f"SELECT started, {metric} FROM builds WHERE {' AND '.join(where)} ORDER BY started", params):
+            key = datetime.datetime.fromtimestamp(started).strftime(PERIODS[period])
+            groups.setdefault(key, []).append(value)
+        return [{'period': key, 'builds': len(values), 'median': statistics.median(values),
+                 'mean': round(statistics.fmean(values), 4), 'min': min(values), 'max': max(values)}
+                for key, values in groups.items()]
+
+    def branch_stats(self):
+        return [dict(row) for row in self.db.execute(
+            "SELECT branch, COUNT(*) AS builds, MAX(counter) AS last_counter, MAX(started) AS last_started,"
+            " AVG(seconds) AS mean_seconds, SUM(failed > 0) AS failed_builds FROM builds GROUP BY branch"
+            " ORDER BY branch")]
+
+    def import_history(self, path=BUILD_HISTORY_FILE):
+        """Записи из .build_history.json: журнал дает дату каждой сборки,
+        остальные номера до счетчика ветки восстанавливаются без даты"""
+        history = load_history(path)
+        entries = load_journal(path)
+        major = history.get('major_version', 1)
+        added = 0
+        with span('import history', 'build-records'), self.db:
+            for entry in entries:
+                added += self._import(entry['branch'], entry['build'], entry.get('major', major), entry.get('date'))
+            counters = dict(history.get('branch_builds', {}))
+            for entry in entries:
+                counters[entry['branch']] = max(counters.get(entry['branch'], 0), entry['build'])
+            for branch, last in counters.items():
+                for counter in range(1, last + 1):
+                    added += self._import(branch, counter, major, None)
+        return added
+
+    def _import(self, branch, counter, major, date):
+        cursor = self.db.execute(
+            "INSERT OR IGNORE INTO builds (build, branch, counter, major, started, source)"
+            " VALUES (?, ?, ?, ?, ?, 'import')",
+            (f"{major:02d}{branch}{counter:04d}", branch, counter, major, timestamp(date)))
+        return cursor.rowcount
+
+def as_dict(row):
+    return {column: row[column] for column in BUILD_COLUMNS} if row is not None else None
+
+@contextlib.contextmanager
+def open_records(path=RECORDS_FILE, history=None):
+    records = BuildRecords(path, history)
+    try:
+        yield records
+    finally:
+        records.close()
+
+def format_build(record):
+    started = isoformat(record['started']) or "-"
+    result = "-" if record['seconds'] is None else (
+        f"{record['seconds']:.1f}s, {record['plugins']} plugins, {record['failed']} failed, "
+        f"{record['amxx_bytes'] or 0} B")
+    return f"{record['build'] or '-':<10} {started:<19}  {record['commit_hash'] or '-':<8.8}  {result}"
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Query per-build records stored in SQLite")
+    parser.add_argument('--db', default=RECORDS_FILE, help=f"records database (default: {RECORDS_FILE})")
+    sub = parser.add_subparsers(dest='command')
+    listing = sub.add_parser('list', help="builds, newest first")
+    listing.add_argument('--branch', help="branch code (R, D, H, ...)")
+    listing.add_argument('--since', help="ISO date/time, inclusive")
+    listing.add_argument('--until', help="ISO date/time, exclusive")
+    listing.add_argument('--build', help="build number, e.g. 01D0004l")
+    listing.add_argument('-n', '--limit', type=int, default=20)
+    listing.add_argument('--artifacts', action='store_true', help="include per-plugin sizes")
+    listing.add_argument('--json', action='store_true')
+    trend = sub.add_parser('trend', help="a metric per day/week/month")
+    trend.add_argument('--metric', choices=METRICS, default='seconds')
+    trend.add_argument('--period', choices=sorted(PERIODS), default='week')
+    trend.add_argument('--branch')
+    trend.add_argument('--since')
+    trend.add_argument('--until')
+    trend.add_argument('--json', action='store_true')
+    stats = sub.add_parser('stats', help="builds per branch")
+    stats.add_argument('--json', action='store_true')
+    importing = sub.add_parser('import', help="import .build_history.json and compile reports")
+    importing.add_argument('--history', default=BUILD_HISTORY_FILE)
+    importing.add_argument('--report', action='append', default=[], help="compile-report.json to attach")
+    record = sub.add_parser('record', help="attach a compile report to its build")
+    record.add_argument('report', nargs='?', default="compile-report.json")
+    args = parser.parse_args(argv)
+
+    if args.command not in ('list', 'trend', 'stats', 'import', 'record'):
+        parser.print_help()
+        return True
+
+    with open_records(args.db) as records:
+        if args.command in ('import', 'record'):
+            reports = args.report if args.command == 'import' else [args.report]
+            if args.command == 'import':
+                print(f"📥 {records.import_history(args.history)} builds imported from {args.history}")
+            for path in reports:
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        build_id = records.record_report(json.load(f))
+                except (OSError, ValueError) as e:
+                    print(f"❌ Cannot read {path}: {e}")
+                    return False
+                print(f"📋 {path}: " + ("attached" if build_id else "no MirGame build number in the report"))
+            return True
+
+        if args.command == 'stats':
+            rows = records.branch_stats()
+            if args.json:
+                print(json.dumps(rows, indent=2))
+                return True
+            for r in rows:
+                mean = f", mean {r['mean_seconds']:.1f}s" if r['mean_seconds'] is not None else ""
+                print(f"📊 {r['branch']}: {r['builds']} builds, last #{r['last_counter']} "
+                      f"({isoformat(r['last_started']) or '-'}){mean}, {r['failed_builds'] or 0} failed")
+            return True
+
+        if args.command == 'trend':
+            rows = records.trend(args.metric, args.period, args.branch, args.since, args.until)
+            if args.json:
+                print(json.dumps(rows, indent=2))
+                return True
+            print(f"📈 {args.metric} per {args.period}" + (f" on {args.branch}" if args.branch else ""))
+            print(f"   {'Period':<10} {'Builds':>7} {'Median':>10} {'Mean':>10} {'Min':>10} {'Max':>10}")
+            for r in rows:
+                print(f"   {r['period']:<10} {r['builds']:>7} {r['median']:>10.2f} {r['mean']:>10.2f} "
+                      f"{r['min']:>10.2f} {r['max']:>10.2f}")
+            return True
+
+        rows = records.query(args.branch, args.since, args.until, args.build, args.limit)
+        if args.artifacts:
+            for row in rows:
+                row['artifacts'] = records.artifacts(row['id'])
+        if args.json:
+            for row in rows:
+                row['started'] = isoformat(row['started'])
+            print(json.dumps(rows, indent=2))
+            return True
+        for row in rows:
+            print(f"🔢 {format_build(row)}")
+            for a in row.get('artifacts', []):
+                print(f"      {a['plugin']:<48} {a['status']:<10} {a['amxx_size'] or '-':>8} B")
+        if not rows:
+            print("❌ No builds match")
+        return bool(rows)
+
+if __name__ == "__main__":
+    sys.exit(0 if main(sys.argv[1:]) else 1)
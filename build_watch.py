@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""Режим наблюдения: scripting/, каталог включений и lang/ отслеживаются через inotify
+(или опросом mtime, где inotify нет); граф include и метаданные плагинов живут в памяти,
+пачка сохранений сводится в один цикл, пересобираются только затронутые плагины.
+Каждое событие - строка статуса (--json - по объекту JSON на строку)"""
+import os, sys, json, time, errno, select, signal, struct, argparse, datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from include_graph import IncludeGraph
+from plugin_meta import PluginMetaCache, resolve_info
+from artifact_cache import open_cache
+from compile_diagnostics import collect_diagnostics
+from compile_plugins import (load_config, find_plugins, read_project_info, compile_plugin, compiler_signature,
+                             output_path, STATUS_SUCCESS, STATUS_WARNINGS)
+from lang_dict import load_lang_config, find_lang_files, build_bundles, write_bundles
+from lang_validate import validate_file
+from pipeline_trace import span, enable as enable_trace
+
+SOURCE_EXTENSIONS = ('.sma', '.inc', '.p', '.pawn', '.tar')
+DEBOUNCE = 0.08        # тишина после последнего события, с
+MAX_DEBOUNCE = 0.5     # дольше цикл не откладывается даже при непрерывных сохранениях
+POLL_INTERVAL = 0.25
+RESCAN = '*'           # очередь событий переполнена или изменились каталоги: перечитать все
+
+IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO = 0x08, 0x40, 0x80
+IN_CREATE, IN_DELETE, IN_DELETE_SELF = 0x100, 0x200, 0x400
+IN_Q_OVERFLOW, IN_IGNORED, IN_ISDIR = 0x4000, 0x8000, 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+INOTIFY_EVENT = struct.Struct('iIII')
+
+def watched(path, lang_dir):
+    """Файл, изменение которого что-то значит для сборки"""
+    if os.path.basename(path).startswith('.'):
+        return False
+    if os.path.dirname(path) == lang_dir:
+        return path.endswith('.txt')
+    return path.endswith(SOURCE_EXTENSIONS)
+
+class InotifyWatcher:
+    """Изменения через inotify (Linux, ctypes); новые подкаталоги добавляются на лету"""
+    backend = 'inotify'
+
+    def __init__(self, directories, lang_dir):
+        import ctypes, ctypes.util
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.get_errno = ctypes.get_errno
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(self.get_errno(), "inotify_init1 failed")
+        self.lang_dir = lang_dir
+        self.watches = {}
+        for directory in directories:
+            self.add_tree(directory)
+
+    def add_tree(self, directory):
+        for dirpath, dirnames, _ in os.walk(directory):
+            dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK)
+            if wd < 0:
+                code = self.get_errno()
+                if code == errno.ENOSPC:
+                    raise OSError(code, "inotify watch limit reached (fs.inotify.max_user_watches)")
+                continue
+            self.watches[wd] = dirpath
+
+    def read(self, timeout=None):
+        """Измененные пути (может быть RESCAN); пустое множество - событий не было за timeout"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        changed, offset = set(), 0
+        while offset + INOTIFY_EVENT.size <= len(data):
+            wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            name = os.fsdecode(data[offset + INOTIFY_EVENT.size:offset + INOTIFY_EVENT.size + length].rstrip(b'\0'))
+            offset += INOTIFY_EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                changed.add(RESCAN)
+                continue
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self.watches[wd]
+                continue
+            path = os.path.join(directory, name) if name else directory
+            if mask & IN_ISDIR or mask & IN_DELETE_SELF:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self.add_tree(path)
+                changed.add(RESCAN)
+            elif watched(path, self.lang_dir):
+                changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """Запасной вариант без inotify: снимки mtime/size отслеживаемых файлов раз в interval"""
+    backend = 'polling'
+
+    def __init__(self, directories, lang_dir, interval=POLL_INTERVAL):
+        self.directories = directories
+        self.lang_dir = lang_dir
+        self.interval = interval
+        self.files = self.snapshot()
+
+    def snapshot(self):
+        files = {}
+        for directory in self.directories:
+            for dirpath, dirnames, filenames in os.walk(directory):
+                dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+                for name in filenames:
+                    path = os.path.join(dirpath, name)
+                    if watched(path, self.lang_dir):
+                        try:
+                            stat = os.stat(path)
+                        except OSError:
+                            continue
+                        files[path] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def read(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self.snapshot()
+            changed = {path for path in current.keys() | self.files.keys()
+                       if current.get(path) != self.files.get(path)}
+            self.files = current
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            remaining = self.interval if deadline is None else deadline - time.monotonic()
+            time.sleep(max(0.0, min(self.interval, remaining)))
+
+    def close(self):
+        pass
+
+def open_watcher(directories, lang_dir, poll=False, interval=POLL_INTERVAL):
+    """inotify, если доступен; иначе опрос"""
+    if not poll:
+        try:
+            return InotifyWatcher(directories, lang_dir)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(directories, lang_dir, interval)
+
+def wait_for_changes(watcher, debounce=DEBOUNCE, max_debounce=MAX_DEBOUNCE):
+    """Блокируется до первого изменения и собирает пачку до паузы в debounce секунд;
+    возвращает (пути, момент первого события)"""
+    changed = set()
+    while not changed:
+        changed = watcher.read(None)
+    first = time.perf_counter()
+    while time.perf_counter() - first < max_debounce:
+        more = watcher.read(debounce)
+        if not more:
+            break
+        changed |= more
+    return changed, first
+
+class StatusStream:
+    """Строки статуса: читаемые (с эмодзи) или JSON Lines"""
+
+    def __init__(self, as_json=False, stream=None):
+        self.as_json = as_json
+        self.stream = stream or sys.stdout
+
+    def emit(self, event, **fields):
+        record = dict(event=event, time=datetime.datetime.now().isoformat(timespec='milliseconds'), **fields)
+        line = json.dumps(record, ensure_ascii=False) if self.as_json else self.format(record)
+        if line:
+            print(line, file=self.stream, flush=True)
+        return record
+
+    @staticmethod
+    def format(r):
+        event = r['event']
+        if event == 'start':
+            return (f"👀 Watching {', '.join(r['directories'])} ({r['backend']}), {r['plugins']} plugins, "
+                    f"{r['jobs']} jobs")
+        if event == 'change':
+            return f"📝 Changed: {', '.join(r['files'])}"
+        if event == 'compile':
+            return f"📦 Compiling: {r['plugin']} ({', '.join(r['reasons'])})"
+        if event == 'result':
+            mark = {'success': "✅", 'warnings': "⚠️", 'failed': "❌"}[r['status']]
+            cache = " (cache hit)" if r['cache'] == 'hit' else ""
+            lines = [f"{mark} {r['plugin']}: {r['status']} in {r['seconds']:.2f}s{cache}, "
+                     f"save→amxx {r['latency']:.2f}s"]
+            lines += [f"   {d['file']}({d['line']}) : {d['severity']} {d['code']}: {d['message']}"
+                      if d.get('line') else f"   {d['message']}" for d in r['diagnostics']]
+            return "\n".join(lines)
+        if event == 'cycle':
+            if not r['compiled']:
+                return "♻️ Nothing to rebuild"
+            return f"📊 {r['compiled']} compiled, {r['failed']} failed in {r['seconds']:.2f}s"
+        if event == 'lang':
+            return (f"📚 {r['file']}: {r['errors']} errors, {r['warnings']} warnings"
+                    + (", bundle rebuilt" if r['bundle'] else ""))
+        if event == 'error':
+            return f"❌ {r['message']}"
+        if event == 'stop':
+            return "👋 Watch stopped"
+        return None
+
+class WatchSession:
+    """Граф include, метаданные и пул компиляции, живущие между изменениями"""
+
+    def __init__(self, config, project, jobs, cache, status, archives=True):
+        self.config = config
+        self.project = project
+        self.cache = cache
+        self.status = status
+        self.archives = archives
+        self.graph = IncludeGraph(config['root'], [config['include']])
+        self.meta = PluginMetaCache(config['root'])
+        self.signature = compiler_signature(config)
+        self.pool = ThreadPoolExecutor(max_workers=jobs)
+        self.lang = load_lang_config()
+        self.plugins = []
+        self.refresh_plugins()
+
+    def refresh_plugins(self):
+        self.plugins = find_plugins(self.config['scripting'], self.archives) \
+            if os.path.isdir(self.config['scripting']) else []
+
+    def affected(self, changed):
+        """Плагины, в чьих входах (текущих или прошлой сборки) есть измененные файлы"""
+        structural = RESCAN in changed or any(
+            path.endswith('.tar') or not os.path.exists(path) or self.graph.key(path) not in self.graph.files
+            for path in changed)
+        if structural:
+            # Новые и удаленные файлы меняют список плагинов и разрешение #include
+            self.refresh_plugins()
+            self.graph.invalidate()
+            if RESCAN in changed:
+                return list(self.plugins)
+        else:
+            self.graph.invalidate(changed)
+        keys = {self.graph.key(path) for path in changed if path != RESCAN}
+        found = []
+        for sma in self.plugins:
+            record = self.graph.plugins.get(self.graph.key(sma), {})
+            if keys & (set(self.graph.closure(sma)) | set(record.get('inputs', {}))):
+                found.append(sma)
+        return found
+
+    def build(self, plugins, started):
+        """Компилирует устаревшие из plugins; результаты - в поток статусов по мере готовности"""
+        futures = {}
+        with span('watch plan', 'build', plugins=len(plugins)):
+            for sma in plugins:
+                inputs = self.graph.closure(sma)
+                reasons = self.graph.rebuild_reasons(sma, output_path(sma, self.config), self.signature, inputs)
+                if not reasons:
+                    continue
+                info = resolve_info(self.meta.scan(sma), self.project['author'])
+                self.status.emit('compile', plugin=os.path.basename(sma), reasons=reasons)
+                future = self.pool.submit(compile_plugin, sma, self.config, info, reasons, self.cache, inputs)
+                futures[future] = (sma, inputs)
+        failed = 0
+        for future in as_completed(futures):
+            result = future.result()
+            sma, inputs = futures[future]
+            if result['returncode'] == 0:
+                self.graph.record_build(sma, self.signature, inputs)
+            else:
+                self.graph.forget(sma)
+                failed += 1
+            diagnostics = [d for d in collect_diagnostics(result, self.config['root']) if d['severity'] != 'note']
+            status = {STATUS_SUCCESS: 'success', STATUS_WARNINGS: 'warnings'}.get(result['status'], 'failed')
+            self.status.emit('result', plugin=os.path.basename(sma), status=status,
+                             seconds=round(result['seconds'], 3), latency=round(time.perf_counter() - started, 3),
+                             cache=result['cache'], size=result['size'], diagnostics=diagnostics)
+        self.status.emit('cycle', compiled=len(futures), failed=failed,
+                         seconds=round(time.perf_counter() - started, 3))
+        # Состояние сохраняется после отчета: compile.sh увидит те же записи
+        self.graph.save()
+        self.meta.save()
+        return failed
+
+    def lang_changed(self, paths):
+        """Проверка измененных словарей; собранный бандл (compiled/lang) обновляется"""
+        bundle = os.path.isdir(self.lang['output'])
+        if bundle:
+            files = find_lang_files(self.lang['lang_dir'])
+            merged, per_file, _ = build_bundles(files, self.lang['languages'])
+            write_bundles(self.lang['output'], merged, per_file)
+        for path in sorted(paths):
+            if not os.path.exists(path):
+                continue
+            issues, _ = validate_file(path, self.lang['languages'])
+            self.status.emit('lang', file=os.path.relpath(path, self.config['root']), bundle=bundle,
+                             errors=sum(1 for i in issues if i['severity'] == 'error'),
+                             warnings=sum(1 for i in issues if i['severity'] == 'warning'),
+                             issues=[i for i in issues if i['severity'] == 'error'])
+
+    def handle(self, changed, started):
+        lang_paths = {p for p in changed if p != RESCAN and os.path.dirname(p) == self.lang['lang_dir']}
+        sources = changed - lang_paths
+        self.status.emit('change', files=sorted(os.path.relpath(p, self.config['root']) if p != RESCAN else p
+                                               for p in changed))
+        if lang_paths:
+            self.lang_changed(lang_paths)
+        if sources:
+            self.build(self.affected(sources), started)
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+        self.graph.save()
+        self.meta.save()
+
+def watch_directories(config, lang_dir):
+    """scripting/, каталог включений (если он не внутри scripting/) и lang/"""
+    directories = [config['scripting']]
+    include = os.path.abspath(config['include'])
+    if not include.startswith(os.path.abspath(config['scripting']) + os.sep):
+        directories.append(include)
+    if os.path.isdir(lang_dir):
+        directories.append(lang_dir)
+    return [d for d in directories if os.path.isdir(d)]
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Watch sources and recompile only the affected plugins")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help="number of concurrent amxxpc processes (default: CPU count)")
+    parser.add_argument('--compiler', help="path to amxxpc")
+    parser.add_argument('--cache', help="artifact cache: directory or http(s) URL "
+                                        "(default: $MIRGAME_CACHE or .build_cache/artifacts)")
+    parser.add_argument('--no-cache', action='store_true', help="always run amxxpc")
+    parser.add_argument('--poll', action='store_true', help="poll mtimes instead of using inotify")
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL, help="polling interval, seconds")
+    parser.add_argument('--debounce', type=float, default=DEBOUNCE,
+                        help="quiet time that ends a burst of saves, seconds")
+    parser.add_argument('--no-initial', action='store_true', help="do not bring the tree up to date on start")
+    parser.add_argument('--no-archives', action='store_true',
+                        help="skip .sma members of tar archives under scripting/")
+    parser.add_argument('--json', action='store_true', help="one JSON object per status line")
+    parser.add_argument('--trace', metavar='FILE', help="write a Chrome trace of the watch session")
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        enable_trace(args.trace, fresh=True)
+    config = load_config()
+    if args.compiler:
+        config['compiler'] = args.compiler
+    status = StatusStream(args.json)
+    if not os.path.isdir(config['scripting']):
+        status.emit('error', message=f"Scripting directory not found: {config['scripting']}")
+        return False
+
+    os.makedirs(config['compiled'], exist_ok=True)
+    cache = None if args.no_cache else open_cache(args.cache)
+    session = WatchSession(config, read_project_info(config), max(1, args.jobs), cache, status, not args.no_archives)
+    directories = watch_directories(config, session.lang['lang_dir'])
+    watcher = open_watcher(directories, session.lang['lang_dir'], args.poll, args.interval)
+    # SIGTERM (systemd, timeout) завершает так же, как Ctrl+C: граф и метаданные сохраняются
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    status.emit('start', backend=watcher.backend, plugins=len(session.plugins), jobs=max(1, args.jobs),
+                directories=[os.path.relpath(d, config['root']) for d in directories])
+    try:
+        if not args.no_initial:
+            session.build(session.plugins, time.perf_counter())
+        while True:
+            changed, started = wait_for_changes(watcher, args.debounce)
+            session.handle(changed, started)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        session.close()
+        status.emit('stop')
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main(sys.argv[1:]) else 1)
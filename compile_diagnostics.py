@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Структурированная диагностика компиляции: разбор вывода amxxpc, отчеты JSON и SARIF"""
+import os, re, sys, json, argparse, datetime
+
+from amxx_info import size_changes
+from fileutil import atomic_write
+from tar_index import logical_path
+
+REPORT_VERSION = 1
+REPORT_FILE = "compile-report.json"
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+META_CODE = "plugin-meta"
+
+# plugin.sma(12) : error 017: undefined symbol "foo"
+# plugin.sma(40 -- 42) : warning 217: loose indentation
+DIAGNOSTIC_RE = re.compile(
+    r'^(?P<file>.+?)\((?P<line>\d+)(?:\s*--\s*(?P<end>\d+))?\)\s*:\s*'
+    r'(?P<severity>fatal error|error|warning)\s+(?P<code>\d+)\s*:\s*(?P<message>.*?)\s*$')
+
+SARIF_LEVELS = {'fatal': 'error', 'error': 'error', 'warning': 'warning', 'note': 'note'}
+
+def sarif_path(report_path):
+    return os.path.splitext(report_path)[0] + '.sarif'
+
+def stream_path(report_path):
+    return os.path.splitext(report_path)[0] + '.jsonl'
+
+def relative_file(path, root):
+    """Путь из вывода компилятора относительно корня проекта
+    (копии членов архивов из .build_cache/sources - как путь внутри архива)"""
+    absolute = logical_path(path if os.path.isabs(path) else os.path.join(root, path), root)
+    return os.path.relpath(os.path.normpath(absolute), root).replace(os.sep, '/')
+
+def parse_compiler_output(output, root):
+    """Записи {file, line, end_line, severity, code, message} из вывода amxxpc"""
+    diagnostics = []
+    for raw in output.splitlines():
+        match = DIAGNOSTIC_RE.match(raw.strip())
+        if not match:
+            continue
+        severity = 'fatal' if match.group('severity') == 'fatal error' else match.group('severity')
+        line = int(match.group('line'))
+        diagnostics.append({
+            'file': relative_file(match.group('file'), root),
+            'line': line,
+            'end_line': int(match.group('end') or line),
+            'severity': severity,
+            'code': match.group('code'),
+            'message': match.group('message'),
+        })
+    return diagnostics
+
+def collect_diagnostics(result, root):
+    """Диагностика плагина: сообщения компилятора + предупреждения о метаданных"""
+    plugin = relative_file(result['file'], root)
+    diagnostics = [] if result['skipped'] else parse_compiler_output(result['output'], root)
+    if result['returncode'] != 0 and not any(d['severity'] != 'warning' for d in diagnostics):
+        # Компилятор упал без разбираемой ошибки (нет бинарника, сигнал и т.п.)
+        lines = [line for line in result['output'].splitlines() if line.strip()]
+        diagnostics.append({'file': plugin, 'line': None, 'end_line': None, 'severity': 'error',
+                            'code': str(result['returncode']),
+                            'message': lines[-1] if lines else f"amxxpc exited with code {result['returncode']}"})
+    for define in result['missing']:
+        diagnostics.append({'file': plugin, 'line': None, 'end_line': None, 'severity': 'warning',
+                            'code': META_CODE, 'message': f"{define} is not defined"})
+    return diagnostics
+
+def plugin_record(result, root):
+    """Запись отчета по плагину"""
+    if result['skipped']:
+        status = 'up-to-date'
+    else:
+        status = ('success', 'warnings', 'failed')[result['status']]
+    return {
+        'plugin': relative_file(result['file'], root),
+        'name': result['name'],
+        'version': result['version'],
+        'author': result['author'],
+        'status': status,
+        'seconds': round(result['seconds'], 4),
+        'amxx_size': result['size'],
+        'amxx': result.get('amxx'),
+        'cache': result['cache'],
+        'reasons': result['reasons'],
+        'diagnostics': result['diagnostics'],
+    }
+
+def build_report(records, project, started, seconds, previous=None, max_growth=None):
+    severities = [d['severity'] for r in records for d in r['diagnostics']]
+    return {
+        'version': REPORT_VERSION,
+        'project': project,
+        'started': started,
+        'seconds': round(seconds, 4),
+        'totals': {
+            'plugins': len(records),
+            'compiled': sum(1 for r in records if r['status'] != 'up-to-date' and r['cache'] != 'hit'),
+            'failed': sum(1 for r in records if r['status'] == 'failed'),
+            'up_to_date': sum(1 for r in records if r['status'] == 'up-to-date'),
+            'cache_hits': sum(1 for r in records if r['cache'] == 'hit'),
+            'errors': sum(1 for s in severities if s in ('error', 'fatal')),
+            'warnings': sum(1 for s in severities if s == 'warning'),
+            'notes': sum(1 for s in severities if s == 'note'),
+            'compile_seconds': round(sum(r['seconds'] for r in records), 4),
+            'amxx_bytes': sum(r['amxx_size'] or 0 for r in records),
+        },
+        'plugins': records,
+        # Размеры кода/данных/стека относительно предыдущего отчета (amxx_info.py)
+        'size_changes': size_changes(previous, records, max_growth),
+    }
+
+def build_sarif(records):
+    """SARIF 2.1.0: один run компилятора, правило на каждый код сообщения"""
+    rules, results = {}, []
+    for record in records:
+        for d in record['diagnostics']:
+            # Коды amxxpc - числа; у своих проверок (plugin-meta, perf_lint) код уже имя правила
+            rule_id = f"{d['severity']}-{d['code']}" if d['code'].isdigit() else d['code']
+            rules.setdefault(rule_id, {'id': rule_id, 'shortDescription': {'text': d['message']}})
+            location = {'artifactLocation': {'uri': d['file'], 'uriBaseId': '%SRCROOT%'}}
+            if d['line']:
+                location['region'] = {'startLine': d['line'], 'endLine': d['end_line']}
+            results.append({
+                'ruleId': rule_id,
+                'level': SARIF_LEVELS[d['severity']],
+                'message': {'text': d['message']},
+                'locations': [{'physicalLocation': location}],
+                'properties': {'plugin': record['plugin']},
+            })
+    return {
+        '$schema': SARIF_SCHEMA,
+        'version': '2.1.0',
+        'runs': [{
+            'tool': {'driver': {'name': 'amxxpc', 'rules': sorted(rules.values(), key=lambda r: r['id'])}},
+            'invocations': [{'executionSuccessful': not any(r['status'] == 'failed' for r in records)}],
+            'results': results,
+        }],
+    }
+
+class ReportWriter:
+    """Пишет по строке JSON на каждый готовый плагин, в конце - полный отчет и SARIF;
+    отчет прошлой сборки читается до перезаписи - для сравнения размеров .amxx"""
+
+    def __init__(self, path, root, max_growth=None):
+        self.path = path
+        self.root = root
+        self.max_growth = max_growth
+        self.records = []
+        try:
+            self.previous = load_report(path)
+        except (OSError, ValueError):
+            self.previous = None
+        self.started = datetime.datetime.now().isoformat(timespec='seconds')
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.stream = open(stream_path(path), 'w', encoding='utf-8')
+
+    def add(self, result):
+        record = plugin_record(result, self.root)
+        self.records.append(record)
+        self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.stream.flush()
+        return record
+
+    def close(self, project, seconds):
+        self.stream.close()
+        records = sorted(self.records, key=lambda r: r['plugin'])
+        report = build_report(records, project, self.started, seconds, self.previous, self.max_growth)
+        atomic_write(self.path, json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+        atomic_write(sarif_path(self.path), json.dumps(build_sarif(records), indent=2, ensure_ascii=False) + "\n")
+        return report
+
+def load_report(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Show the slowest plugins and diagnostics of a compile report")
+    parser.add_argument('report', nargs='?', default=REPORT_FILE)
+    parser.add_argument('-n', '--top', type=int, default=10, help="number of slowest plugins to show")
+    args = parser.parse_args(argv)
+
+    try:
+        report = load_report(args.report)
+    except (OSError, ValueError) as e:
+        print(f"❌ Cannot read {args.report}: {e}")
+        return False
+
+    totals = report['totals']
+    print(f"📊 {totals['plugins']} plugins, {totals['compiled']} compiled, {totals['failed']} failed, "
+          f"{totals['errors']} errors, {totals['warnings']} warnings, {report['seconds']}s wall")
+    print("\n🐢 Slowest plugins:")
+    for record in sorted(report['plugins'], key=lambda r: r['seconds'], reverse=True)[:args.top]:
+        size = f"{record['amxx_size']} B" if record['amxx_size'] is not None else "-"
+        print(f"   {record['seconds']:>8.3f}s  {size:>10}  {record['cache']:<4}  {record['plugin']}")
+    for record in report['plugins']:
+        for d in record['diagnostics']:
+            location = f"{d['file']}:{d['line']}" if d['line'] else d['file']
+            print(f"{location}: {d['severity']} {d['code']}: {d['message']}")
+    return totals['failed'] == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if main(sys.argv[1:]) else 1)
@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""Параллельная компиляция плагинов AMXX (замена последовательного цикла compile.sh)"""
+import os, sys, time, argparse, datetime, subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from update_version import load_version_document
+from include_graph import IncludeGraph, hash_bytes
+from artifact_cache import open_cache, cache_key
+from fileutil import atomic_write
+from plugin_meta import PluginMetaCache, resolve_info
+from compile_diagnostics import ReportWriter, collect_diagnostics, load_report, sarif_path, REPORT_FILE
+from amxx_info import amxx_summary, format_change
+from tar_index import find_archive_sources, materialize, split_member_path
+from perf_lint import PerfLinter, as_diagnostics, TOOL as PERF_TOOL
+from pawn_profile import instrument_file
+from pipeline_trace import span, enable as enable_trace
+from build_history import BUILD_HISTORY_FILE
+from build_records import RECORDS_FILE, open_records
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+STATUS_SUCCESS, STATUS_WARNINGS, STATUS_FAILED = 0, 1, 2
+STATUS_DISPLAY = {
+    STATUS_SUCCESS: "✅ Success",
+    STATUS_WARNINGS: "⚠️ Success (warnings)",
+    STATUS_FAILED: "❌ Failed",
+}
+UP_TO_DATE_DISPLAY = "♻️ Up to date"
+SEPARATOR = "------------------------------------------"
+TABLE_SEPARATOR = "------------------------------------------------------------"
+
+def load_config():
+    """Пути сборки: значения из config.sh (через окружение) или по умолчанию"""
+    root = os.getenv('ROOT_DIR', ROOT_DIR)
+    scripting = os.getenv('SCRIPTING_DIR', os.path.join(root, 'scripting'))
+    include = os.getenv('INCLUDE_DIR', os.path.join(scripting, 'include'))
+    return {
+        'root': root,
+        'scripting': scripting,
+        'include': include,
+        'compiled': os.getenv('COMPILED_DIR', os.path.join(root, 'compiled')),
+        'compiler': os.getenv('COMPILER', os.path.join(root, 'amxxpc')),
+        'version_file': os.getenv('VERSION_FILE', os.path.join(include, 'version.inc')),
+        'log_file': os.getenv('LOG_FILE', os.path.join(root, 'compile.log')),
+        'report_file': os.getenv('REPORT_FILE', os.path.join(root, REPORT_FILE)),
+    }
+
+def find_plugins(scripting_dir, archives=True):
+    """Все .sma в каталоге scripting (рекурсивно), в стабильном порядке,
+    затем .sma из tar-архивов (если одноименного файла нет в дереве)"""
+    plugins = []
+    for dirpath, dirnames, filenames in os.walk(scripting_dir):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.endswith('.sma'):
+                plugins.append(os.path.join(dirpath, name))
+    if archives:
+        names = {os.path.basename(p) for p in plugins}
+        plugins.extend(p for p in find_archive_sources(scripting_dir) if os.path.basename(p) not in names)
+    return plugins
+
+def output_path(sma_file, config):
+    base_name = os.path.splitext(os.path.basename(sma_file))[0]
+    return os.path.join(config['compiled'], base_name + '.amxx')
+
+def compiler_signature(config):
+    """Отпечаток компилятора и флагов: при смене пересобирается все"""
+    try:
+        stat = os.stat(config['compiler'])
+        compiler = f"{os.path.abspath(config['compiler'])}:{stat.st_size}:{stat.st_mtime_ns}"
+    except OSError:
+        compiler = config['compiler']
+    profile = "|profile" if config.get('profile') else ""
+    variant = "".join(f"|{flag}" for flag in include_flags(config)[:-1] + define_flags(config))
+    return hash_bytes(f"{compiler}|-i{config['include']}{profile}{variant}".encode('utf-8'))[:16]
+
+def include_flags(config):
+    """-i каталогов включений: каталоги варианта матрицы (build_matrix.py) раньше общего"""
+    return [f"-i{path}" for path in config.get('include_dirs', [])] + [f"-i{config['include']}"]
+
+def define_flags(config):
+    """Определения варианта матрицы в виде sym=value для amxxpc"""
+    return [f"{name}={value}" for name, value in sorted(config.get('defines', {}).items())]
+
+def cache_flags(config):
+    """Флаги компилятора для ключа кэша (пути относительно корня - ключ общий для машин)"""
+    flags = [f"-i{os.path.relpath(path, config['root'])}"
+             for path in config.get('include_dirs', []) + [config['include']]] + define_flags(config)
+    return flags + ["--profile"] if config.get('profile') else flags
+
+def make_result(sma_file, info, returncode=0, output='', seconds=0.0, reasons=None, skipped=False, cache='off',
+                output_file=None):
+    if returncode != 0:
+        status = STATUS_FAILED
+    elif info['missing']:
+        status = STATUS_WARNINGS
+    else:
+        status = STATUS_SUCCESS
+    size = os.path.getsize(output_file) if returncode == 0 and output_file and os.path.isfile(output_file) else None
+
+    return {
+        'file': sma_file,
+        'base_name': os.path.splitext(os.path.basename(sma_file))[0],
+        'name': info['name'],
+        'version': info['version'],
+        'author': info['author'],
+        'uses_project_author': info['uses_project_author'],
+        'missing': info['missing'],
+        'returncode': returncode,
+        'output': output,
+        'status': status,
+        'seconds': seconds,
+        'reasons': reasons or [],
+        'skipped': skipped,
+        'cache': cache,
+        'size': size,
+        'amxx': amxx_summary(output_file) if size is not None else None,
+        'diagnostics': [],
+    }
+
+def compile_plugin(sma_file, config, info, reasons=None, cache=None, inputs=None):
+    """Компилирует один плагин (или берет .amxx из кэша); весь вывод компилятора собирается отдельно"""
+    with span(os.path.basename(sma_file), 'compile', reasons=', '.join(reasons or [])):
+        return _compile_plugin(sma_file, config, info, reasons, cache, inputs)
+
+def _compile_plugin(sma_file, config, info, reasons=None, cache=None, inputs=None):
+    output_file = output_path(sma_file, config)
+
+    started = time.perf_counter()
+    key = None
+    if cache is not None and inputs is not None and None not in inputs.values():
+        key = cache_key(inputs, config['compiler'], cache_flags(config))
+        with span('cache get', 'cache'):
+            hit = cache.get(key)
+        if hit:
+            data, metadata = hit
+            atomic_write(output_file, data)
+            return make_result(sma_file, info, 0, metadata.get('output', ''),
+                               time.perf_counter() - started, reasons, cache='hit', output_file=output_file)
+
+    try:
+        # Члены tar-архивов (с их "..."-включениями) копируются по одному, без распаковки всего архива
+        for member in (inputs or {}):
+            if split_member_path(member):
+                materialize(os.path.join(config['root'], member), config['root'])
+        source = materialize(sma_file, config['root'])
+        command = [config['compiler'], source, f"-o{output_file}"] + include_flags(config) + define_flags(config)
+        if config.get('profile'):
+            # Обернутая копия лежит в .build_cache/profile: "..."-включения ищутся рядом с оригиналом
+            command[1] = instrument_file(sma_file, source, config['root'])
+            command.append(f"-i{os.path.dirname(source)}")
+        with span('amxxpc', 'subprocess', source=os.path.basename(command[1])):
+            proc = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, cwd=config['root'])
+        returncode = proc.returncode
+        output = proc.stdout.decode('utf-8', errors='replace').replace(command[1], source)
+    except OSError as e:
+        returncode = 127
+        output = f"{config['compiler']}: {e}\n"
+    seconds = time.perf_counter() - started
+
+    if key and returncode == 0 and os.path.isfile(output_file):
+        with span('cache put', 'cache'), open(output_file, 'rb') as f:
+            cache.put(key, f.read(), {'plugin': os.path.relpath(sma_file, config['root']),
+                                      'output': output, 'compile_seconds': round(seconds, 3)})
+
+    return make_result(sma_file, info, returncode, output, seconds, reasons,
+                       cache='miss' if key else 'off', output_file=output_file)
+
+def format_plugin_report(result):
+    """Строки для консоли и блок для compile.log по одному плагину"""
+    base_name = result['base_name']
+    version_display = f"v{result['version']}" if result['version'] else "Not version"
+    display_name = base_name if result['name'] == "Not name" else result['name']
+
+    if result['skipped']:
+        console = [f"♻️ Up to date: {base_name}.amxx"]
+        log = [f"🔧 Plugin: {display_name} {version_display} (file: {base_name}.sma)",
+               "♻️ Status: Up to date", SEPARATOR]
+        return console, log
+
+    console = [f"📦 Compiling: {display_name} {version_display}"]
+    log = []
+    if result['uses_project_author']:
+        log.append(f"📝 Using PROJECT_AUTHOR: {result['author']}")
+    log.append(f"🔧 Plugin: {display_name} {version_display} (file: {base_name}.sma)")
+    log.append(f"👤 Author: {result['author']}")
+    if result['reasons']:
+        console.append(f"   ↳ Rebuild: {', '.join(result['reasons'])}")
+        log.append(f"🔁 Rebuild: {', '.join(result['reasons'])}")
+
+    if result['missing']:
+        warning_msg = f"⚠️ [WARNING] Plugin {base_name}: Not found {' '.join(result['missing'])}"
+        console.append(warning_msg)
+        log.append(warning_msg)
+
+    if result['output']:
+        log.append(result['output'].rstrip('\n'))
+
+    if result['returncode'] == 0:
+        console.append(f"✅ Success: {base_name}.amxx" + (" (cache hit)" if result['cache'] == 'hit' else ""))
+        log.append("✅ Status: Success")
+    else:
+        console.append(f"❌ Failed: {result['name']} (see compile.log)")
+        log.append("❌ Status: Failed")
+        console.extend(f"   {d['file']}({d['line']}) : {d['severity']} {d['code']}: {d['message']}"
+                       if d['line'] else f"   {d['message']}"
+                       for d in result['diagnostics'] if d['severity'] not in ('warning', 'note')
+                       and d.get('tool') != PERF_TOOL)
+
+    for d in result['diagnostics']:
+        if d.get('tool') == PERF_TOOL and d['severity'] != 'note':
+            line = f"🐌 {d['file']}({d['line']}) : {d['severity']} {d['code']}: {d['message']}"
+            console.append(f"   {line}")
+            log.append(line)
+
+    log.append(SEPARATOR)
+    return console, log
+
+def write_log_header(log, project):
+    log.write("==========================================\n")
+    log.write(f"🏗️ Project: {project['name']}\n")
+    log.write(f"👤 Author: {project['author']}\n")
+    log.write(f"🔄 Version: {project['full_version']}\n")
+    log.write(f"🔢 Build: {project['build']}\n")
+    log.write(f"📅 Date: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+    log.write("\n")
+
+def read_project_info(config):
+    doc = load_version_document(config['version_file'])
+    info = doc.info() if doc else {}
+    return {
+        'name': info.get('name') or "MirGame Multi-Mod",
+        'author': info.get('author') or "MirGame",
+        'build': info.get('build') or "01D0001l",
+        'full_version': f"{info.get('version') or ''}{info.get('suffix') or ''}",
+    }
+
+def plan_build(plugins, config, graph, force=False):
+    """Делит плагины на требующие сборки (с причинами) и актуальные.
+    Возвращает список (плагин, причины, входы графа)"""
+    signature = compiler_signature(config)
+    plan = []
+    for sma in plugins:
+        inputs = graph.closure(sma)
+        if force:
+            reasons = ["forced"]
+        else:
+            reasons = graph.rebuild_reasons(sma, output_path(sma, config), signature, inputs)
+        plan.append((sma, reasons, inputs))
+    return plan, signature
+
+def run_build(plugins, config, project, jobs, force=False, cache=None, report_file=None, perf_lint=True,
+              max_growth=None):
+    """Компилирует изменившиеся плагины пулом из jobs потоков,
+    отчет выводится по мере готовности; пересобираемые плагины проходят perf_lint"""
+    started = time.perf_counter()
+    os.makedirs(config['compiled'], exist_ok=True)
+    graph = IncludeGraph(config['root'], [config['include']])
+    with span('plan build', 'build', plugins=len(plugins)):
+        plan, signature = plan_build(plugins, config, graph, force)
+    with span('metadata scan', 'build'):
+        meta = PluginMetaCache(config['root'])
+        infos = {sma: resolve_info(meta.scan(sma), project['author']) for sma in plugins}
+        meta.save()
+    results = []
+    writer = ReportWriter(report_file, config['root'], max_growth) if report_file else None
+    # Линтер работает поверх того же графа: его save() не должен затирать записи сборки
+    linter = PerfLinter(config['root'], [config['include']], graph) if perf_lint else None
+
+    with open(config['log_file'], 'w', encoding='utf-8') as log:
+        write_log_header(log, project)
+
+        def report(result):
+            result['diagnostics'] = collect_diagnostics(result, config['root'])
+            if linter and not result['skipped']:
+                with span(f"perf_lint {result['base_name']}", 'lint'):
+                    result['diagnostics'].extend(as_diagnostics(linter.lint(result['file'])))
+            if writer:
+                writer.add(result)
+            console, log_lines = format_plugin_report(result)
+            print("\n".join(console), flush=True)
+            log.write("\n".join(log_lines) + "\n")
+            log.flush()
+            results.append(result)
+
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = {}
+            for sma, reasons, inputs in plan:
+                if reasons:
+                    future = pool.submit(compile_plugin, sma, config, infos[sma], reasons, cache, inputs)
+                    futures[future] = (sma, inputs)
+                else:
+                    report(make_result(sma, infos[sma], skipped=True, output_file=output_path(sma, config)))
+            for future in as_completed(futures):
+                result = future.result()
+                sma, inputs = futures[future]
+                if result['returncode'] == 0:
+                    graph.record_build(sma, signature, inputs)
+                else:
+                    graph.forget(sma)
+                report(result)
+
+    with span('save caches and reports', 'build'):
+        if linter:
+            linter.save()
+        graph.save()
+        if writer:
+            writer.close(project, time.perf_counter() - started)
+    results.sort(key=lambda r: r['base_name'])
+    return results
+
+def print_summary(results, config, project, report_file=None):
+    successful = sum(1 for r in results if r['status'] == STATUS_SUCCESS)
+    with_warnings = sum(1 for r in results if r['status'] == STATUS_WARNINGS)
+    failed = sum(1 for r in results if r['status'] == STATUS_FAILED)
+    total_warnings = sum(len(r['missing']) for r in results)
+    up_to_date = sum(1 for r in results if r['skipped'])
+    cache_hits = sum(1 for r in results if r['cache'] == 'hit')
+
+    print(""); print("==========================================")
+    print(f"📊 [{project['name']}] Compilation summary:")
+    print(f"✅ Successful: {successful} (without warnings)")
+    print(f"⚠️ With warnings: {with_warnings}")
+    print(f"❌ Failed: {failed}")
+    print(f"📋 Total warnings: {total_warnings}")
+    print(f"♻️ Up to date (not rebuilt): {up_to_date}")
+    print(f"⚡ Cache hits: {cache_hits}")
+    print(f"🏷️ Version: {project['full_version']} (build {project['build']})")
+    print(f"📋 Details saved to: {config['log_file']}")
+    if report_file:
+        print(f"📄 Diagnostics: {report_file} (SARIF: {sarif_path(report_file)})")
+    compiled = sorted((r for r in results if not r['skipped']), key=lambda r: r['seconds'], reverse=True)
+    perf = [d['severity'] for r in results for d in r['diagnostics'] if d.get('tool') == PERF_TOOL]
+    if perf:
+        print(f"🐌 Hot-path findings: {perf.count('error')} errors, {perf.count('warning')} warnings, "
+              f"{perf.count('note')} notes (python3 perf_lint.py)")
+    changes = load_report(report_file).get('size_changes', []) if report_file else []
+    if changes:
+        regressions = [c for c in changes if c['regressions']]
+        print(f"📐 Size changes since the previous build: {len(changes)} plugins, {len(regressions)} regressions "
+              f"(python3 amxx_info.py)")
+        for change in regressions:
+            print(f"   ❌ {change['plugin']}: {format_change(change)}")
+    if compiled:
+        print("🐢 Slowest: " + ", ".join(f"{r['base_name']} ({r['seconds']:.2f}s)" for r in compiled[:3]))
+
+    print(""); print("📦 Plugins details:")
+    print(TABLE_SEPARATOR)
+    print(f"{'File':<20} | {'Name':<15} | {'Version':<10} | {'Author':<15} | Status")
+    print(TABLE_SEPARATOR)
+    for r in results:
+        version_display = f"v{r['version']}" if r['version'] else "-"
+        status_display = STATUS_DISPLAY.get(r['status'], "❓ Unknown")
+        if r['skipped']:
+            status_display = UP_TO_DATE_DISPLAY
+        print(f"{r['base_name']:<20} | {r['name']:<15} | {version_display:<10} | {r['author']:<15} | {status_display}")
+    print(TABLE_SEPARATOR)
+    return failed
+
+def record_build_report(report_file, config):
+    """Итоги полной сборки - в запись ее номера в .build_history.db (build_records.py)"""
+    try:
+        with open_records(os.path.join(config['root'], RECORDS_FILE),
+                          os.path.join(config['root'], BUILD_HISTORY_FILE)) as records:
+            records.record_report(load_report(report_file))
+    except Exception as e:
+        print(f"⚠️ Build record not saved: {e}")
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Compile AMXX plugins in parallel")
+    parser.add_argument('plugins', nargs='*', help=".sma files (default: every .sma under scripting/)")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help="number of concurrent amxxpc processes (default: CPU count)")
+    parser.add_argument('--compiler', help="path to amxxpc")
+    parser.add_argument('--force', action='store_true',
+                        help="rebuild every plugin, ignoring the include graph")
+    parser.add_argument('--cache', help="artifact cache: directory or http(s) URL "
+                                        "(default: $MIRGAME_CACHE or .build_cache/artifacts)")
+    parser.add_argument('--no-cache', action='store_true', help="always run amxxpc")
+    parser.add_argument('--report', help="JSON diagnostics report; SARIF and a .jsonl stream are written "
+                                         "next to it (default: $REPORT_FILE or compile-report.json)")
+    parser.add_argument('--no-report', action='store_true', help="do not write diagnostics reports")
+    parser.add_argument('--no-perf-lint', action='store_true', help="skip the hot-path performance linter")
+    parser.add_argument('--perf-strict', action='store_true',
+                        help="fail the build when the hot-path linter reports errors")
+    parser.add_argument('--profile', action='store_true',
+                        help="wrap public functions with timers that dump [prof] lines to the server console "
+                             "(see pawn_profile.py analyze)")
+    parser.add_argument('--max-growth', type=float, metavar='PCT',
+                        help="fail when a plugin's code, data or stack/heap grows more than PCT percent "
+                             "since the previous report, or its stack/heap shrinks")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="write a Chrome trace of the build (and a FILE.txt summary); "
+                             "$MIRGAME_TRACE does the same and keeps appending")
+    parser.add_argument('--no-archives', action='store_true',
+                        help="skip .sma members of tar archives under scripting/")
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        enable_trace(args.trace, fresh=True)
+    config = load_config()
+    if args.compiler:
+        config['compiler'] = args.compiler
+    config['profile'] = args.profile
+    project = read_project_info(config)
+
+    print(f"🔨 [{project['name']}] Starting compilation...")
+    print(f"🏷️ Version: {project['full_version']} (build {project['build']})")
+
+    if args.plugins:
+        plugins = [os.path.abspath(p) for p in args.plugins]
+    else:
+        if not os.path.isdir(config['scripting']):
+            print(f"❌ Scripting directory not found: {config['scripting']}")
+            return False
+        print(f"🔍 Searching for .sma files in: {config['scripting']}")
+        plugins = find_plugins(config['scripting'], not args.no_archives)
+        print(f"📋 Found {len(plugins)} .sma files to compile")
+        if not plugins:
+            print(f"❌ No .sma files found in {config['scripting']}")
+            return False
+
+    cache = None if args.no_cache else open_cache(args.cache)
+    report_file = None if args.no_report else os.path.abspath(args.report or config['report_file'])
+    results = run_build(plugins, config, project, max(1, args.jobs), args.force, cache, report_file,
+                        not args.no_perf_lint, args.max_growth)
+    failed = print_summary(results, config, project, report_file)
+    if report_file and not args.plugins and not args.profile:
+        record_build_report(report_file, config)
+    perf_errors = sum(1 for r in results for d in r['diagnostics']
+                      if d.get('tool') == PERF_TOOL and d['severity'] == 'error')
+    if args.perf_strict and perf_errors:
+        print(f"❌ {perf_errors} hot-path performance errors (--perf-strict)")
+        return False
+    if args.max_growth is not None and report_file and any(
+            c['regressions'] for c in load_report(report_file).get('size_changes', [])):
+        print(f"❌ Plugin memory grew more than {args.max_growth:g}% or stack shrank (--max-growth)")
+        return False
+    return failed == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if main(sys.argv[1:]) else 1)
@@ -11,17 +11,27 @@ PLUGINS_DIR="$SCRIPTING_DIR"
 # ==================== ⚙️ EXECUTABLES ====================
 COMPILER="$ROOT_DIR/amxxpc"
 COMPILE_SCRIPT="$ROOT_DIR/compile.sh"
+COMPILE_DRIVER="$ROOT_DIR/compile_plugins.py"
 UPDATE_SCRIPT="$ROOT_DIR/update_version.py"
 
 # ==================== 📄 FILES ====================
 VERSION_FILE="$SCRIPTING_DIR/include/version.inc"
 CONFIG_FILE="$ROOT_DIR/config.sh"
 LOG_FILE="$ROOT_DIR/compile.log"
+MATRIX_FILE="$ROOT_DIR/build-matrix.json"    # варианты сборки (build_matrix.py)
 
 # ==================== ⚙️ SETTINGS ====================
 COMPILER_FLAGS="-i$INCLUDE_DIR"
 DEFAULT_OUTPUT="$COMPILED_DIR"
 
+# ==================== 🌐 LANG ====================
+LANG_DIR="$ROOT_DIR/lang"
+LANGUAGES="en ru"    # языки в собираемых словарях (пусто - все)
+
+# ==================== 🚀 DEPLOY ====================
+CONFIGS_DIR="$ROOT_DIR/configs"
+DEPLOY_TARGETS=""    # каталоги addons/amxmodx серверов через пробел (deploy.py push)
+
 # ==================== 🔧 FUNCTIONS ====================
 get_define_value() {
     local file="$1" define_name="$2"
@@ -41,9 +51,11 @@ check_requirements() {
 
 # ==================== 🚀 EXPORT VARIABLES ====================
 export ROOT_DIR SCRIPTING_DIR COMPILED_DIR INCLUDE_DIR PLUGINS_DIR
-export COMPILER COMPILE_SCRIPT UPDATE_SCRIPT
-export VERSION_FILE CONFIG_FILE LOG_FILE
+export COMPILER COMPILE_SCRIPT COMPILE_DRIVER UPDATE_SCRIPT
+export VERSION_FILE CONFIG_FILE LOG_FILE MATRIX_FILE
 export COMPILER_FLAGS DEFAULT_OUTPUT
+export LANG_DIR LANGUAGES
+export CONFIGS_DIR DEPLOY_TARGETS
 
 # ==================== 📝 INITIALIZATION ====================
 create_project_structure
\ No newline at end of file
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""Дельта-деплой сборки на серверы: манифест хешей файлов сборки сравнивается
+с последним выложенным на каждую цель, копируются только изменения (параллельно по целям).
+Цель - каталог addons/amxmodx (локальный или смонтированный)"""
+import os, sys, json, time, datetime, argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from fileutil import atomic_write, file_lock
+from artifact_cache import file_digest
+
+MANIFEST_VERSION = 1
+MANIFEST_FILE = "deploy-manifest.json"
+STATE_DIR = ".mirgame-deploy"
+KEEP_MANIFESTS = 5
+
+def load_deploy_config():
+    """Каталоги сборки и цели деплоя (из config.sh или по умолчанию)"""
+    from compile_plugins import load_config
+    config = load_config()
+    config['lang'] = os.getenv('LANG_DIR', os.path.join(config['root'], 'lang'))
+    config['configs'] = os.getenv('CONFIGS_DIR', os.path.join(config['root'], 'configs'))
+    config['targets'] = os.getenv('DEPLOY_TARGETS', '').split()
+    return config
+
+def collect_files(config):
+    """{путь на сервере: локальный файл}: плагины, словари (собранные, если есть) и конфиги"""
+    files = {}
+    compiled = config['compiled']
+    if os.path.isdir(compiled):
+        for name in sorted(os.listdir(compiled)):
+            if name.endswith('.amxx'):
+                files[f"plugins/{name}"] = os.path.join(compiled, name)
+    built_lang = os.path.join(compiled, 'lang')
+    lang_dir = built_lang if os.path.isdir(built_lang) and os.listdir(built_lang) else config['lang']
+    if os.path.isdir(lang_dir):
+        for name in sorted(os.listdir(lang_dir)):
+            if name.endswith('.txt'):
+                files[f"data/lang/{name}"] = os.path.join(lang_dir, name)
+    if os.path.isdir(config['configs']):
+        for dirpath, dirnames, filenames in os.walk(config['configs']):
+            dirnames.sort()
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                files["configs/" + os.path.relpath(path, config['configs']).replace(os.sep, '/')] = path
+    return files
+
+def build_manifest(config, project):
+    files = {}
+    for rel, path in collect_files(config).items():
+        files[rel] = {'sha256': file_digest(path), 'size': os.path.getsize(path),
+                      'source': os.path.relpath(path, config['root']).replace(os.sep, '/')}
+    return {
+        'version': MANIFEST_VERSION,
+        'build': project['build'],
+        'full_version': project['full_version'],
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'files': files,
+    }
+
+def diff_manifests(old, new):
+    """{'add': [...], 'update': [...], 'delete': [...]} для перехода old -> new"""
+    old_files, new_files = old.get('files', {}) if old else {}, new['files']
+    return {
+        'add': sorted(rel for rel in new_files if rel not in old_files),
+        'update': sorted(rel for rel in new_files if rel in old_files
+                         and old_files[rel]['sha256'] != new_files[rel]['sha256']),
+        'delete': sorted(rel for rel in old_files if rel not in new_files),
+    }
+
+class Target:
+    """Каталог сервера: история выложенных манифестов и хранилище объектов
+    (по sha256) в .mirgame-deploy - из него делается откат"""
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.state = os.path.join(self.path, STATE_DIR)
+        self.history_dir = os.path.join(self.state, 'history')
+        self.objects_dir = os.path.join(self.state, 'objects')
+
+    def history(self):
+        """Номера выложенных манифестов по возрастанию"""
+        try:
+            return sorted(int(name[:-5]) for name in os.listdir(self.history_dir) if name.endswith('.json'))
+        except OSError:
+            return []
+
+    def manifest(self, number):
+        with open(os.path.join(self.history_dir, f"{number:06d}.json"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def current(self):
+        history = self.history()
+        return self.manifest(history[-1]) if history else None
+
+    def lock(self):
+        os.makedirs(self.state, exist_ok=True)
+        return file_lock(os.path.join(self.state, 'lock'))
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def store(self, digest, data):
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            atomic_write(path, data)
+
+    def drifted(self, manifest):
+        """Файлы, которые на сервере отсутствуют или изменены вручную после деплоя"""
+        drift = []
+        for rel, entry in (manifest or {}).get('files', {}).items():
+            path = os.path.join(self.path, rel)
+            if not os.path.isfile(path) or file_digest(path) != entry['sha256']:
+                drift.append(rel)
+        return sorted(drift)
+
+    def apply(self, manifest, changes, read):
+        """Атомарно заменяет (и удаляет) файлы по одному; возвращает число записанных байт"""
+        written = 0
+        for rel in changes['add'] + changes['update']:
+            entry = manifest['files'][rel]
+            data = read(rel, entry)
+            self.store(entry['sha256'], data)
+            atomic_write(os.path.join(self.path, rel), data)
+            written += len(data)
+        for rel in changes['delete']:
+            try:
+                os.remove(os.path.join(self.path, rel))
+            except FileNotFoundError:
+                pass
+        return written
+
+    def record(self, manifest, keep=KEEP_MANIFESTS):
+        history = self.history()
+        number = (history[-1] + 1) if history else 1
+        atomic_write(os.path.join(self.history_dir, f"{number:06d}.json"), json.dumps(manifest, indent=1))
+        self.prune(keep)
+
+    def prune(self, keep):
+        """Старые манифесты и объекты, на которые не ссылаются оставшиеся, удаляются"""
+        history = self.history()
+        for number in history[:-keep]:
+            os.remove(os.path.join(self.history_dir, f"{number:06d}.json"))
+        referenced = {entry['sha256'] for number in history[-keep:] for entry in self.manifest(number)['files'].values()}
+        if not os.path.isdir(self.objects_dir):
+            return
+        for dirpath, _, filenames in os.walk(self.objects_dir):
+            for name in filenames:
+                if name not in referenced:
+                    os.remove(os.path.join(dirpath, name))
+
+def push(target, manifest, root, dry_run=False, verify=False, keep=KEEP_MANIFESTS):
+    """Выкладывает дельту на одну цель; возвращает отчет"""
+    started = time.perf_counter()
+    target = Target(target)
+    with target.lock():
+        current = target.current()
+        changes = diff_manifests(current, manifest)
+        # Новая запись истории - только если сборка отличается от выложенной (не при одном ремонте)
+        new_build = current is None or any(changes.values())
+        if verify and current:
+            # Файлы, испорченные на сервере, перезаливаются, даже если манифест совпадает
+            drift = {rel for rel in target.drifted(current) if rel in manifest['files']}
+            changes['update'] = sorted((set(changes['update']) | drift) - set(changes['add']))
+        changed = any(changes.values())
+
+        def read(rel, entry):
+            with open(os.path.join(root, entry['source']), 'rb') as f:
+                return f.read()
+
+        written = 0
+        if changed and not dry_run:
+            written = target.apply(manifest, changes, read)
+            if new_build:
+                target.record(manifest, keep)
+    return {'target': target.path, 'changes': changes, 'bytes': written, 'dry_run': dry_run,
+            'previous_build': current['build'] if current else None,
+            'seconds': round(time.perf_counter() - started, 4)}
+
+def rollback(target, dry_run=False):
+    """Возвращает цель к предыдущему манифесту из объектов .mirgame-deploy"""
+    started = time.perf_counter()
+    target = Target(target)
+    with target.lock():
+        history = target.history()
+        if len(history) < 2:
+            return {'target': target.path, 'error': "no previous deployment to roll back to"}
+        current, previous = target.manifest(history[-1]), target.manifest(history[-2])
+        changes = diff_manifests(current, previous)
+        missing = [rel for rel in changes['add'] + changes['update']
+                   if not os.path.exists(target.object_path(previous['files'][rel]['sha256']))]
+        if missing:
+            return {'target': target.path, 'error': f"objects missing for {', '.join(missing)}"}
+
+        def read(rel, entry):
+            with open(target.object_path(entry['sha256']), 'rb') as f:
+                return f.read()
+
+        written = 0
+        if not dry_run:
+            written = target.apply(previous, changes, read)
+            os.remove(os.path.join(target.history_dir, f"{history[-1]:06d}.json"))
+    return {'target': target.path, 'changes': changes, 'bytes': written, 'dry_run': dry_run,
+            'previous_build': current['build'], 'build': previous['build'],
+            'seconds': round(time.perf_counter() - started, 4)}
+
+def run_parallel(function, targets, *args):
+    with ThreadPoolExecutor(max_workers=max(1, len(targets))) as pool:
+        return list(pool.map(lambda target: function(target, *args), targets))
+
+def print_report(report, verbose):
+    if report.get('error'):
+        print(f"❌ {report['target']}: {report['error']}")
+        return
+    changes = report['changes']
+    mode = " (dry run)" if report['dry_run'] else ""
+    print(f"🚀 {report['target']}: +{len(changes['add'])} ~{len(changes['update'])} -{len(changes['delete'])}, "
+          f"{report['bytes']} bytes in {report['seconds']:.3f}s{mode}")
+    if verbose or report['dry_run']:
+        for kind, mark in (('add', '+'), ('update', '~'), ('delete', '-')):
+            for rel in changes[kind]:
+                print(f"   {mark} {rel}")
+
+def main(argv):
+    from compile_plugins import read_project_info
+
+    parser = argparse.ArgumentParser(description="Deploy only changed build files to server directories")
+    sub = parser.add_subparsers(dest='command')
+    manifest_parser = sub.add_parser('manifest', help="write the content-hash manifest of the current build")
+    manifest_parser.add_argument('-o', '--output', help=f"default: compiled/{MANIFEST_FILE}")
+    for name, help_text in (('push', "deploy the delta to every target"),
+                            ('rollback', "restore the previous deployment on every target"),
+                            ('status', "show the deployed build and drifted files")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument('-t', '--target', action='append', help="addons/amxmodx directory (default: $DEPLOY_TARGETS)")
+        p.add_argument('--json', action='store_true')
+        if name != 'status':
+            p.add_argument('-n', '--dry-run', action='store_true', help="only show what would change")
+            p.add_argument('-v', '--verbose', action='store_true', help="list every file")
+    sub.choices['push'].add_argument('--verify', action='store_true',
+                                     help="hash files on the target and re-push ones changed by hand")
+    sub.choices['push'].add_argument('--keep', type=int, default=KEEP_MANIFESTS,
+                                     help="deployments to keep for rollback")
+    args = parser.parse_args(argv)
+
+    config = load_deploy_config()
+    if args.command not in ('manifest', 'push', 'rollback', 'status'):
+        parser.print_help()
+        return True
+
+    if args.command == 'manifest':
+        manifest = build_manifest(config, read_project_info(config))
+        output = args.output or os.path.join(config['compiled'], MANIFEST_FILE)
+        atomic_write(output, json.dumps(manifest, indent=1))
+        print(f"📋 {len(manifest['files'])} files, build {manifest['build']}: {output}")
+        return True
+
+    targets = args.target or config['targets']
+    if not targets:
+        print("❌ No targets: pass --target or set DEPLOY_TARGETS in config.sh")
+        return False
+
+    if args.command == 'status':
+        reports = []
+        for path in targets:
+            target = Target(path)
+            current = target.current()
+            reports.append({'target': target.path, 'build': current['build'] if current else None,
+                            'deployments': len(target.history()), 'drift': target.drifted(current)})
+        if args.json:
+            print(json.dumps(reports, indent=2))
+        for r in reports if not args.json else ():
+            print(f"📦 {r['target']}: build {r['build'] or '-'} ({r['deployments']} deployments kept)")
+            for rel in r['drift']:
+                print(f"   ⚠️ changed on the server: {rel}")
+        return all(not r['drift'] for r in reports)
+
+    if args.command == 'push':
+        manifest = build_manifest(config, read_project_info(config))
+        atomic_write(os.path.join(config['compiled'], MANIFEST_FILE), json.dumps(manifest, indent=1))
+        reports = run_parallel(push, targets, manifest, config['root'], args.dry_run, args.verify, max(1, args.keep))
+    else:
+        reports = run_parallel(rollback, targets, args.dry_run)
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        for report in reports:
+            print_report(report, args.verbose)
+    return not any(r.get('error') for r in reports)
+
+if __name__ == "__main__":
+    sys.exit(0 if main(sys.argv[1:]) else 1)
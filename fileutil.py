@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Общие файловые операции: атомарная запись и межпроцессные блокировки"""
+import os, tempfile, contextlib, time
+
+from pipeline_trace import span
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# umask процесса: os.umask умеет только менять его, поэтому читается один раз при импорте
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def atomic_write(path, data, mode=None):
+    """Записывает файл целиком через временный файл + os.replace.
+    Права: mode, иначе права заменяемого файла, иначе обычные 0666 & ~umask (mkstemp создает 0600)"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    with span(f"write {os.path.basename(path)}", 'file', path=path, bytes=len(data)):
+        _write_replace(path, data, mode)
+
+def _write_replace(path, data, mode):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is None:
+            try:
+                mode = os.stat(path).st_mode & 0o7777
+            except FileNotFoundError:
+                mode = 0o666 & ~_UMASK
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+@contextlib.contextmanager
+def file_lock(lock_path, exclusive=True):
+    """Блокировка ОС на lock-файле (flock / msvcrt.locking)"""
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        else:
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.01)
+        yield
+    finally:
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""Чтение метаданных git напрямую из .git без запуска git CLI"""
+import os, sys, zlib, struct, datetime, functools
+
+OBJ_COMMIT, OBJ_TREE, OBJ_BLOB, OBJ_TAG = 1, 2, 3, 4
+OBJ_OFS_DELTA, OBJ_REF_DELTA = 6, 7
+TYPE_NAMES = {b'commit': OBJ_COMMIT, b'tree': OBJ_TREE, b'blob': OBJ_BLOB, b'tag': OBJ_TAG}
+PACK_IDX_MAGIC = b'\xfftOc'
+DEFAULT_ABBREV = 7
+
+class GitMetaError(Exception):
+    """Репозиторий не удалось прочитать без git CLI"""
+
+def find_git_dir(start=None):
+    """Ищет каталог .git (учитывает GIT_DIR и .git-файлы worktree/submodule)"""
+    env_dir = os.getenv('GIT_DIR')
+    if env_dir:
+        return os.path.abspath(env_dir)
+
+    path = os.path.abspath(start or os.getcwd())
+    while True:
+        candidate = os.path.join(path, '.git')
+        if os.path.isdir(candidate):
+            return candidate
+        if os.path.isfile(candidate):
+            with open(candidate, 'r', encoding='utf-8') as f:
+                line = f.readline().strip()
+            if line.startswith('gitdir:'):
+                return os.path.normpath(os.path.join(path, line[7:].strip()))
+        parent = os.path.dirname(path)
+        if parent == path:
+            raise GitMetaError("not a git repository")
+        path = parent
+
+class GitReader:
+    """Минимальный читатель refs и объектов (loose + packfiles)"""
+
+    def __init__(self, git_dir):
+        self.git_dir = git_dir
+        commondir_file = os.path.join(git_dir, 'commondir')
+        if os.path.isfile(commondir_file):
+            with open(commondir_file, 'r', encoding='utf-8') as f:
+                self.common_dir = os.path.normpath(os.path.join(git_dir, f.read().strip()))
+        else:
+            self.common_dir = git_dir
+        self._packed_refs = None
+        self._packs = None
+        self._object_dirs = None
+
+    # ---------------------------------------------------------------- refs
+
+    def read_head(self):
+        """Возвращает (symbolic ref или None, sha HEAD или None)"""
+        with open(os.path.join(self.git_dir, 'HEAD'), 'r', encoding='utf-8') as f:
+            content = f.read().strip()
+        if content.startswith('ref:'):
+            ref = content[4:].strip()
+            return ref, self.resolve_ref(ref)
+        return None, content
+
+    def resolve_ref(self, ref, depth=0):
+        """Разрешает ref через loose-файлы и packed-refs"""
+        if depth > 10:
+            raise GitMetaError(f"ref loop at {ref}")
+        for base in (self.git_dir, self.common_dir):
+            path = os.path.join(base, ref)
+            if os.path.isfile(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    content = f.read().strip()
+                if content.startswith('ref:'):
+                    return self.resolve_ref(content[4:].strip(), depth + 1)
+                return content or None
+        return self.packed_refs().get(ref)
+
+    def packed_refs(self):
+        if self._packed_refs is None:
+            self._packed_refs = {}
+            path = os.path.join(self.common_dir, 'packed-refs')
+            if os.path.isfile(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line or line[0] in '#^':
+                            continue
+                        sha, _, name = line.partition(' ')
+                        self._packed_refs[name] = sha
+        return self._packed_refs
+
+    # ------------------------------------------------------------- objects
+
+    def object_dirs(self):
+        """Каталоги объектов, включая objects/info/alternates"""
+        if self._object_dirs is None:
+            primary = os.path.join(self.common_dir, 'objects')
+            dirs = [primary]
+            alternates = os.path.join(primary, 'info', 'alternates')
+            if os.path.isfile(alternates):
+                with open(alternates, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        line = line.strip()
+                        if line and not line.startswith('#'):
+                            dirs.append(os.path.normpath(os.path.join(primary, line)))
+            self._object_dirs = dirs
+        return self._object_dirs
+
+    def packs(self):
+        """Список (путь к .pack, разобранный .idx v2)"""
+        if self._packs is None:
+            self._packs = []
+            for objects_dir in self.object_dirs():
+                pack_dir = os.path.join(objects_dir, 'pack')
+                if not os.path.isdir(pack_dir):
+                    continue
+                for name in sorted(os.listdir(pack_dir)):
+                    if name.endswith('.idx'):
+                        idx_path = os.path.join(pack_dir, name)
+                        self._packs.append((idx_path[:-4] + '.pack', self._read_pack_index(idx_path)))
+        return self._packs
+
+    @staticmethod
+    def _read_pack_index(path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:4] != PACK_IDX_MAGIC or struct.unpack('>I', data[4:8])[0] != 2:
+            raise GitMetaError(f"unsupported pack index: {path}")
+        fanout = struct.unpack('>256I', data[8:8 + 1024])
+        count = fanout[255]
+        names_at = 8 + 1024
+        offsets_at = names_at + count * 20 + count * 4
+        large_at = offsets_at + count * 4
+        return {'data': data, 'fanout': fanout, 'count': count,
+                'names_at': names_at, 'offsets_at': offsets_at, 'large_at': large_at}
+
+    @staticmethod
+    def _index_lookup(index, sha_bytes):
+        """Бинарный поиск sha в .idx, возвращает смещение в .pack или None"""
+        data, fanout = index['data'], index['fanout']
+        first = sha_bytes[0]
+        lo = fanout[first - 1] if first else 0
+        hi = fanout[first]
+        names_at = index['names_at']
+        while lo < hi:
+            mid = (lo + hi) // 2
+            name = data[names_at + mid * 20:names_at + mid * 20 + 20]
+            if name < sha_bytes:
+                lo = mid + 1
+            elif name > sha_bytes:
+                hi = mid
+            else:
+                offset = struct.unpack('>I', data[index['offsets_at'] + mid * 4:index['offsets_at'] + mid * 4 + 4])[0]
+                if offset & 0x80000000:
+                    large = index['large_at'] + (offset & 0x7fffffff) * 8
+                    offset = struct.unpack('>Q', data[large:large + 8])[0]
+                return offset
+        return None
+
+    def read_object(self, sha):
+        """Возвращает (тип, содержимое) объекта"""
+        for objects_dir in self.object_dirs():
+            path = os.path.join(objects_dir, sha[:2], sha[2:])
+            if os.path.isfile(path):
+                with open(path, 'rb') as f:
+                    raw = zlib.decompress(f.read())
+                header, _, body = raw.partition(b'\0')
+                kind = header.split(b' ', 1)[0]
+                return TYPE_NAMES[kind], body
+
+        sha_bytes = bytes.fromhex(sha)
+        for pack_path, index in self.packs():
+            offset = self._index_lookup(index, sha_bytes)
+            if offset is not None:
+                with open(pack_path, 'rb') as f:
+                    return self._read_pack_object(f, offset)
+        raise GitMetaError(f"object {sha} not found")
+
+    def _read_pack_object(self, f, offset):
+        f.seek(offset)
+        byte = f.read(1)[0]
+        kind = (byte >> 4) & 7
+        size = byte & 0x0f
+        shift = 4
+        while byte & 0x80:
+            byte = f.read(1)[0]
+            size |= (byte & 0x7f) << shift
+            shift += 7
+
+        if kind == OBJ_OFS_DELTA:
+            byte = f.read(1)[0]
+            base_offset = byte & 0x7f
+            while byte & 0x80:
+                byte = f.read(1)[0]
+                base_offset = ((base_offset + 1) << 7) | (byte & 0x7f)
+            delta = self._inflate(f, size)
+            base_kind, base = self._read_pack_object(f, offset - base_offset)
+            return base_kind, self._apply_delta(base, delta)
+
+        if kind == OBJ_REF_DELTA:
+            base_sha = f.read(20).hex()
+            delta = self._inflate(f, size)
+            base_kind, base = self.read_object(base_sha)
+            return base_kind, self._apply_delta(base, delta)
+
+        return kind, self._inflate(f, size)
+
+    @staticmethod
+    def _inflate(f, size):
+        decompressor = zlib.decompressobj()
+        chunks = []
+        produced = 0
+        while not decompressor.eof:
+            chunk = f.read(4096)
+            if not chunk:
+                break
+            out = decompressor.decompress(chunk)
+            produced += len(out)
+            chunks.append(out)
+        data = b''.join(chunks)
+        if len(data) != size:
+            raise GitMetaError("corrupt pack entry")
+        return data
+
+    @staticmethod
+    def _apply_delta(base, delta):
+        def varint(pos):
+            value = shift = 0
+            while True:
+                byte = delta[pos]
+                pos += 1
+                value |= (byte & 0x7f) << shift
+                shift += 7
+                if not byte & 0x80:
+                    return value, pos
+
+        _, pos = varint(0)
+        target_size, pos = varint(pos)
+        out = bytearray()
+        while pos < len(delta):
+            op = delta[pos]
+            pos += 1
+            if op & 0x80:
+                copy_offset = copy_size = 0
+                for i in range(4):
+                    if op & (1 << i):
+                        copy_offset |= delta[pos] << (8 * i)
+                        pos += 1
+                for i in range(3):
+                    if op & (1 << (4 + i)):
+                        copy_size |= delta[pos] << (8 * i)
+                        pos += 1
+                copy_size = copy_size or 0x10000
+                out += base[copy_offset:copy_offset + copy_size]
+            elif op:
+                out += delta[pos:pos + op]
+                pos += op
+            else:
+                raise GitMetaError("invalid delta opcode")
+        if len(out) != target_size:
+            raise GitMetaError("delta size mismatch")
+        return bytes(out)
+
+    def object_exists_with_prefix(self, prefix, exclude):
+        """Есть ли другой объект с тем же префиксом (для короткого хеша)"""
+        for objects_dir in self.object_dirs():
+            bucket = os.path.join(objects_dir, prefix[:2])
+            if os.path.isdir(bucket):
+                for name in os.listdir(bucket):
+                    full = prefix[:2] + name
+                    if full.startswith(prefix) and full != exclude:
+                        return True
+        prefix_bytes = bytes.fromhex(prefix[:len(prefix) // 2 * 2])
+        for _, index in self.packs():
+            data, names_at = index['data'], index['names_at']
+            first = prefix_bytes[0]
+            lo = index['fanout'][first - 1] if first else 0
+            for i in range(lo, index['fanout'][first]):
+                name = data[names_at + i * 20:names_at + i * 20 + 20].hex()
+                if name.startswith(prefix) and name != exclude:
+                    return True
+        return False
+
+    def abbreviate(self, sha, length=DEFAULT_ABBREV):
+        """Короткий хеш, как git rev-parse --short (минимум 7 символов)"""
+        while length < len(sha) and self.object_exists_with_prefix(sha[:length], sha):
+            length += 1
+        return sha[:length]
+
+    # -------------------------------------------------------------- commit
+
+    def read_commit(self, sha):
+        """Разбирает заголовки коммита (author / committer)"""
+        kind, body = self.read_object(sha)
+        while kind == OBJ_TAG:
+            target = body.split(b'\n', 1)[0].split(b' ', 1)[1].decode()
+            kind, body = self.read_object(target)
+        if kind != OBJ_COMMIT:
+            raise GitMetaError(f"{sha} is not a commit")
+
+        headers = {}
+        for line in body.split(b'\n'):
+            if not line:
+                break
+            key, _, value = line.partition(b' ')
+            headers.setdefault(key.decode(), value.decode('utf-8', 'replace'))
+        return {'author': parse_signature(headers.get('author', '')),
+                'committer': parse_signature(headers.get('committer', ''))}
+
+def parse_signature(value):
+    """'Name <email> 1700000000 +0300' -> имя и дата в часовом поясе подписи"""
+    name, _, rest = value.partition(' <')
+    email, _, stamp = rest.partition('> ')
+    parts = stamp.split()
+    date = None
+    if len(parts) == 2:
+        tz = parts[1]
+        sign = -1 if tz.startswith('-') else 1
+        offset = datetime.timedelta(hours=int(tz[1:3]), minutes=int(tz[3:5])) * sign
+        date = datetime.datetime.fromtimestamp(int(parts[0]), datetime.timezone(offset))
+    return {'name': name.strip(), 'email': email, 'date': date}
+
+@functools.lru_cache(maxsize=None)
+def open_repository(start=None):
+    return GitReader(find_git_dir(start))
+
+@functools.lru_cache(maxsize=None)
+def read_git_info(start=None):
+    """Аналог get_git_info() без запуска git; результат кэшируется на процесс"""
+    repo = open_repository(start)
+    _, sha = repo.read_head()
+    if not sha:
+        raise GitMetaError("HEAD has no commits")
+    commit = repo.read_commit(sha)
+    return {
+        'commit_hash': sha,
+        'commit_short_hash': repo.abbreviate(sha),
+        'commit_author': commit['author']['name'],
+        'commit_date': commit['committer']['date'].strftime('%Y-%m-%d'),
+    }
+
+@functools.lru_cache(maxsize=None)
+def read_branch_name(start=None):
+    """Аналог git branch --show-current (пустая строка при detached HEAD)"""
+    ref, _ = open_repository(start).read_head()
+    if ref and ref.startswith('refs/heads/'):
+        return ref[len('refs/heads/'):]
+    return ''
+
+if __name__ == "__main__":
+    try:
+        info = dict(read_git_info())
+        info['branch'] = read_branch_name()
+    except (GitMetaError, OSError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    for key, value in info.items():
+        print(f"{key}: {value}")
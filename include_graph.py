@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""Граф зависимостей #include для инкрементальной сборки плагинов"""
+import os, re, sys, json, hashlib, argparse
+
+from fileutil import atomic_write
+from tar_index import source_exists, source_stat, read_source
+
+GRAPH_VERSION = 2
+CACHE_DIR = ".build_cache"
+GRAPH_FILE = os.path.join(CACHE_DIR, "include_graph.json")
+INCLUDE_EXTENSIONS = ("", ".inc", ".p", ".pawn")
+
+INCLUDE_RE = re.compile(r'^[ \t]*#[ \t]*(include|tryinclude)[ \t]*(?:<([^>\r\n]+)>|"([^"\r\n]+)")', re.MULTILINE)
+BLOCK_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+
+def scan_includes(text):
+    """Список (имя, в кавычках ли, tryinclude ли) из исходника"""
+    text = BLOCK_COMMENT_RE.sub(lambda m: '\n' * m.group(0).count('\n'), text)
+    found = []
+    for match in INCLUDE_RE.finditer(text):
+        angled, quoted = match.group(2), match.group(3)
+        found.append(((angled or quoted).strip(), quoted is not None, match.group(1) == 'tryinclude'))
+    return found
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+def resolve_include(name, quoted, current_dir, include_dirs):
+    """Ищет файл так же, как amxxpc: "..." сначала рядом с файлом, затем в -i каталогах
+    (для члена tar-архива "рядом" - внутри того же архива)"""
+    search = ([current_dir] if quoted else []) + list(include_dirs)
+    for directory in search:
+        for ext in INCLUDE_EXTENSIONS:
+            candidate = os.path.join(directory, name + ext)
+            if source_exists(candidate):
+                return os.path.abspath(candidate)
+    return None
+
+class IncludeGraph:
+    """Файлы с хешами и прямыми #include; записи об успешных сборках плагинов"""
+
+    def __init__(self, root, include_dirs, path=None):
+        self.root = os.path.abspath(root)
+        self.include_dirs = [os.path.abspath(d) for d in include_dirs]
+        self.path = path or os.path.join(self.root, GRAPH_FILE)
+        self.files = {}
+        self.plugins = {}
+        self._fresh = set()
+        self.load()
+
+    # ------------------------------------------------------------ storage
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') != GRAPH_VERSION:
+            return
+        # Разрешение #include зависит от каталогов -i: при их смене граф строится заново
+        if data.get('include_dirs') == [self.key(d) for d in self.include_dirs]:
+            self.files = data.get('files', {})
+        self.plugins = data.get('plugins', {})
+
+    def save(self):
+        data = {'version': GRAPH_VERSION, 'include_dirs': [self.key(d) for d in self.include_dirs],
+                'files': self.files, 'plugins': self.plugins}
+        atomic_write(self.path, json.dumps(data, indent=1, sort_keys=True))
+
+    def key(self, path):
+        """Ключ файла: путь относительно корня проекта"""
+        return os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, '/')
+
+    def abspath(self, key):
+        return os.path.normpath(os.path.join(self.root, key))
+
+    # ------------------------------------------------------------- nodes
+
+    def node(self, path):
+        """Узел файла; пересчитывается только при смене mtime/size"""
+        key = self.key(path)
+        if key in self._fresh:
+            return self.files.get(key)
+        self._fresh.add(key)
+
+        try:
+            mtime, size = source_stat(path)
+        except OSError:
+            self.files.pop(key, None)
+            return None
+
+        cached = self.files.get(key)
+        # Неразрешенный #include/#tryinclude мог появиться (version_build.inc после layout split)
+        if cached and cached['mtime'] == mtime and cached['size'] == size and not self.unresolved(cached):
+            return cached
+
+        return self._store_node(key, read_source(path), mtime, size, os.path.dirname(path))
+
+    def invalidate(self, paths=None):
+        """Файлы снова проверяются по mtime/size (для долгоживущего build_watch.py);
+        None - все, узлы с неразрешенными #include при этом разбираются заново в node()"""
+        if paths is None:
+            self._fresh.clear()
+        else:
+            self._fresh.difference_update(self.key(p) for p in paths)
+
+    @staticmethod
+    def unresolved(node):
+        """Есть ли у узла #include или #tryinclude, которые не нашлись при разборе"""
+        return bool(node.get('missing') or node.get('optional'))
+
+    def _store_node(self, key, data, mtime, size, current_dir):
+        includes, missing, optional = [], [], []
+        for name, quoted, tryinclude in scan_includes(data.decode('utf-8', errors='replace')):
+            resolved = resolve_include(name, quoted, current_dir, self.include_dirs)
+            if resolved:
+                includes.append(self.key(resolved))
+            else:
+                (optional if tryinclude else missing).append(name)
+        node = {'hash': hash_bytes(data), 'mtime': mtime, 'size': size,
+                'includes': includes, 'missing': missing, 'optional': optional}
+        self.files[key] = node
+        return node
+
+    def closure(self, path):
+        """Транзитивные входы плагина: {ключ файла: хеш} (сам файл включен)"""
+        inputs = {}
+        stack = [self.key(path)]
+        while stack:
+            key = stack.pop()
+            if key in inputs:
+                continue
+            node = self.node(self.abspath(key))
+            if node is None:
+                inputs[key] = None
+                continue
+            inputs[key] = node['hash']
+            stack.extend(node['includes'])
+        return inputs
+
+    # ----------------------------------------------------------- planning
+
+    def record_key(self, plugin, variant=None):
+        """Ключ записи о сборке: у вариантов матрицы (build_matrix.py) свои записи"""
+        key = self.key(plugin)
+        return f"{variant}:{key}" if variant else key
+
+    def rebuild_reasons(self, plugin, output_file, signature=None, current=None, variant=None):
+        """Причины пересборки плагина (пустой список - плагин актуален)"""
+        key = self.key(plugin)
+        record = self.plugins.get(self.record_key(plugin, variant))
+        if not record:
+            return ["never built"]
+        if not os.path.exists(output_file):
+            return ["output missing"]
+        if signature is not None and record.get('signature') != signature:
+            return ["compiler or flags changed"]
+
+        previous = record['inputs']
+        current = current if current is not None else self.closure(plugin)
+        reasons = []
+        if current.get(key) != previous.get(key):
+            reasons.append("source changed")
+        for dep in sorted(set(current) | set(previous)):
+            if dep == key:
+                continue
+            if dep not in previous:
+                reasons.append(f"new include {dep}")
+            elif dep not in current:
+                reasons.append(f"include dropped {dep}")
+            elif current[dep] != previous[dep]:
+                reasons.append(f"header changed {dep}")
+        return reasons
+
+    def record_build(self, plugin, signature=None, inputs=None, variant=None):
+        """Запоминает входы успешной сборки (снятые до запуска компилятора)"""
+        inputs = inputs if inputs is not None else self.closure(plugin)
+        self.plugins[self.record_key(plugin, variant)] = {'inputs': inputs, 'signature': signature}
+
+    def forget(self, plugin, variant=None):
+        self.plugins.pop(self.record_key(plugin, variant), None)
+
+def main(argv):
+    from compile_plugins import load_config, find_plugins
+
+    parser = argparse.ArgumentParser(description="Show the #include dependency graph of plugins")
+    parser.add_argument('plugins', nargs='*')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    config = load_config()
+    graph = IncludeGraph(config['root'], [config['include']])
+    plugins = [os.path.abspath(p) for p in args.plugins] or find_plugins(config['scripting'])
+
+    report = {}
+    for plugin in plugins:
+        inputs = graph.closure(plugin)
+        missing = sorted({name for key in inputs if graph.files.get(key) for name in graph.files[key]['missing']})
+        report[graph.key(plugin)] = {'includes': sorted(k for k in inputs if k != graph.key(plugin)),
+                                     'missing': missing}
+    graph.save()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return True
+    for plugin, data in report.items():
+        print(f"📦 {plugin}: {len(data['includes'])} headers")
+        for dep in data['includes']:
+            print(f"   {dep}")
+        for name in data['missing']:
+            print(f"   ⚠️ unresolved: {name}")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main(sys.argv[1:]) else 1)
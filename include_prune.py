@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Неиспользуемые #include плагинов: заголовки, ни одно имя которых плагин не использует,
+их удаление из исходника и замер выигрыша во времени компиляции"""
+import os, re, sys, json, time, argparse, subprocess
+
+from fileutil import atomic_write
+from include_graph import resolve_include
+from pawn_source import strip_literals
+from symbol_index import SymbolIndex
+from tar_index import read_source, split_member_path, materialize
+
+PRUNE_DIR = os.path.join(".build_cache", "prune")
+DIRECTIVE_RE = re.compile(r'^[ \t]*#[ \t]*include[ \t]*(?:<([^>\r\n]+)>|"([^"\r\n]+)")[^\n]*\n?', re.MULTILINE)
+IDENTIFIER_RE = re.compile(r'[A-Za-z_@][\w@]*')
+
+def include_directives(text, plugin, include_dirs):
+    """[{start, end, line, name, path}] прямых #include (#tryinclude не трогаются)"""
+    directives = []
+    code = strip_literals(text)
+    for match in DIRECTIVE_RE.finditer(code):
+        # имя берется из исходного текста: в code содержимое "..." затерто
+        raw = DIRECTIVE_RE.match(text, match.start())
+        angled, quoted = raw.group(1), raw.group(2)
+        path = resolve_include((angled or quoted).strip(), quoted is not None, os.path.dirname(plugin), include_dirs)
+        directives.append({'start': match.start(), 'end': match.end(), 'line': code.count('\n', 0, match.start()) + 1,
+                           'name': (angled or quoted).strip(), 'path': path})
+    return directives
+
+def analyze(index, plugin):
+    """Прямые #include плагина со статусом: used - дает нужные плагину имена,
+    unused - удаляется без потерь (нужные заголовки остаются доступны через другие include,
+    а свои заголовки плагину не нужны), redundant - все его заголовки и так подключены"""
+    text = read_source(plugin).decode('utf-8', errors='replace')
+    directives = include_directives(text, plugin, index.graph.include_dirs)
+    used_names = set(IDENTIFIER_RE.findall(strip_literals(text)))
+    closures = {d['path']: set(index.graph.closure(d['path'])) for d in directives if d['path']}
+
+    # Заголовки, объявляющие хоть одно имя из исходника плагина
+    needed = {}
+    for key in set().union(*closures.values()) if closures else ():
+        entry = index.header(key)
+        hits = used_names.intersection(entry['identifiers']) if entry else ()
+        if hits:
+            needed[key] = hits
+
+    # Снизу вверх: поздние include чаще опираются на ранние
+    remaining = [d for d in directives if d['path']]
+    for d in reversed(directives):
+        if not d['path']:
+            d['status'] = 'missing'
+            continue
+        d['key'] = index.graph.key(d['path'])
+        covered = set().union(*(closures[o['path']] for o in remaining if o is not d))
+        lost = [key for key in needed if key not in covered]
+        own = closures[d['path']] - covered
+        d['headers'] = sorted(own)
+        if lost:
+            d['status'] = 'used'
+            d['used'] = sorted(set().union(*(needed[key] for key in lost)))[:10]
+        elif own:
+            d['status'] = 'unused'
+            remaining.remove(d)
+        else:
+            d['status'] = 'redundant'
+    return text, directives
+
+def prune_text(text, directives):
+    """Исходник без строк #include, помеченных unused"""
+    out, position = [], 0
+    for d in directives:
+        if d['status'] == 'unused':
+            out.append(text[position:d['start']])
+            position = d['end']
+    out.append(text[position:])
+    return ''.join(out)
+
+def compile_seconds(config, source, output, extra_include, repeat):
+    """Лучшее время компиляции из repeat запусков и код возврата последнего"""
+    best, returncode = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        proc = subprocess.run([config['compiler'], source, f"-o{output}", f"-i{config['include']}",
+                               f"-i{extra_include}"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              cwd=config['root'])
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+        returncode = proc.returncode
+    return best, returncode
+
+def measure(config, plugin, text, pruned, repeat):
+    """Компилирует исходную и урезанную копии во временный каталог .build_cache/prune"""
+    directory = os.path.join(config['root'], PRUNE_DIR)
+    base = os.path.splitext(os.path.basename(plugin))[0]
+    origin = os.path.dirname(materialize(plugin, config['root']))
+    results = {}
+    for label, source_text in (('original', text), ('pruned', pruned)):
+        source = os.path.join(directory, f"{base}.{label}.sma")
+        atomic_write(source, source_text)
+        seconds, returncode = compile_seconds(config, source, os.path.join(directory, f"{base}.{label}.amxx"),
+                                              origin, repeat)
+        results[label] = {'seconds': round(seconds, 4), 'returncode': returncode}
+    results['saved_seconds'] = round(results['original']['seconds'] - results['pruned']['seconds'], 4)
+    return results
+
+def main(argv):
+    from compile_plugins import load_config, find_plugins
+
+    parser = argparse.ArgumentParser(description="Find #include lines that contribute nothing to a plugin")
+    parser.add_argument('plugins', nargs='*', help=".sma files (default: every plugin under scripting/)")
+    parser.add_argument('--measure', action='store_true', help="compile original and pruned copies and compare")
+    parser.add_argument('-n', '--repeat', type=int, default=3, help="compilations per copy when measuring")
+    parser.add_argument('--write', action='store_true',
+                        help="remove unused #include lines from plugins whose pruned copy compiles")
+    parser.add_argument('--compiler', help="path to amxxpc")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    config = load_config()
+    if args.compiler:
+        config['compiler'] = args.compiler
+    plugins = [os.path.abspath(p) for p in args.plugins] or find_plugins(config['scripting'])
+    index = SymbolIndex(config['root'], [config['include']])
+
+    report, total_saved, written = [], 0.0, []
+    for plugin in plugins:
+        text, directives = analyze(index, plugin)
+        entry = {'plugin': index.graph.key(plugin), 'includes': [
+            {k: d[k] for k in ('line', 'name', 'status', 'key', 'headers', 'used') if k in d} for d in directives]}
+        unused = [d for d in directives if d['status'] == 'unused']
+        if unused and (args.measure or args.write):
+            pruned = prune_text(text, directives)
+            entry['timing'] = measure(config, plugin, text, pruned, max(1, args.repeat) if args.measure else 1)
+            compiles = entry['timing']['pruned']['returncode'] == 0
+            total_saved += entry['timing']['saved_seconds'] if compiles else 0
+            if args.write and compiles and not split_member_path(plugin):
+                atomic_write(plugin, pruned)
+                written.append(entry['plugin'])
+        report.append(entry)
+    index.save()
+
+    if args.json:
+        print(json.dumps({'plugins': report, 'saved_seconds': round(total_saved, 4), 'written': written}, indent=2))
+        return True
+
+    count = 0
+    for entry in report:
+        unused = [i for i in entry['includes'] if i['status'] == 'unused']
+        redundant = [i for i in entry['includes'] if i['status'] == 'redundant']
+        if not unused and not redundant:
+            continue
+        print(f"📦 {entry['plugin']}")
+        for i in unused:
+            count += 1
+            print(f"   ✂️ line {i['line']}: #include <{i['name']}> unused ({len(i['headers'])} header(s))")
+        for i in redundant:
+            print(f"   ♻️ line {i['line']}: #include <{i['name']}> already pulled in by another include")
+        timing = entry.get('timing')
+        if timing:
+            if timing['pruned']['returncode'] != 0:
+                print("   ❌ pruned copy does not compile (a macro needs the header?), keeping the includes")
+            else:
+                print(f"   ⏱️ {timing['original']['seconds']:.3f}s -> {timing['pruned']['seconds']:.3f}s "
+                      f"(saved {timing['saved_seconds']:.3f}s)")
+    print(f"🧹 {count} unused includes in {len(plugins)} plugins"
+          + (f", {total_saved:.3f}s saved per full build" if args.measure else ""))
+    for plugin in written:
+        print(f"✏️ Rewrote {plugin}")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main(sys.argv[1:]) else 1)
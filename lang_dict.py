@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""Словари AMXX (lang/*.txt): потоковый разбор и сборка объединенных бандлов по языкам"""
+import os, re, sys, json, time, argparse, tempfile, tracemalloc
+
+from fileutil import atomic_write
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDLE_NAME = "mirgame"
+BUNDLE_MODES = ('single', 'per-language', 'files')
+
+SECTION_RE = re.compile(r'^\[([A-Za-z]{2,3})\]$')
+MULTILINE_START_RE = re.compile(r'^(\w+):$')
+
+def load_lang_config():
+    """Каталог словарей, каталог сборки и включенные языки (из config.sh или по умолчанию)"""
+    root = os.getenv('ROOT_DIR', ROOT_DIR)
+    languages = os.getenv('LANGUAGES', '').replace(',', ' ').split()
+    return {
+        'root': root,
+        'lang_dir': os.getenv('LANG_DIR', os.path.join(root, 'lang')),
+        'output': os.path.join(os.getenv('COMPILED_DIR', os.path.join(root, 'compiled')), 'lang'),
+        'languages': [lang.lower() for lang in languages] or None,
+    }
+
+def find_lang_files(lang_dir):
+    return sorted(os.path.join(lang_dir, name) for name in os.listdir(lang_dir) if name.endswith('.txt'))
+
+def iter_lang_lines(lines):
+    """(язык, ключ, значение, номер строки) по строкам словаря AMXX.
+    Поддерживаются [xx], KEY = value, многострочные KEY: ... :KEY и комментарии ; //"""
+    lang = None
+    multiline = None
+    for number, raw in enumerate(lines, 1):
+        line = raw.rstrip('\r\n')
+        if number == 1:
+            line = line.lstrip('\ufeff')
+        if multiline:
+            key, start, body = multiline
+            if line.strip() == f":{key}":
+                yield lang, key, "\n".join(body), start
+                multiline = None
+            else:
+                body.append(line)
+            continue
+
+        stripped = line.strip()
+        if not stripped or stripped.startswith((';', '//')):
+            continue
+        section = SECTION_RE.match(stripped)
+        if section:
+            lang = section.group(1).lower()
+            continue
+        if lang is None:
+            continue
+        if '=' in stripped:
+            key, value = stripped.split('=', 1)
+            yield lang, key.strip(), value.strip(), number
+            continue
+        start = MULTILINE_START_RE.match(stripped)
+        if start:
+            multiline = (start.group(1), number, [])
+
+def iter_lang_file(path):
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        yield from iter_lang_lines(f)
+
+def parse_lang_file(path, languages=None):
+    """{язык: {ключ: значение}} одного файла (первое определение ключа побеждает)"""
+    table = {}
+    for lang, key, value, _ in iter_lang_file(path):
+        if languages is None or lang in languages:
+            table.setdefault(lang, {}).setdefault(key, value)
+    return table
+
+def build_bundles(paths, languages=None):
+    """Один проход по всем словарям: объединенные таблицы по языкам, таблицы файлов
+    и статистика дублей. Одинаковые ключ+значение из разных файлов хранятся один раз,
+    при конфликте значений остается первое (файлы идут в отсортированном порядке)"""
+    merged, per_file, owners = {}, {}, {}
+    stats = {'files': len(paths), 'entries': 0, 'kept': 0, 'duplicates': 0, 'conflicts': [], 'dropped_languages': set()}
+    enabled = set(languages) if languages else None
+
+    for path in paths:
+        name = os.path.basename(path)
+        table = per_file.setdefault(name, {})
+        for lang, key, value, number in iter_lang_file(path):
+            stats['entries'] += 1
+            if enabled is not None and lang not in enabled:
+                stats['dropped_languages'].add(lang)
+                continue
+            table.setdefault(lang, {}).setdefault(key, value)
+            bucket = merged.setdefault(lang, {})
+            if key not in bucket:
+                bucket[key] = value
+                owners[lang, key] = f"{name}:{number}"
+                stats['kept'] += 1
+            elif bucket[key] == value:
+                stats['duplicates'] += 1
+            else:
+                stats['conflicts'].append({'language': lang, 'key': key, 'kept': owners[lang, key],
+                                           'ignored': f"{name}:{number}"})
+    stats['dropped_languages'] = sorted(stats['dropped_languages'])
+    return merged, per_file, stats
+
+def render_lang(tables):
+    """Текст словаря: секции языков и ключи в отсортированном порядке"""
+    out = []
+    for lang in sorted(tables):
+        out.append(f"[{lang}]\n")
+        for key in sorted(tables[lang]):
+            value = tables[lang][key]
+            if '\n' in value:
+                out.append(f"{key}:\n{value}\n:{key}\n")
+            else:
+                out.append(f"{key} = {value}\n")
+        out.append("\n")
+    return ''.join(out)
+
+def write_bundles(output_dir, merged, per_file, mode='single', name=BUNDLE_NAME):
+    """Записывает бандлы; возвращает список созданных файлов"""
+    outputs = {}
+    if mode == 'single':
+        outputs[f"{name}.txt"] = merged
+    elif mode == 'per-language':
+        for lang, table in merged.items():
+            outputs[f"{name}_{lang}.txt"] = {lang: table}
+    else:
+        # Те же имена, что и в lang/: register_dictionary в плагинах менять не нужно
+        outputs = dict(per_file)
+
+    written = []
+    for filename, tables in sorted(outputs.items()):
+        path = os.path.join(output_dir, filename)
+        atomic_write(path, render_lang(tables))
+        written.append(path)
+    return written
+
+def _measure(paths, repeat):
+    """Время разбора набора файлов (лучшее из repeat) и память разобранных таблиц"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for path in paths:
+            parse_lang_file(path)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    tables = [parse_lang_file(path) for path in paths]
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'files': len(paths),
+        'bytes': sum(os.path.getsize(path) for path in paths),
+        'entries': sum(len(keys) for table in tables for keys in table.values()),
+        'parse_ms': round(best * 1000, 3),
+        'memory_kib': round(memory / 1024, 1),
+    }
+
+def run_benchmark(paths, languages=None, mode='single', repeat=5):
+    """Сравнивает разбор исходных словарей и бандлов (как при register_dictionary на сервере)"""
+    original = _measure(paths, repeat)
+    with tempfile.TemporaryDirectory() as tmp:
+        merged, per_file, stats = build_bundles(paths, languages)
+        bundle = _measure(write_bundles(tmp, merged, per_file, mode), repeat)
+
+    def ratio(field):
+        return round(bundle[field] / original[field], 3) if original[field] else None
+
+    return {
+        'languages': languages or 'all',
+        'mode': mode,
+        'original': original,
+        'bundle': bundle,
+        'ratio': {field: ratio(field) for field in ('bytes', 'entries', 'parse_ms', 'memory_kib')},
+        'duplicates': stats['duplicates'],
+        'conflicts': len(stats['conflicts']),
+    }
+
+def main(argv):
+    config = load_lang_config()
+    parser = argparse.ArgumentParser(description="Build merged AMXX dictionary bundles from lang/*.txt")
+    sub = parser.add_subparsers(dest='command')
+    for command in ('bundle', 'bench'):
+        p = sub.add_parser(command)
+        p.add_argument('--lang-dir', default=config['lang_dir'])
+        p.add_argument('--languages', help="comma-separated languages to keep (default: $LANGUAGES or all)")
+        p.add_argument('--mode', choices=BUNDLE_MODES, default='single',
+                       help="single: one file for the build; per-language: one file per language; "
+                            "files: filtered copies of each dictionary")
+        p.add_argument('--json', action='store_true')
+    sub.choices['bundle'].add_argument('-o', '--output', default=config['output'])
+    sub.choices['bundle'].add_argument('--name', default=BUNDLE_NAME)
+    sub.choices['bench'].add_argument('-n', '--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.command not in ('bundle', 'bench'):
+        parser.print_help()
+        return True
+
+    languages = [lang.strip().lower() for lang in args.languages.split(',')] if args.languages else config['languages']
+    paths = find_lang_files(args.lang_dir)
+    if not paths:
+        print(f"❌ No dictionaries found in {args.lang_dir}")
+        return False
+
+    if args.command == 'bench':
+        result = run_benchmark(paths, languages, args.mode, max(1, args.repeat))
+        if args.json:
+            print(json.dumps(result, indent=2))
+            return True
+        print(f"📚 {result['original']['files']} dictionaries → {result['bundle']['files']} bundle file(s) "
+              f"({result['mode']}, languages: {', '.join(languages) if languages else 'all'})")
+        for label in ('original', 'bundle'):
+            r = result[label]
+            print(f"   {label:<9} {r['bytes'] / 1024:>8.1f} KiB  {r['entries']:>6} keys  "
+                  f"{r['parse_ms']:>8.2f} ms  {r['memory_kib']:>8.1f} KiB RAM")
+        ratio = result['ratio']
+        print(f"   ratio     size x{ratio['bytes']}, parse x{ratio['parse_ms']}, memory x{ratio['memory_kib']}")
+        return True
+
+    merged, per_file, stats = build_bundles(paths, languages)
+    written = write_bundles(args.output, merged, per_file, args.mode, args.name)
+    if args.json:
+        print(json.dumps(dict(stats, written=written), indent=2, ensure_ascii=False))
+        return True
+    print(f"📚 {stats['files']} dictionaries, {stats['entries']} entries → {stats['kept']} unique keys "
+          f"in {len(written)} file(s) under {args.output}")
+    print(f"   Duplicates merged: {stats['duplicates']}")
+    if stats['dropped_languages']:
+        print(f"   Languages dropped: {', '.join(stats['dropped_languages'])}")
+    for conflict in stats['conflicts']:
+        print(f"   ⚠️ [{conflict['language']}] {conflict['key']}: kept {conflict['kept']}, ignored {conflict['ignored']}")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main(sys.argv[1:]) else 1)
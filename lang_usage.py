@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Перекрестный индекс словарей: какие файлы lang/ и ключи реально используются плагинами"""
+import os, re, sys, json, argparse
+
+from lang_dict import load_lang_config, find_lang_files, build_bundles, write_bundles
+from tar_index import find_archive_sources, read_source
+from pawn_source import strip_comments, iter_string_literals
+
+SOURCE_EXTENSIONS = ('.sma', '.inc')
+
+REGISTER_RE = re.compile(r'\bregister_dictionary\s*\(\s*"([^"]+)"\s*\)')
+KEY_LITERAL_RE = re.compile(r'^[A-Za-z0-9_]+$')
+# "MENU_%d" и т.п.: ключ собирается во время выполнения
+DYNAMIC_KEY_RE = re.compile(r'^[A-Za-z0-9_]*%[disx][A-Za-z0-9_%disx]*$')
+
+def dynamic_key_pattern(literal):
+    """Регулярное выражение для ключа вида "PREFIX_%d" (None, если это не шаблон ключа)"""
+    if not DYNAMIC_KEY_RE.match(literal) or len(re.sub(r'%[disx]', '', literal)) < 2:
+        return None
+    parts = re.split(r'(%[disx])', literal)
+    return ''.join(r'\w+' if part.startswith('%') else re.escape(part) for part in parts if part)
+
+def scan_source_usage(text):
+    """{'dictionaries': [...], 'literals': set, 'patterns': set} одного исходника"""
+    text = strip_comments(text)
+    dictionaries = [name if name.endswith('.txt') else name + '.txt' for name in REGISTER_RE.findall(text)]
+    literals, patterns = set(), set()
+    for literal in iter_string_literals(text):
+        if KEY_LITERAL_RE.match(literal):
+            literals.add(literal)
+        else:
+            pattern = dynamic_key_pattern(literal)
+            if pattern:
+                patterns.add(pattern)
+    return {'dictionaries': dictionaries, 'literals': literals, 'patterns': patterns}
+
+def iter_sources(root, scripting_dir, include_dir):
+    """(имя, текст) всех исходников: .sma/.inc дерева и .sma из tar-архивов в scripting/"""
+    include_dir = os.path.abspath(include_dir)
+    for directory in (scripting_dir, include_dir):
+        for dirpath, dirnames, filenames in os.walk(directory):
+            dirnames[:] = sorted(d for d in dirnames if os.path.abspath(os.path.join(dirpath, d)) != include_dir
+                                 or directory == include_dir)
+            for name in sorted(filenames):
+                if name.endswith(SOURCE_EXTENSIONS):
+                    path = os.path.join(dirpath, name)
+                    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                        yield os.path.relpath(path, root).replace(os.sep, '/'), f.read()
+
+    for path in find_archive_sources(scripting_dir):
+        yield os.path.relpath(path, root).replace(os.sep, '/'), read_source(path).decode('utf-8', errors='replace')
+
+def build_usage(sources, lang_paths):
+    """Индекс использования: зарегистрированные словари, достижимые и мертвые ключи.
+    Ключ достижим, если его имя встречается строковым литералом (или подходит под
+    шаблон "PREFIX_%d") в любом исходнике, а файл словаря кто-то регистрирует:
+    ключи AMXX глобальны, плагин может брать ключ из чужого словаря"""
+    registered, literals, patterns = {}, set(), set()
+    for name, text in sources:
+        usage = scan_source_usage(text)
+        for dictionary in usage['dictionaries']:
+            registered.setdefault(dictionary, []).append(name)
+        literals |= usage['literals']
+        patterns |= usage['patterns']
+    dynamic = re.compile('|'.join(f'(?:{p})' for p in sorted(patterns))) if patterns else None
+
+    _, per_file, _ = build_bundles(lang_paths)
+    files = {}
+    for dictionary, tables in sorted(per_file.items()):
+        keys = sorted({key for table in tables.values() for key in table})
+        used = [key for key in keys if key in literals or (dynamic and dynamic.fullmatch(key))]
+        users = sorted(set(registered.get(dictionary, [])))
+        files[dictionary] = {
+            'registered_by': users,
+            'keys': len(keys),
+            'reachable': used if users else [],
+            'dead': sorted(set(keys) - set(used)) if users else keys,
+        }
+    return {
+        'files': files,
+        'unknown_dictionaries': sorted(set(registered) - set(per_file)),
+        'totals': {
+            'files': len(files),
+            'unregistered_files': sum(1 for f in files.values() if not f['registered_by']),
+            'keys': sum(f['keys'] for f in files.values()),
+            'reachable_keys': sum(len(f['reachable']) for f in files.values()),
+        },
+    }
+
+def prune_tables(per_file, usage):
+    """Таблицы словарей без незарегистрированных файлов и мертвых ключей"""
+    pruned = {}
+    for dictionary, tables in per_file.items():
+        reachable = set(usage['files'].get(dictionary, {}).get('reachable', []))
+        if not reachable:
+            continue
+        pruned[dictionary] = {lang: {k: v for k, v in table.items() if k in reachable}
+                              for lang, table in tables.items()}
+    return pruned
+
+def main(argv):
+    config = load_lang_config()
+    root = config['root']
+    scripting = os.getenv('SCRIPTING_DIR', os.path.join(root, 'scripting'))
+    include = os.getenv('INCLUDE_DIR', os.path.join(scripting, 'include'))
+
+    parser = argparse.ArgumentParser(description="Find dictionary files and keys no plugin uses")
+    sub = parser.add_subparsers(dest='command')
+    report = sub.add_parser('report', help="show reachable and dead dictionaries/keys")
+    report.add_argument('--json', action='store_true')
+    report.add_argument('--keys', action='store_true', help="list every dead key")
+    prune = sub.add_parser('prune', help="write dictionaries without dead files and keys")
+    prune.add_argument('-o', '--output', default=config['output'])
+    prune.add_argument('--languages', help="comma-separated languages to keep (default: $LANGUAGES or all)")
+    args = parser.parse_args(argv)
+
+    if args.command not in ('report', 'prune'):
+        parser.print_help()
+        return True
+
+    lang_paths = find_lang_files(config['lang_dir'])
+    usage = build_usage(iter_sources(root, scripting, include), lang_paths)
+    totals = usage['totals']
+
+    if args.command == 'prune':
+        languages = [l.strip().lower() for l in args.languages.split(',')] if args.languages else config['languages']
+        _, per_file, _ = build_bundles(lang_paths, languages)
+        written = write_bundles(args.output, {}, prune_tables(per_file, usage), mode='files')
+        print(f"✂️ {len(written)} of {totals['files']} dictionaries, {totals['reachable_keys']} of "
+              f"{totals['keys']} keys written to {args.output}")
+        return True
+
+    if args.json:
+        print(json.dumps(usage, indent=2))
+        return True
+    for dictionary, data in usage['files'].items():
+        if not data['registered_by']:
+            print(f"💀 {dictionary}: not registered by any plugin ({data['keys']} keys)")
+            continue
+        print(f"📚 {dictionary}: {len(data['reachable'])}/{data['keys']} keys used "
+              f"(registered by {', '.join(data['registered_by'])})")
+        if args.keys and data['dead']:
+            print(f"   dead: {', '.join(data['dead'])}")
+    for dictionary in usage['unknown_dictionaries']:
+        print(f"⚠️ {dictionary}: registered but missing in lang/")
+    print(f"📊 {totals['reachable_keys']}/{totals['keys']} keys reachable, "
+          f"{totals['unregistered_files']} of {totals['files']} dictionaries unused")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main(sys.argv[1:]) else 1)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Проверка словарей lang/*.txt: пропущенные и повторные ключи, расхождения %d/%s с [en]"""
+import os, re, sys, json, hashlib, argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from fileutil import atomic_write
+from lang_dict import load_lang_config, find_lang_files, iter_lang_file
+
+CACHE_VERSION = 1
+CACHE_FILE = os.path.join(".build_cache", "lang_validate.json")
+REFERENCE_LANGUAGE = 'en'
+
+SEVERITY = {
+    'placeholder-mismatch': 'error',
+    'duplicate-key': 'warning',
+    'missing-key': 'warning',
+    'extra-key': 'warning',
+    'missing-language': 'warning',
+}
+
+# Спецификаторы format() AMXX; %d и %i взаимозаменяемы
+PLACEHOLDER_RE = re.compile(r'%(?:%|[-+ #0]*\d*(?:\.\d+)?([A-Za-z]))')
+PLACEHOLDER_ALIASES = {'i': 'd'}
+
+def placeholders(value):
+    """Последовательность типов спецификаторов значения ('%%' пропускается)"""
+    return [PLACEHOLDER_ALIASES.get(m.group(1), m.group(1)) for m in PLACEHOLDER_RE.finditer(value) if m.group(1)]
+
+def issue(code, key, language, line, message):
+    return {'code': code, 'severity': SEVERITY[code], 'key': key, 'language': language,
+            'line': line, 'message': message}
+
+def validate_file(path, languages=None):
+    """Проверяет один словарь; возвращает (issues, статистика)"""
+    tables, issues = {}, []
+    for lang, key, value, line in iter_lang_file(path):
+        table = tables.setdefault(lang, {})
+        if key in table:
+            issues.append(issue('duplicate-key', key, lang, line,
+                                f"{key} already defined in [{lang}] at line {table[key][1]}"))
+            continue
+        table[key] = (value, line)
+
+    reference = tables.get(REFERENCE_LANGUAGE, {})
+    if not reference:
+        issues.append(issue('missing-language', None, REFERENCE_LANGUAGE, None, "no [en] section"))
+
+    for lang, table in sorted(tables.items()):
+        if lang == REFERENCE_LANGUAGE or not reference:
+            continue
+        for key, (ref_value, ref_line) in reference.items():
+            if key not in table:
+                issues.append(issue('missing-key', key, lang, None, f"{key} is missing in [{lang}]"))
+                continue
+            value, line = table[key]
+            expected, actual = placeholders(ref_value), placeholders(value)
+            if expected != actual:
+                issues.append(issue('placeholder-mismatch', key, lang, line,
+                                    f"{key}: [en] has {' '.join('%' + p for p in expected) or 'no placeholders'}, "
+                                    f"[{lang}] has {' '.join('%' + p for p in actual) or 'no placeholders'}"))
+        for key, (_, line) in table.items():
+            if key not in reference:
+                issues.append(issue('extra-key', key, lang, line, f"{key} is not defined in [en]"))
+
+    for lang in languages or ():
+        if lang not in tables:
+            issues.append(issue('missing-language', None, lang, None, f"no [{lang}] section"))
+
+    stats = {'languages': len(tables), 'keys': sum(len(t) for t in tables.values())}
+    return issues, stats
+
+def _validate_job(args):
+    path, languages = args
+    return validate_file(path, languages)
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+class ValidationCache:
+    """Результаты проверки по sha256 файла; при смене набора языков кэш сбрасывается"""
+
+    def __init__(self, root, languages, path=None):
+        self.root = os.path.abspath(root)
+        self.path = path or os.path.join(self.root, CACHE_FILE)
+        self.languages = languages or []
+        self.entries = {}
+        self.changed = False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION and data.get('languages') == self.languages:
+                self.entries = data.get('files', {})
+        except (OSError, ValueError):
+            pass
+
+    def key(self, path):
+        return os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, '/')
+
+    def get(self, path, digest):
+        entry = self.entries.get(self.key(path))
+        return entry if entry and entry['sha256'] == digest else None
+
+    def put(self, path, digest, issues, stats):
+        self.entries[self.key(path)] = {'sha256': digest, 'issues': issues, 'stats': stats}
+        self.changed = True
+
+    def save(self, keep):
+        stale = set(self.entries) - {self.key(p) for p in keep}
+        for key in stale:
+            del self.entries[key]
+        if self.changed or stale:
+            atomic_write(self.path, json.dumps({'version': CACHE_VERSION, 'languages': self.languages,
+                                                'files': self.entries}, ensure_ascii=False))
+
+def validate_all(paths, root, languages=None, jobs=None, use_cache=True):
+    """Проверяет словари пулом процессов; неизменившиеся файлы берутся из кэша.
+    Возвращает отчет {files: {файл: {...}}, totals, cached, validated}"""
+    cache = ValidationCache(root, languages) if use_cache else None
+    digests = {path: file_hash(path) for path in paths}
+    results, todo = {}, []
+    for path in paths:
+        entry = cache.get(path, digests[path]) if cache else None
+        if entry:
+            results[path] = (entry['issues'], entry['stats'])
+        else:
+            todo.append(path)
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs > 1 and len(todo) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(todo))) as pool:
+            fresh = list(pool.map(_validate_job, [(path, languages) for path in todo]))
+    else:
+        fresh = [validate_file(path, languages) for path in todo]
+    for path, (issues, stats) in zip(todo, fresh):
+        results[path] = (issues, stats)
+        if cache:
+            cache.put(path, digests[path], issues, stats)
+    if cache:
+        cache.save(paths)
+
+    files = {}
+    for path in paths:
+        issues, stats = results[path]
+        name = os.path.relpath(path, root).replace(os.sep, '/')
+        files[name] = dict(stats, issues=issues)
+    all_issues = [i for f in files.values() for i in f['issues']]
+    totals = {code: sum(1 for i in all_issues if i['code'] == code) for code in SEVERITY}
+    totals['errors'] = sum(1 for i in all_issues if i['severity'] == 'error')
+    totals['warnings'] = sum(1 for i in all_issues if i['severity'] == 'warning')
+    return {'files': files, 'totals': totals, 'validated': len(todo), 'cached': len(paths) - len(todo)}
+
+def main(argv):
+    config = load_lang_config()
+    parser = argparse.ArgumentParser(description="Validate lang/*.txt dictionaries against [en]")
+    parser.add_argument('files', nargs='*', help="dictionaries to check (default: every lang/*.txt)")
+    parser.add_argument('-j', '--jobs', type=int, help="worker processes (default: CPU count)")
+    parser.add_argument('--languages', help="comma-separated languages every file must have "
+                                            "(default: $LANGUAGES)")
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--json', action='store_true')
+    parser.add_argument('-q', '--quiet', action='store_true', help="print errors only")
+    args = parser.parse_args(argv)
+
+    languages = [lang.strip().lower() for lang in args.languages.split(',')] if args.languages else config['languages']
+    paths = [os.path.abspath(p) for p in args.files] or find_lang_files(config['lang_dir'])
+    report = validate_all(paths, config['root'], languages, args.jobs, not args.no_cache)
+    totals = report['totals']
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return totals['errors'] == 0
+
+    for name, data in report['files'].items():
+        for i in data['issues']:
+            if args.quiet and i['severity'] != 'error':
+                continue
+            location = f"{name}:{i['line']}" if i['line'] else name
+            print(f"{location}: {i['severity']} {i['code']}: {i['message']}")
+    print(f"📚 {len(report['files'])} dictionaries ({report['validated']} checked, {report['cached']} cached): "
+          f"{totals['errors']} errors, {totals['warnings']} warnings")
+    return totals['errors'] == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if main(sys.argv[1:]) else 1)
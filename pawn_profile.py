@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""Профилирование плагинов: обертки public-функций со счетчиками tickcount()
+(compile_plugins.py --profile) и разбор дампов [prof] из консоли/лога сервера"""
+import os, re, sys, json, argparse
+
+from fileutil import atomic_write
+from pawn_source import PawnSource
+
+PROFILE_DIR = os.path.join(".build_cache", "profile")
+PROFILE_INTERVAL = 60.0
+PROFILE_TASK_ID = 0x50524F46
+PREFIX = "__prof"
+DUMP_TAG = "[prof]"
+
+# [prof] <плагин> <функция> <вызовы> <всего мс> <максимум мс>; счетчики накопительные
+DUMP_RE = re.compile(r'\[prof\] (\S+) (\S+) (\d+) (\d+) (\d+)\s*$')
+RETURN_VALUE_RE = re.compile(r'\breturn\s*[^;\s]')
+IDENTIFIER_RE = re.compile(r'[A-Za-z_@][\w@]*')
+
+RUNTIME = """
+// ---- профилирование (compile_plugins.py --profile) ----
+new {p}_calls[{count}], {p}_total[{count}], {p}_max[{count}];
+new const {p}_names[{count}][] = {{ {names} }};
+
+{p}_add(index, start)
+{{
+	new elapsed = tickcount() - start;
+	{p}_calls[index]++;
+	{p}_total[index] += elapsed;
+	if (elapsed > {p}_max[index])
+		{p}_max[index] = elapsed;
+}}
+
+{p}_init()
+{{
+	set_task({interval:.1f}, "{p}_dump", {task_id}, "", 0, "b");
+}}
+
+public {p}_dump()
+{{
+	for (new i = 0; i < {count}; i++)
+		if ({p}_calls[i])
+			server_print("{tag} %s %s %d %d %d", "{plugin}", {p}_names[i], {p}_calls[i], {p}_total[i], {p}_max[i]);
+}}
+"""
+
+def parameter_names(source, function):
+    """Имена параметров функции (None для функций с переменным числом аргументов)"""
+    names = []
+    for param in source.split(*function['params']):
+        if '...' in param:
+            return None
+        declaration = re.sub(r'\[[^\]]*\]', '', param.split('=', 1)[0])
+        identifiers = IDENTIFIER_RE.findall(declaration)
+        if identifiers:
+            names.append(identifiers[-1])
+    return names
+
+def wrapper(source, name, function, index, prologue='', epilogue=''):
+    """public-функция с исходным именем в одну строку: замер и вызов переименованного тела"""
+    # Параметры без комментариев и переносов: обертка не должна сдвигать строки
+    params = ' '.join(source.text[function['params'][0]:function['params'][1]].split())
+    args = ', '.join(parameter_names(source, function))
+    start, end = function['body']
+    returns = bool(RETURN_VALUE_RE.search(source.code, start, end))
+    tag = f"{function['tag']}:" if function['tag'] else ''
+    header = f"{tag}{name}" if name.startswith('@') else f"public {tag}{name}"
+    call = f"{PREFIX}{index}({args})"
+    parts = [f"{header}({params})", "{"]
+    if prologue:
+        parts.append(prologue)
+    parts.append(f"new {PREFIX}_start = tickcount();")
+    parts.append(f"new {tag}{PREFIX}_ret = {call};" if returns else f"{call};")
+    parts.append(f"{PREFIX}_add({index}, {PREFIX}_start);")
+    if epilogue:
+        parts.append(epilogue)
+    if returns:
+        parts.append(f"return {PREFIX}_ret;")
+    parts.append("}")
+    return " ".join(parts)
+
+def instrument_source(text, plugin, interval=PROFILE_INTERVAL):
+    """Исходник с обернутыми public-функциями и список их имен.
+    Тела переименовываются на месте, обертка пишется в той же строке сразу после тела -
+    в той же ветке #if, что и функция (номера строк не меняются); счетчики и задача
+    дампа дописываются в конец файла"""
+    source = PawnSource(text)
+    targets = [(name, f) for name, f in sorted(source.functions.items(), key=lambda item: item[1]['header'])
+               if f['public'] and not name.startswith(PREFIX) and parameter_names(source, f) is not None]
+    hooks = {'plugin_init': (f"{PREFIX}_init();", ''), 'plugin_end': ('', f"{PREFIX}_dump();")}
+
+    out, position = [], 0
+    for index, (name, function) in enumerate(targets):
+        qualifiers = source.original[function['header']:function['name']]
+        body_start, body_end = function['body']
+        out.append(source.original[position:function['header']])
+        out.append(re.sub(r'\bpublic\b\s*', '', qualifiers))
+        out.append(f"{PREFIX}{index}")
+        out.append(source.original[function['name'] + len(name):body_end])
+        # У тела без скобок оператор может быть без ';' - обертка на той же строке требует его
+        if source.code[body_start] != '{' and source.code[body_end - 1] != ';':
+            out.append(";")
+        out.append(" " + wrapper(source, name, function, index, *hooks.get(name, ('', ''))))
+        position = body_end
+    out.append(source.original[position:])
+
+    names = [name for name, _ in targets]
+    out.append(RUNTIME.format(p=PREFIX, count=max(1, len(names)), plugin=plugin, tag=DUMP_TAG,
+                              interval=interval, task_id=PROFILE_TASK_ID,
+                              names=', '.join(f'"{name}"' for name in names) or '""'))
+    for name, (prologue, epilogue) in hooks.items():
+        if name not in names:
+            out.append(f"\npublic {name}()\n{{\n\t{prologue or epilogue}\n}}\n")
+    return ''.join(out), names
+
+def instrument_file(plugin, source, root):
+    """Пишет обернутую копию source в .build_cache/profile (имя - как у плагина,
+    .amxx тоже называются по имени файла); возвращает ее путь"""
+    name = os.path.basename(plugin)
+    with open(source, 'r', encoding='utf-8', errors='replace') as f:
+        text, _ = instrument_source(f.read(), os.path.splitext(name)[0])
+    target = os.path.join(root, PROFILE_DIR, name)
+    atomic_write(target, text)
+    return target
+
+def parse_dumps(lines):
+    """{(плагин, функция): {calls, total_ms, max_ms}} по строкам дампов.
+    Счетчики накопительные: берется последний дамп, а при их сбросе
+    (смена карты, перезагрузка плагина) предыдущие значения суммируются"""
+    last, base = {}, {}
+    for line in lines:
+        match = DUMP_RE.search(line)
+        if not match:
+            continue
+        key = (match.group(1), match.group(2))
+        calls, total, peak = (int(match.group(i)) for i in (3, 4, 5))
+        previous = last.get(key)
+        if previous and calls < previous['calls']:
+            acc = base.setdefault(key, {'calls': 0, 'total_ms': 0, 'max_ms': 0})
+            acc['calls'] += previous['calls']
+            acc['total_ms'] += previous['total_ms']
+            acc['max_ms'] = max(acc['max_ms'], previous['max_ms'])
+        last[key] = {'calls': calls, 'total_ms': total, 'max_ms': peak}
+
+    stats = {}
+    for key, current in last.items():
+        acc = base.get(key, {'calls': 0, 'total_ms': 0, 'max_ms': 0})
+        stats[key] = {'calls': acc['calls'] + current['calls'], 'total_ms': acc['total_ms'] + current['total_ms'],
+                      'max_ms': max(acc['max_ms'], current['max_ms'])}
+    return stats
+
+def cost_table(stats):
+    """Таблица стоимости по плагинам и функциям, самые дорогие первыми"""
+    grand = sum(s['total_ms'] for s in stats.values()) or 1
+    plugins = {}
+    for (plugin, function), s in stats.items():
+        entry = plugins.setdefault(plugin, {'plugin': plugin, 'calls': 0, 'total_ms': 0, 'functions': []})
+        entry['calls'] += s['calls']
+        entry['total_ms'] += s['total_ms']
+        entry['functions'].append(dict(s, function=function, avg_ms=round(s['total_ms'] / s['calls'], 4) if s['calls'] else 0,
+                                       share=round(100 * s['total_ms'] / grand, 2)))
+    for entry in plugins.values():
+        entry['share'] = round(100 * entry['total_ms'] / grand, 2)
+        entry['functions'].sort(key=lambda f: (-f['total_ms'], -f['calls'], f['function']))
+    return sorted(plugins.values(), key=lambda p: (-p['total_ms'], p['plugin']))
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Instrument plugins with per-forward timers and analyze [prof] dumps")
+    sub = parser.add_subparsers(dest='command')
+    instrument = sub.add_parser('instrument', help="print the instrumented source of a plugin")
+    instrument.add_argument('plugin')
+    instrument.add_argument('-o', '--output', help="write to a file instead of stdout")
+    instrument.add_argument('--interval', type=float, default=PROFILE_INTERVAL, help="seconds between dumps")
+    analyze = sub.add_parser('analyze', help="per-plugin, per-forward cost tables from server logs")
+    analyze.add_argument('logs', nargs='*', help="server console or log files (default: stdin)")
+    analyze.add_argument('-n', '--top', type=int, default=10, help="functions to show per plugin")
+    analyze.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    if args.command == 'instrument':
+        with open(args.plugin, 'r', encoding='utf-8', errors='replace') as f:
+            text, names = instrument_source(f.read(), os.path.splitext(os.path.basename(args.plugin))[0], args.interval)
+        if args.output:
+            atomic_write(args.output, text)
+            print(f"⏱️ {len(names)} public functions instrumented: {', '.join(names)}")
+        else:
+            sys.stdout.write(text)
+        return True
+
+    if args.command != 'analyze':
+        parser.print_help()
+        return True
+
+    lines = []
+    for path in args.logs:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            lines.extend(f)
+    table = cost_table(parse_dumps(lines if args.logs else sys.stdin))
+    if args.json:
+        print(json.dumps(table, indent=2))
+        return True
+    if not table:
+        print(f"❌ No {DUMP_TAG} lines found")
+        return False
+    for entry in table:
+        print(f"⏱️ {entry['plugin']}: {entry['total_ms']} ms in {entry['calls']} calls ({entry['share']}%)")
+        print(f"   {'Function':<32} {'Calls':>10} {'Total ms':>10} {'Avg ms':>9} {'Max ms':>8} {'Share':>7}")
+        for f in entry['functions'][:args.top]:
+            print(f"   {f['function']:<32} {f['calls']:>10} {f['total_ms']:>10} {f['avg_ms']:>9.3f} "
+                  f"{f['max_ms']:>8} {f['share']:>6.2f}%")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main(sys.argv[1:]) else 1)
@@ -0,0 +1,177 @@
+"""Лексические помощники для исходников Pawn (^ - escape-символ в строках)"""
+import re, bisect
+
+KEYWORDS = {'if', 'for', 'while', 'switch', 'return', 'sizeof', 'tagof', 'do', 'else', 'case', 'new', 'static'}
+
+COMMENT_RE = re.compile(r'("(?:\^.|[^"^\n])*")|(\'(?:\^.|[^\'^\n])*\')|//[^\n]*|/\*.*?\*/', re.DOTALL)
+CALL_RE = re.compile(r'\b([A-Za-z_@][\w@]*)\s*\(')
+FUNCTION_HEADER_RE = re.compile(r'((?:\b(?:public|stock|static)[ \t]+)*)(?:([A-Za-z_]\w*):)?([A-Za-z_@][\w@]*)\s*\(([^;{}()]*)\)\s*$')
+# Функция без фигурных скобок: "public name(id) return ..." - тело из одного оператора;
+# без public/stock/static принимаются только @-функции (иначе это может быть вызов макроса)
+BODYLESS_HEADER_RE = re.compile(r'^[ \t]*((?:\b(?:public|stock|static)[ \t]+)*)(?:([A-Za-z_]\w*):)?([A-Za-z_@][\w@]*)\s*\(([^;{}()]*)\)\s*(?=[A-Za-z_@])', re.MULTILINE)
+PREPROCESSOR_RE = re.compile(r'^[ \t]*#[^\n]*', re.MULTILINE)
+LOOP_RE = re.compile(r'\b(for|while)\s*\(')
+DEFINE_RE = re.compile(r'^[ \t]*#define[ \t]+(\w+)[ \t]+([-+]?[\d.]+)\b', re.MULTILINE)
+CONST_RE = re.compile(r'\bconst\s+(?:Float:)?(\w+)\s*=\s*([-+]?[\d.]+)\b')
+LITERAL_RE = re.compile(r'"((?:\^.|[^"^\n])*)"|\'(?:\^.|[^\'^\n])*\'')
+
+def strip_comments(text):
+    """Исходник с комментариями, замененными пробелами (позиции и строки сохраняются)"""
+    return COMMENT_RE.sub(lambda m: m.group(1) or m.group(2) or re.sub(r'[^\n]', ' ', m.group(0)), text)
+
+def blank_literals(text):
+    """Содержимое строковых и символьных литералов заменено пробелами:
+    позиции совпадают с text, поэтому аргументы можно брать из исходного текста"""
+    return LITERAL_RE.sub(lambda m: m.group(0)[0] + ' ' * (len(m.group(0)) - 2) + m.group(0)[-1], text)
+
+def strip_literals(text):
+    """Исходник без комментариев и содержимого литералов (позиции сохраняются)"""
+    return blank_literals(strip_comments(text))
+
+def iter_string_literals(text):
+    """Строковые литералы исходника без комментариев"""
+    for match in LITERAL_RE.finditer(text):
+        if match.group(1) is not None:
+            yield match.group(1)
+
+class PawnSource:
+    """Разобранный исходник: text - без комментариев, code - еще и без содержимого
+    литералов; позиции обоих совпадают с исходным текстом"""
+
+    def __init__(self, text):
+        self.original = text
+        self.text = strip_comments(text)
+        self.code = blank_literals(self.text)
+        self._lines = [0]
+        for match in re.finditer('\n', self.code):
+            self._lines.append(match.end())
+        self.functions = self._functions()
+        self.constants = dict(DEFINE_RE.findall(self.text) + CONST_RE.findall(self.text))
+
+    def line(self, pos):
+        low, high = 0, len(self._lines)
+        while low + 1 < high:
+            middle = (low + high) // 2
+            if self._lines[middle] <= pos:
+                low = middle
+            else:
+                high = middle
+        return low + 1
+
+    def matching(self, pos, opening, closing):
+        """Позиция после парной скобки для code[pos] == opening"""
+        depth = 0
+        for i in range(pos, len(self.code)):
+            if self.code[i] == opening:
+                depth += 1
+            elif self.code[i] == closing:
+                depth -= 1
+                if depth == 0:
+                    return i + 1
+        return len(self.code)
+
+    def _functions(self):
+        """{имя: {header, name, params, body, line, public, tag}} функций верхнего уровня;
+        header - начало заголовка, params и body - диапазоны (params без скобок, body со скобками,
+        у функции без скобок - ее единственный оператор)"""
+        functions, depth, start, blocks = {}, 0, 0, []
+        for i, char in enumerate(self.code):
+            if char == '{':
+                if depth == 0:
+                    header = FUNCTION_HEADER_RE.search(self.code, start, i)
+                    name = header.group(3) if header else None
+                    if name and name not in KEYWORDS and name not in functions:
+                        functions[name] = {
+                            'header': header.start(),
+                            'name': header.start(3),
+                            'params': (header.start(4), header.end(4)),
+                            'body': (i, self.matching(i, '{', '}')),
+                            'line': self.line(header.start(3)),
+                            'public': name.startswith('@') or 'public' in header.group(1).split(),
+                            'tag': header.group(2),
+                        }
+                    blocks.append(i)
+                depth += 1
+            elif char == '}':
+                if depth == 1:
+                    blocks.append(i + 1)
+                depth = max(0, depth - 1)
+                if depth == 0:
+                    start = i + 1
+            elif char == ';' and depth == 0:
+                start = i + 1
+        self._bodyless_functions(functions, blocks)
+        return functions
+
+    def _bodyless_functions(self, functions, blocks):
+        """Дополняет functions функциями без скобок вне блоков {...} (blocks - границы блоков по порядку)"""
+        code = PREPROCESSOR_RE.sub(lambda m: ' ' * len(m.group(0)), self.code)
+        for header in BODYLESS_HEADER_RE.finditer(code):
+            name = header.group(3)
+            if not (header.group(1) or name.startswith('@')) or name in KEYWORDS or name in functions \
+                    or bisect.bisect_right(blocks, header.start()) % 2:
+                continue
+            body_start = header.end()
+            end, depth = body_start, 0
+            while end < len(code) and not (depth == 0 and code[end] in ';\n{}'):
+                depth += code[end] in '(['
+                depth -= code[end] in ')]'
+                end += 1
+            if code[end:end + 1] in ('{', '}'):
+                continue
+            end = end + 1 if code[end:end + 1] == ';' else len(code[:end].rstrip())
+            functions[name] = {
+                'header': header.start(1),
+                'name': header.start(3),
+                'params': (header.start(4), header.end(4)),
+                'body': (body_start, end),
+                'line': self.line(header.start(3)),
+                'public': name.startswith('@') or 'public' in header.group(1).split(),
+                'tag': header.group(2),
+            }
+
+    def split(self, start, end):
+        """Текст (с литералами) частей диапазона, разделенных запятыми верхнего уровня"""
+        parts, depth, begin = [], 0, start
+        for i in range(start, end):
+            char = self.code[i]
+            if char in '([{':
+                depth += 1
+            elif char in ')]}':
+                depth -= 1
+            elif char == ',' and depth == 0:
+                parts.append(self.text[begin:i].strip())
+                begin = i + 1
+        last = self.text[begin:end].strip()
+        if last or parts:
+            parts.append(last)
+        return parts
+
+    def arguments(self, open_paren):
+        """Аргументы вызова по позиции '('"""
+        return self.split(open_paren + 1, self.matching(open_paren, '(', ')') - 1)
+
+    def calls(self, start, end):
+        """(имя, позиция '(') вызовов в диапазоне"""
+        for match in CALL_RE.finditer(self.code, start, end):
+            if match.group(1) not in KEYWORDS:
+                yield match.group(1), match.end() - 1
+
+    def loops(self, start, end):
+        """[(начало, конец заголовка, конец тела)] циклов for/while в диапазоне"""
+        found = []
+        for match in LOOP_RE.finditer(self.code, start, end):
+            header_end = self.matching(match.end() - 1, '(', ')')
+            body = re.compile(r'\s*').match(self.code, header_end).end()
+            body_end = self.matching(body, '{', '}') if self.code[body:body + 1] == '{' \
+                else self.code.find(';', body) + 1 or end
+            found.append((match.start(), header_end, body_end))
+        return found
+
+    def number(self, value):
+        """Числовое значение литерала или #define/const-константы (None, если не число)"""
+        value = self.constants.get(value, value)
+        try:
+            return float(value.replace('Float:', '').strip('()'))
+        except ValueError:
+            return None
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Статический поиск дорогих вызовов на горячих путях плагинов: server_frame,
+client_PreThink, think/touch и хуки fakemeta/hamsandwich/engine/reapi"""
+import os, re, sys, json, argparse
+
+from pawn_source import PawnSource
+from symbol_index import SymbolIndex
+from tar_index import read_source
+
+TOOL = "perf_lint"
+SEVERITIES = ('note', 'warning', 'error')
+SHORT_TASK_SECONDS = 0.5
+FRAME_TASK_SECONDS = 0.1
+
+# Forward-ы, которые вызываются каждый кадр или на каждое событие движка
+HOT_FORWARDS = {
+    'server_frame': "every server frame",
+    'client_PreThink': "every player think",
+    'client_PostThink': "every player think",
+    'client_cmdStart': "every player usercmd",
+    'pfn_think': "every entity think",
+    'pfn_touch': "every entity touch",
+    'pfn_playbackevent': "every event playback",
+}
+
+# Нативы регистрации хуков: (аргумент с событием или None, аргумент с именем функции)
+HOOK_REGISTRARS = {
+    'register_forward': (0, 1),
+    'RegisterHam': (0, 2),
+    'RegisterHamPlayer': (0, 1),
+    'RegisterHamFromEntity': (0, 2),
+    'RegisterHookChain': (0, 1),
+    'register_think': (None, 1),
+    'register_touch': (None, 2),
+}
+
+HOT_EVENTS = {
+    'FM_StartFrame', 'FM_PlayerPreThink', 'FM_PlayerPostThink', 'FM_CmdStart', 'FM_CmdEnd',
+    'FM_AddToFullPack', 'FM_UpdateClientData', 'FM_CheckVisibility', 'FM_Think', 'FM_Touch',
+    'FM_TraceLine', 'FM_TraceHull', 'FM_EmitSound',
+    'Ham_Think', 'Ham_Touch', 'Ham_Player_PreThink', 'Ham_Player_PostThink', 'Ham_Item_PostFrame',
+    'Ham_Player_UpdateClientData', 'Ham_TraceAttack',
+    'RG_CBasePlayer_PreThink', 'RG_CBasePlayer_PostThink', 'RG_CBasePlayer_UpdateClientData',
+    'RG_CSGameRules_Think', 'RG_PM_Move', 'RG_PM_AirMove', 'RH_SV_StartSound',
+}
+
+# Дорогой натив -> (правило, важность, совет)
+EXPENSIVE_CALLS = {}
+for _names, _rule in (
+        (('get_players', 'get_players_ex', 'find_player', 'find_player_ex'),
+         ('hot-player-scan', 'error', "cache the player list in client_putinserver/client_disconnected")),
+        (('find_ent_by_class', 'find_ent_by_owner', 'find_ent_by_model', 'find_ent_by_target', 'find_ent_by_tname',
+          'find_ent_in_sphere', 'find_sphere_class', 'rg_find_ent_by_class'),
+         ('hot-entity-scan', 'error', "keep entity ids from the spawn/creation instead of searching")),
+        (('get_cvar_num', 'get_cvar_float', 'get_cvar_string', 'get_cvar_flags', 'get_cvar_pointer'),
+         ('hot-cvar-lookup', 'warning', "look the cvar up by name once: bind_pcvar_* or get_pcvar_*")),
+        (('fopen', 'read_file', 'write_file', 'file_exists', 'log_to_file'),
+         ('hot-file-io', 'error', "file access blocks the frame; move it to plugin_cfg or a task")),
+        (('log_amx', 'log_message'),
+         ('hot-logging', 'warning', "logging formats and writes on every call")),
+        (('format', 'formatex', 'vformat', 'fmt'),
+         ('hot-format', 'note', "build the string once or only when it changes"))):
+    for _name in _names:
+        EXPENSIVE_CALLS[_name] = _rule
+
+# engfunc(EngFunc_FindEntity...) - тот же поиск сущностей через fakemeta
+ENGFUNC_SCANS = ('EngFunc_FindEntityByString', 'EngFunc_FindEntityInSphere')
+FORMAT_CALLS = ('format', 'formatex', 'vformat', 'fmt')
+PLAYER_LOOP_RE = re.compile(r'MaxClients|get_maxplayers|maxplayers|MAX_PLAYERS', re.IGNORECASE)
+
+def finding(file, line, rule, severity, message, entry=None, path=None):
+    return {'file': file, 'line': line, 'code': rule, 'severity': severity, 'message': message,
+            'entry': entry, 'path': path or []}
+
+def unquote(arg):
+    return arg[1:-1] if len(arg) >= 2 and arg[0] == arg[-1] == '"' else None
+
+class PerfLinter:
+    """Находит горячие точки входа плагина и дорогие вызовы, достижимые из них"""
+
+    def __init__(self, root, include_dirs, graph=None):
+        self.index = SymbolIndex(root, include_dirs, graph=graph)
+        self._stock_costs = {}
+
+    def save(self):
+        self.index.save()
+
+    def module_of(self, name, kind):
+        for symbol in self.index.lookup(name):
+            if symbol['kind'] == kind:
+                return symbol['module']
+        return None
+
+    def entries(self, source, file):
+        """Горячие функции плагина: {имя: причина} и находки по set_task"""
+        entries, findings = {}, []
+        for name in source.functions:
+            if name in HOT_FORWARDS:
+                module = self.module_of(name, 'forward') or 'unknown'
+                entries.setdefault(name, f"{name} ({module} forward, {HOT_FORWARDS[name]})")
+
+        for name, paren in source.calls(0, len(source.code)):
+            if name in HOOK_REGISTRARS:
+                event_arg, callback_arg = HOOK_REGISTRARS[name]
+                args = source.arguments(paren)
+                callback = unquote(args[callback_arg]) if callback_arg < len(args) else None
+                event = args[event_arg] if event_arg is not None and event_arg < len(args) else None
+                if callback and (event is None or event in HOT_EVENTS):
+                    module = self.module_of(name, 'native') or 'unknown'
+                    entries.setdefault(callback, f"{callback} ({module} {name}({event or 'entity'}))")
+            elif name == 'set_task':
+                findings.extend(self._check_task(source, file, paren, entries))
+        return entries, findings
+
+    def _check_task(self, source, file, paren, entries):
+        args = source.arguments(paren)
+        if len(args) < 2:
+            return []
+        interval = source.number(args[0])
+        flags = unquote(args[5]) if len(args) > 5 else None
+        callback = unquote(args[1])
+        if interval is None or not flags or 'b' not in flags or interval >= SHORT_TASK_SECONDS:
+            return []
+        if callback:
+            entries.setdefault(callback, f"{callback} (set_task every {interval:g}s)")
+        severity = 'error' if interval <= FRAME_TASK_SECONDS else 'warning'
+        return [finding(file, source.line(paren), 'short-repeat-task', severity,
+                        f"set_task repeats \"{callback or args[1]}\" every {interval:g}s; use an interval of "
+                        f"{SHORT_TASK_SECONDS:g}s or more, or a forward that runs only when needed")]
+
+    def stock_cost(self, name, stocks, seen=None):
+        """(натив, путь) первого дорогого натива, вызываемого stock-ом из include"""
+        if name in self._stock_costs:
+            return self._stock_costs[name]
+        seen = seen or set()
+        seen.add(name)
+        result = None
+        for call in stocks[name][1].get('calls', []):
+            if call in EXPENSIVE_CALLS and EXPENSIVE_CALLS[call][1] != 'note':
+                result = (call, [name])
+                break
+            if call in stocks and call not in seen:
+                nested = self.stock_cost(call, stocks, seen)
+                if nested:
+                    result = (nested[0], [name] + nested[1])
+                    break
+        self._stock_costs[name] = result
+        return result
+
+    def lint(self, plugin):
+        """Находки по одному плагину, отсортированные по строке"""
+        file = self.index.graph.key(plugin)
+        source = PawnSource(read_source(plugin).decode('utf-8', errors='replace'))
+        stocks = self.index.visible_symbols(plugin)['stock']
+        entries, findings = self.entries(source, file)
+
+        # Обход вызовов от каждой горячей точки входа по функциям плагина
+        reached = {}
+        queue = [(name, [name], reason) for name, reason in entries.items() if name in source.functions]
+        while queue:
+            name, path, reason = queue.pop(0)
+            if name in reached:
+                continue
+            reached[name] = (path, reason)
+            start, end = source.functions[name]['body']
+            for call, _ in source.calls(start, end):
+                if call in source.functions and call not in reached:
+                    queue.append((call, path + [call], reason))
+
+        seen = set()
+        for name, (path, reason) in reached.items():
+            start, end = source.functions[name]['body']
+            loops = source.loops(start, end)
+            for call, paren in source.calls(start, end):
+                in_loop = any(s <= paren < e for s, _, e in loops)
+                rule = self._classify(source, call, paren, stocks)
+                if not rule:
+                    continue
+                code, severity, advice, via = rule
+                if code == 'hot-format' and in_loop:
+                    severity = 'warning'
+                line = source.line(paren)
+                if (line, code) in seen:
+                    continue
+                seen.add((line, code))
+                where = f"{call}() via {' -> '.join(via)}" if via else f"{call}()"
+                loop = " inside a loop" if in_loop else ""
+                through = f" through {' -> '.join(path)}" if len(path) > 1 else ""
+                findings.append(finding(file, line, code, severity,
+                                        f"{where}{loop} runs on {reason}{through}; {advice}", path[0], path))
+
+        # format в циклах по игрокам вне горячих путей - тоже на каждого игрока
+        for name, function in source.functions.items():
+            if name in reached:
+                continue
+            for loop_start, header_end, loop_end in source.loops(*function['body']):
+                if not PLAYER_LOOP_RE.search(source.code, loop_start, header_end):
+                    continue
+                for call, paren in source.calls(loop_start, loop_end):
+                    line = source.line(paren)
+                    if call in FORMAT_CALLS and (line, 'loop-format') not in seen:
+                        seen.add((line, 'loop-format'))
+                        findings.append(finding(file, line, 'loop-format', 'note',
+                                                f"{call}() inside a per-player loop in {name}; format the "
+                                                f"shared part once before the loop", name, [name]))
+
+        findings.sort(key=lambda f: (f['line'] or 0, f['code']))
+        return findings
+
+    def _classify(self, source, call, paren, stocks):
+        if call in EXPENSIVE_CALLS:
+            return EXPENSIVE_CALLS[call] + ([],)
+        if call == 'engfunc':
+            args = source.arguments(paren)
+            if args and args[0] in ENGFUNC_SCANS:
+                return EXPENSIVE_CALLS['find_ent_by_class'][:2] + (
+                    f"{args[0]} walks the entity list; keep entity ids instead", [])
+            return None
+        if call in stocks and call not in source.functions:
+            cost = self.stock_cost(call, stocks)
+            if cost:
+                return EXPENSIVE_CALLS[cost[0]] + (cost[1] + [cost[0]],)
+        return None
+
+def as_diagnostics(findings):
+    """Находки в формате записей compile-report.json"""
+    return [{'file': f['file'], 'line': f['line'], 'end_line': f['line'], 'severity': f['severity'],
+             'code': f['code'], 'message': f['message'], 'tool': TOOL} for f in findings]
+
+def lint_plugins(plugins, root, include_dirs, min_severity='note'):
+    linter = PerfLinter(root, include_dirs)
+    threshold = SEVERITIES.index(min_severity)
+    results = {}
+    for plugin in plugins:
+        results[plugin] = [f for f in linter.lint(plugin) if SEVERITIES.index(f['severity']) >= threshold]
+    linter.save()
+    return results
+
+def main(argv):
+    from compile_plugins import load_config, find_plugins
+
+    parser = argparse.ArgumentParser(description="Find expensive calls reachable from per-frame forwards and hooks")
+    parser.add_argument('plugins', nargs='*', help=".sma files (default: every plugin under scripting/)")
+    parser.add_argument('--severity', choices=SEVERITIES, default='note', help="lowest severity to report")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    config = load_config()
+    plugins = [os.path.abspath(p) for p in args.plugins] or find_plugins(config['scripting'])
+    results = lint_plugins(plugins, config['root'], [config['include']], args.severity)
+    findings = [f for plugin in plugins for f in results[plugin]]
+    errors = sum(1 for f in findings if f['severity'] == 'error')
+
+    if args.json:
+        print(json.dumps({'findings': findings, 'totals': {s: sum(1 for f in findings if f['severity'] == s)
+                                                            for s in SEVERITIES}}, indent=2))
+        return errors == 0
+    for f in findings:
+        print(f"{f['file']}:{f['line']}: {f['severity']} {f['code']}: {f['message']}")
+    print(f"🐌 {len(plugins)} plugins: {errors} errors, "
+          f"{sum(1 for f in findings if f['severity'] == 'warning')} warnings, "
+          f"{sum(1 for f in findings if f['severity'] == 'note')} notes")
+    return errors == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if main(sys.argv[1:]) else 1)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Трассировка конвейера сборки: вложенные интервалы команд, чтения/записи файлов, подпроцессов
+и задач компиляции в формате Chrome trace (chrome://tracing, ui.perfetto.dev) и текстовая сводка.
+Включается --trace FILE или $MIRGAME_TRACE; подпроцессы дописывают свои интервалы в тот же файл.
+Выключенная трассировка - одна проверка на интервал"""
+import os, sys, json, time, atexit, argparse, threading, contextlib
+
+TRACE_ENV = "MIRGAME_TRACE"
+PARENT_ENV = "MIRGAME_TRACE_PARENT"
+SUMMARY_TOP = 20
+
+_NULL = contextlib.nullcontext()
+_tracer = None
+
+class Tracer:
+    """Интервалы одного процесса; сбрасываются в общий файл при выходе"""
+
+    def __init__(self, path):
+        self.path = path
+        self.pid = os.getpid()
+        self.parent = os.getenv(PARENT_ENV)
+        self.started = time.time_ns() // 1000
+        self.clock = time.perf_counter_ns()
+        self.events = []
+        self.threads = {}
+        self.lock = threading.Lock()
+        self.tid()  # основной поток - первый: на нем же интервал всего процесса
+
+    def now(self):
+        """Микросекунды эпохи по монотонным часам: процессы сводятся на одну шкалу"""
+        return self.started + (time.perf_counter_ns() - self.clock) // 1000
+
+    def tid(self):
+        ident = threading.get_ident()
+        if ident not in self.threads:
+            with self.lock:
+                self.threads.setdefault(ident, (len(self.threads) + 1, threading.current_thread().name))
+        return self.threads[ident][0]
+
+    @contextlib.contextmanager
+    def span(self, name, category, args):
+        tid, start = self.tid(), self.now()
+        try:
+            yield
+        finally:
+            event = {'name': name, 'cat': category, 'ph': 'X', 'ts': start, 'dur': self.now() - start,
+                     'pid': self.pid, 'tid': tid}
+            if args:
+                event['args'] = {k: v if isinstance(v, (int, float, bool, type(None))) else str(v)
+                                 for k, v in args.items()}
+            with self.lock:
+                self.events.append(event)
+
+    def process_events(self):
+        """Метаданные процесса и потоков и интервал всего процесса"""
+        command = ' '.join([os.path.basename(sys.argv[0])] + sys.argv[1:]) if sys.argv else 'python'
+        args = {'parent_pid': int(self.parent)} if self.parent and self.parent.isdigit() else {}
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'args': {'name': f"{command} ({self.pid})"}},
+                  {'name': command, 'cat': 'process', 'ph': 'X', 'ts': self.started,
+                   'dur': self.now() - self.started, 'pid': self.pid, 'tid': 1, 'args': args}]
+        events += [{'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': name}}
+                   for tid, name in self.threads.values()]
+        return events
+
+    def flush(self):
+        """Дописывает интервалы процесса в файл трассировки и обновляет сводку"""
+        global _tracer
+        if _tracer is self:
+            _tracer = None  # собственные записи файла трассировки не трассируются
+        from fileutil import atomic_write, file_lock
+        with file_lock(self.path + '.lock'):
+            events = load_events(self.path)
+            events += self.process_events() + self.events
+            atomic_write(self.path, json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}) + "\n")
+        atomic_write(summary_path(self.path), format_summary(summarize(events)) + "\n")
+        self.events = []
+
+def enable(path, fresh=False):
+    """Включает трассировку процесса (и его подпроцессов через окружение);
+    fresh - начать файл заново (запуск с --trace)"""
+    global _tracer
+    path = os.path.abspath(path)
+    if fresh:
+        for stale in (path, summary_path(path)):
+            if os.path.exists(stale):
+                os.remove(stale)
+    if _tracer is None:
+        _tracer = Tracer(path)
+        atexit.register(_tracer.flush)
+    _tracer.path = path
+    os.environ[TRACE_ENV] = path
+    os.environ[PARENT_ENV] = str(os.getpid())
+    return _tracer
+
+def enabled():
+    return _tracer is not None
+
+def span(name, category='function', **args):
+    """Контекстный менеджер интервала; без трассировки - общий пустой контекст"""
+    if _tracer is None:
+        return _NULL
+    return _tracer.span(name, category, args)
+
+def pop_trace_option(argv):
+    """Убирает --trace FILE из аргументов и включает трассировку (для CLI без argparse)"""
+    if '--trace' not in argv:
+        return argv
+    index = argv.index('--trace')
+    if index + 1 >= len(argv):
+        raise SystemExit("--trace needs a file name")
+    enable(argv[index + 1], fresh=True)
+    return argv[:index] + argv[index + 2:]
+
+def summary_path(path):
+    return os.path.splitext(path)[0] + '.txt'
+
+def load_events(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('traceEvents', [])
+    except (OSError, ValueError, AttributeError):
+        return []
+
+def summarize(events):
+    """{имя: {category, count, total_us, self_us, max_us}}; собственное время - без вложенных интервалов"""
+    stats = {}
+    threads = {}
+    for event in events:
+        if event.get('ph') == 'X':
+            threads.setdefault((event['pid'], event.get('tid')), []).append(event)
+    for spans in threads.values():
+        spans.sort(key=lambda e: (e['ts'], -e['dur']))
+        stack = []
+        for event in spans:
+            while stack and stack[-1]['ts'] + stack[-1]['dur'] <= event['ts']:
+                stack.pop()
+            if stack:
+                stack[-1]['_children'] = stack[-1].get('_children', 0) + event['dur']
+            stack.append(event)
+        for event in spans:
+            entry = stats.setdefault(event['name'], {'category': event.get('cat', ''), 'count': 0,
+                                                     'total_us': 0, 'self_us': 0, 'max_us': 0})
+            entry['count'] += 1
+            entry['total_us'] += event['dur']
+            entry['self_us'] += max(0, event['dur'] - event.pop('_children', 0))
+            entry['max_us'] = max(entry['max_us'], event['dur'])
+    return stats
+
+def format_summary(stats, top=SUMMARY_TOP):
+    """Текстовая таблица: самые дорогие по собственному времени интервалы"""
+    rows = sorted(stats.items(), key=lambda item: (-item[1]['self_us'], item[0]))[:top]
+    lines = [f"{'Self ms':>10} {'Total ms':>10} {'Count':>7} {'Max ms':>9}  {'Category':<10} Span"]
+    for name, s in rows:
+        lines.append(f"{s['self_us'] / 1000:>10.1f} {s['total_us'] / 1000:>10.1f} {s['count']:>7} "
+                     f"{s['max_us'] / 1000:>9.1f}  {s['category']:<10} {name}")
+    return "\n".join(lines)
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Summarize a build trace written with --trace or $MIRGAME_TRACE")
+    parser.add_argument('trace', nargs='?', default=os.getenv(TRACE_ENV, 'trace.json'))
+    parser.add_argument('-n', '--top', type=int, default=SUMMARY_TOP, help="spans to show")
+    parser.add_argument('--category', help="only spans of this category (command, file, subprocess, compile...)")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    events = load_events(args.trace)
+    if not events:
+        print(f"❌ No trace events in {args.trace}")
+        return False
+    stats = summarize(events)
+    if args.category:
+        stats = {name: s for name, s in stats.items() if s['category'] == args.category}
+    if args.json:
+        print(json.dumps(stats, indent=2))
+        return True
+    processes = sum(1 for e in events if e.get('cat') == 'process')
+    print(f"🔬 {args.trace}: {len(events)} events from {processes} processes")
+    print(format_summary(stats, args.top))
+    return True
+
+if os.getenv(TRACE_ENV) and __name__ != "__main__":
+    enable(os.environ[TRACE_ENV])
+
+if __name__ == "__main__":
+    sys.exit(0 if main(sys.argv[1:]) else 1)
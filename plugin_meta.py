@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Однопроходный сканер метаданных плагинов (.sma) с кэшем и JSON-манифестом"""
+import os, re, sys, json, argparse
+
+from fileutil import atomic_write
+from tar_index import source_stat, read_source
+
+MANIFEST_VERSION = 1
+MANIFEST_FILE = os.path.join(".build_cache", "plugin_meta.json")
+META_DEFINES = ('PLUGIN_NAME', 'PLUGIN_VERSION', 'PLUGIN_AUTHOR')
+REGISTER_FIELDS = ('name', 'version', 'author')
+
+DEFINE_RE = re.compile(r'^[ \t]*#define[ \t]+(\w+)[ \t]+(.*)$', re.MULTILINE)
+REGISTER_RE = re.compile(r'\bregister_plugin\s*\(')
+BLOCK_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+
+def strip_block_comments(text):
+    return BLOCK_COMMENT_RE.sub(lambda m: '\n' * m.group(0).count('\n'), text)
+
+def split_call_args(text, start):
+    """Аргументы вызова начиная с позиции после '(' (строки и вложенные скобки учитываются)"""
+    args, current, depth, i = [], [], 0, start
+    while i < len(text):
+        ch = text[i]
+        if ch == '"':
+            end = i + 1
+            while end < len(text) and text[end] != '"':
+                end += 2 if text[end] == '^' else 1
+            current.append(text[i:end + 1])
+            i = end + 1
+            continue
+        if ch == '(':
+            depth += 1
+        elif ch == ')':
+            if depth == 0:
+                args.append(''.join(current).strip())
+                return args
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            args.append(''.join(current).strip())
+            current = []
+            i += 1
+            continue
+        current.append(ch)
+        i += 1
+    return None
+
+def string_literal(value):
+    """Значение "..." или None, если это не строковый литерал"""
+    match = re.fullmatch(r'"([^"]*)"', value.strip())
+    return match.group(1) if match else None
+
+def scan_source(text):
+    """Разбирает исходник за один проход: #define, register_plugin, PROJECT_AUTHOR"""
+    text = strip_block_comments(text)
+    defines = {}
+    for match in DEFINE_RE.finditer(text):
+        name, value = match.group(1), match.group(2).split('//', 1)[0].strip()
+        defines.setdefault(name, value)
+
+    register = None
+    match = REGISTER_RE.search(text)
+    if match:
+        register = split_call_args(text, match.end())
+
+    return {
+        'defines': {name: string_literal(defines[name]) or "" for name in META_DEFINES if name in defines},
+        'string_defines': {name: string_literal(value) for name, value in defines.items()
+                           if string_literal(value) is not None},
+        'register_plugin': register,
+        'uses_project_author': 'PROJECT_AUTHOR' in text,
+    }
+
+def resolve_info(entry, project_author):
+    """Имя, версия и автор плагина + отсутствующие поля (формат compile_plugins)"""
+    defines = entry['defines']
+    register = entry.get('register_plugin') or []
+    string_defines = entry.get('string_defines', {})
+
+    def from_register(index):
+        if index >= len(register):
+            return ""
+        arg = register[index]
+        if arg == 'PROJECT_AUTHOR':
+            return project_author
+        literal = string_literal(arg)
+        if literal is not None:
+            return literal
+        return string_defines.get(arg, "")
+
+    info = {'missing': [], 'uses_project_author': False}
+    for index, (field, define) in enumerate(zip(REGISTER_FIELDS, META_DEFINES)):
+        info[field] = defines.get(define, "")
+        if not info[field] and define != 'PLUGIN_AUTHOR':
+            info[field] = from_register(index)
+
+    if not info['name']:
+        info['missing'].append('PLUGIN_NAME')
+        info['name'] = "Not name"
+    if not info['version']:
+        info['missing'].append('PLUGIN_VERSION')
+    if not info['author']:
+        if entry['uses_project_author']:
+            info['author'] = project_author
+            info['uses_project_author'] = True
+        else:
+            info['author'] = from_register(2)
+            if not info['author']:
+                info['missing'].append('PLUGIN_AUTHOR')
+                info['author'] = "Not author"
+    return info
+
+class PluginMetaCache:
+    """Манифест метаданных плагинов; файл перечитывается только при смене mtime/size"""
+
+    def __init__(self, root, path=None):
+        self.root = os.path.abspath(root)
+        self.path = path or os.path.join(self.root, MANIFEST_FILE)
+        self.entries = {}
+        self.changed = False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self.entries = data.get('plugins', {})
+        except (OSError, ValueError):
+            pass
+
+    def key(self, path):
+        return os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, '/')
+
+    def scan(self, path):
+        """Запись манифеста для одного .sma"""
+        key = self.key(path)
+        mtime, size = source_stat(path)
+        entry = self.entries.get(key)
+        if entry and entry['mtime'] == mtime and entry['size'] == size:
+            return entry
+
+        entry = scan_source(read_source(path).decode('utf-8', errors='replace'))
+        entry.update(file=key, base_name=os.path.splitext(os.path.basename(path))[0],
+                     mtime=mtime, size=size)
+        self.entries[key] = entry
+        self.changed = True
+        return entry
+
+    def scan_all(self, paths):
+        return {self.key(p): self.scan(p) for p in paths}
+
+    def save(self):
+        if not self.changed:
+            return
+        atomic_write(self.path, json.dumps({'version': MANIFEST_VERSION, 'plugins': self.entries},
+                                           indent=1, sort_keys=True, ensure_ascii=False))
+        self.changed = False
+
+def build_manifest(plugins, cache, project_author):
+    """Манифест дерева: сырые данные сканера + разрешенные имя/версия/автор"""
+    manifest = {}
+    for key, entry in cache.scan_all(plugins).items():
+        manifest[key] = dict(entry, **resolve_info(entry, project_author))
+    return manifest
+
+def main(argv):
+    from compile_plugins import load_config, find_plugins, read_project_info
+
+    parser = argparse.ArgumentParser(description="Scan plugin metadata into a JSON manifest")
+    parser.add_argument('plugins', nargs='*')
+    parser.add_argument('-o', '--output', help="write the manifest to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    config = load_config()
+    project = read_project_info(config)
+    plugins = [os.path.abspath(p) for p in args.plugins] or find_plugins(config['scripting'])
+
+    cache = PluginMetaCache(config['root'])
+    manifest = build_manifest(plugins, cache, project['author'])
+    cache.save()
+
+    text = json.dumps({'project': project, 'plugins': manifest}, indent=2, ensure_ascii=False)
+    if args.output:
+        atomic_write(args.output, text + "\n")
+        print(f"✅ Manifest with {len(manifest)} plugins written to {args.output}")
+    else:
+        print(text)
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main(sys.argv[1:]) else 1)
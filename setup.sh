@@ -429,6 +429,11 @@ if ! python3 update_version.py validate 2>/dev/null; then
     echo "   Run: python3 update_version.py validate for details"
 fi
 
+if ! python3 lang_validate.py -q; then
+    echo "⚠️ Lang dictionary issues detected (%d/%s mismatches break formatting in game)"
+    echo "   Run: python3 lang_validate.py for details"
+fi
+
 echo "✅ Pre-commit checks completed"
 exit 0
 EOF
@@ -438,8 +443,8 @@ EOF
 #!/bin/bash
 echo "🚀 Pre-push: Running build verification..."
 
-# Проверяем что проект компилируется
-if ./compile.sh > /dev/null 2>&1; then
+# Проверяем что проект компилируется (параллельно, по числу ядер)
+if python3 compile_plugins.py > /dev/null 2>&1; then
     echo "✅ Build verification passed"
 else
     echo "❌ Build failed - fix issues before pushing"
@@ -664,6 +669,7 @@ show_summary() {
     echo "   python3 update_version.py build-mirgame  # Generate build number"
     echo "   python3 update_version.py patch     # Bump patch version"
     echo "   python3 update_version.py validate  # Check version consistency"
+    echo "   python3 lang_validate.py            # Check lang dictionaries"
     echo ""
     
     if [ -d ".git" ] && [ -d ".githooks" ]; then
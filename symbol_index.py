@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""Индекс native/forward/stock из scripting/include с модулем-владельцем
+и отчет о модулях, которые реально нужны каждому плагину"""
+import os, re, sys, json, argparse
+
+from fileutil import atomic_write
+from include_graph import IncludeGraph
+from pawn_source import strip_literals, CALL_RE
+from tar_index import read_source
+
+INDEX_VERSION = 2
+INDEX_FILE = os.path.join(".build_cache", "symbol_index.json")
+CORE_HEADER = "amxmodx.inc"
+CORE_MODULE = "core"
+
+NAME = r'(?:[A-Za-z_]\w*:)?([A-Za-z_@][\w@]*)\s*\('
+DECLARATION_RE = re.compile(r'^[ \t]*(native|forward|(?:static[ \t]+)?stock)[ \t]+' + NAME, re.MULTILINE)
+DEFINE_NAME_RE = re.compile(r'^[ \t]*#define[ \t]+([A-Za-z_@][\w@]*)', re.MULTILINE)
+ENUM_RE = re.compile(r'\benum\s+(?:[A-Za-z_]\w*:\s*)?([A-Za-z_]\w*)?\s*(?:\([^)]*\))?\s*\{([^}]*)\}')
+ENUM_MEMBER_RE = re.compile(r'(?:^|,)\s*(?:[A-Za-z_]\w*:)?([A-Za-z_@][\w@]*)')
+VARIABLE_RE = re.compile(r'^[ \t]*(?:stock|new|static)[ \t]+(?:const[ \t]+)?(?:[A-Za-z_]\w*:)?([A-Za-z_@][\w@]*)\s*[\[=;]',
+                         re.MULTILINE)
+LIBRARY_RE = re.compile(r'^[ \t]*#pragma[ \t]+(reqlib|library|reqclass)[ \t]+(\w+)', re.MULTILINE)
+
+# Какие файлы modules.ini предоставляют класс библиотек (#pragma reqclass)
+CLASS_PROVIDERS = {
+    'xstats': ('csx', 'dodx', 'tfcx', 'tsx'),
+    'sqlx': ('mysql', 'sqlite'),
+    'dbi': ('mysql', 'sqlite'),
+}
+
+def _body_end(text, start):
+    """Позиция после парной '}' для '{' в text[start]"""
+    depth = 0
+    for i in range(start, len(text)):
+        if text[i] == '{':
+            depth += 1
+        elif text[i] == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return len(text)
+
+def scan_header(text):
+    """{'library': имя или None, 'library_kind': ..., 'symbols': {имя: {kind, line, calls}},
+    'identifiers': [все объявленные имена]}"""
+    code = strip_literals(text)
+    library = LIBRARY_RE.search(code)
+    symbols = {}
+    for match in DECLARATION_RE.finditer(code):
+        kind = 'stock' if match.group(1).endswith('stock') else match.group(1)
+        name = match.group(2)
+        entry = {'kind': kind, 'line': code.count('\n', 0, match.start()) + 1}
+        if kind == 'stock':
+            # Для stock запоминаем вызовы из тела: native, нужные плагину через stock
+            depth, i = 1, match.end()
+            while i < len(code) and depth:
+                depth += {'(': 1, ')': -1}.get(code[i], 0)
+                i += 1
+            brace = re.compile(r'\s*\{').match(code, i)
+            if brace:
+                body = code[brace.end() - 1:_body_end(code, brace.end() - 1)]
+                entry['calls'] = sorted({c for c in CALL_RE.findall(body) if c != name})
+        symbols.setdefault(name, entry)
+    # Все объявленные имена (макросы, константы enum, теги, переменные) - чтобы понять,
+    # дает ли заголовок плагину хоть что-то, кроме native/forward/stock
+    identifiers = set(symbols) | set(DEFINE_NAME_RE.findall(code)) | set(VARIABLE_RE.findall(code))
+    for match in ENUM_RE.finditer(code):
+        if match.group(1):
+            identifiers.add(match.group(1))
+        identifiers.update(ENUM_MEMBER_RE.findall(match.group(2)))
+    return {
+        'identifiers': sorted(identifiers),
+        'library': library.group(2) if library else None,
+        'library_kind': ('class' if library.group(1) == 'reqclass' else 'library') if library else None,
+        'symbols': symbols,
+    }
+
+class SymbolIndex:
+    """Символы заголовков поверх графа include; заголовок пересканируется
+    только при смене его хеша в графе"""
+
+    def __init__(self, root, include_dirs, path=None, graph=None):
+        self.root = os.path.abspath(root)
+        self.graph = graph or IncludeGraph(root, include_dirs)
+        self.path = path or os.path.join(self.root, INDEX_FILE)
+        self.headers = {}
+        self.changed = False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_VERSION:
+                self.headers = data.get('headers', {})
+        except (OSError, ValueError):
+            pass
+        self._modules = None
+
+    def save(self):
+        self.graph.save()
+        if self.changed:
+            atomic_write(self.path, json.dumps({'version': INDEX_VERSION, 'headers': self.headers},
+                                               indent=1, sort_keys=True))
+            self.changed = False
+
+    def header(self, key):
+        node = self.graph.node(self.graph.abspath(key))
+        if node is None:
+            return None
+        cached = self.headers.get(key)
+        if cached and cached['hash'] == node['hash']:
+            return cached
+        data = read_source(self.graph.abspath(key)).decode('utf-8', errors='replace')
+        entry = dict(scan_header(data), hash=node['hash'])
+        self.headers[key] = entry
+        self.changed = True
+        self._modules = None
+        return entry
+
+    def all_headers(self):
+        """Ключи всех .inc из каталогов -i"""
+        keys = []
+        for directory in self.graph.include_dirs:
+            for dirpath, dirnames, filenames in os.walk(directory):
+                dirnames.sort()
+                keys.extend(self.graph.key(os.path.join(dirpath, name)) for name in sorted(filenames)
+                            if name.endswith('.inc'))
+        return keys
+
+    def modules(self):
+        """{заголовок: (модуль, вид)}: собственный #pragma или модуль включающего
+        заголовка (reapi_gamedll.inc -> reapi); все, что тянет amxmodx.inc, - core"""
+        if self._modules is not None:
+            return self._modules
+        keys = self.all_headers()
+        entries = {key: self.header(key) for key in keys}
+        core = set(self.graph.closure(self.graph.abspath(self._core_key(keys))))
+        owners, claims = {}, {}
+        for key in keys:
+            entry = entries[key]
+            if entry and entry['library'] and key not in core:
+                owners[key] = (entry['library'], entry['library_kind'])
+                for dep in self.graph.closure(self.graph.abspath(key)):
+                    dep_entry = entries.get(dep) or self.header(dep)
+                    if dep not in core and dep_entry and not dep_entry['library']:
+                        claims.setdefault(dep, set()).add(owners[key])
+        # Общие заголовки (hlsdk_const.inc у engine и fakemeta) ни одному модулю не принадлежат
+        owners.update((dep, next(iter(libs))) for dep, libs in claims.items() if len(libs) == 1)
+        self._modules = {key: owners.get(key, (CORE_MODULE, 'core')) for key in keys}
+        return self._modules
+
+    def _core_key(self, keys):
+        return next((key for key in keys if key.endswith('/' + CORE_HEADER)), keys[0] if keys else '')
+
+    def lookup(self, name):
+        """Все объявления символа: [{header, kind, line, module}]"""
+        found = []
+        for key, (module, _) in self.modules().items():
+            entry = self.headers.get(key)
+            if entry and name in entry['symbols']:
+                found.append(dict(entry['symbols'][name], header=key, module=module))
+        return found
+
+    def visible_symbols(self, plugin, closure=None):
+        """{'native'|'forward'|'stock': {имя: (заголовок, символ)}} из include-замыкания плагина"""
+        modules = self.modules()
+        visible = {'native': {}, 'forward': {}, 'stock': {}}
+        for key in closure or self.graph.closure(plugin):
+            entry = self.headers.get(key) or (self.header(key) if key in modules else None)
+            if not entry:
+                continue
+            for name, symbol in entry['symbols'].items():
+                visible[symbol['kind']].setdefault(name, (key, symbol))
+        return visible
+
+    def analyze_plugin(self, plugin):
+        """Какие native и модули плагин использует на самом деле (напрямую или через stock)"""
+        modules = self.modules()
+        closure = self.graph.closure(plugin)
+        visible = self.visible_symbols(plugin, closure)
+        natives, forwards, stocks = visible['native'], visible['forward'], visible['stock']
+
+        code = strip_literals(read_source(plugin).decode('utf-8', errors='replace'))
+        pending = set(CALL_RE.findall(code))
+        seen, used_natives = set(), {}
+        while pending:
+            name = pending.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            if name in natives:
+                used_natives[name] = natives[name][0]
+            elif name in stocks:
+                pending.update(stocks[name][1].get('calls', []))
+
+        used_modules = {}
+        for name, header in used_natives.items():
+            used_modules.setdefault(modules.get(header, (CORE_MODULE, 'core'))[0], []).append(name)
+        # Модуль обязателен для загрузки плагина из-за #pragma reqlib в заголовке
+        included = {modules[key] for key in closure
+                    if key in modules and modules[key][0] != CORE_MODULE and self.headers[key]['library']}
+        implemented = sorted({n for n in seen if n in forwards and modules.get(forwards[n][0], ('', ''))[0] != CORE_MODULE})
+        # Модуль нужен серверу, если плагин вызывает его native, подключает его reqlib-заголовок
+        # или реализует его forward
+        forward_modules = {modules[forwards[n][0]][0] for n in implemented}
+        required = ({m for m in used_modules if m != CORE_MODULE} | {m for m, _ in included} | forward_modules)
+        return {
+            'plugin': self.graph.key(plugin),
+            'natives': {module: sorted(names) for module, names in sorted(used_modules.items())},
+            'modules': sorted(m for m in used_modules if m != CORE_MODULE),
+            'included_modules': sorted(m for m, _ in included),
+            'unused_includes': sorted(m for m, _ in included if m not in used_modules),
+            'module_forwards': implemented,
+            'forward_modules': sorted(forward_modules),
+            'required_modules': sorted(required),
+        }
+
+def parse_modules_ini(path):
+    """Включенные модули из modules.ini (fakemeta_amxx_i386.so -> fakemeta)"""
+    enabled = []
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.split(';', 1)[0].strip()
+            if line:
+                enabled.append(re.sub(r'(_amxx)?(_i386)?(\.so|\.dll)?$', '', os.path.basename(line)))
+    return enabled
+
+def droppable_modules(enabled, required):
+    """Модули из modules.ini, которые не нужны ни одному плагину"""
+    needed = set()
+    for module in required:
+        needed.update(CLASS_PROVIDERS.get(module, (module,)))
+    return [module for module in enabled if module not in needed]
+
+def main(argv):
+    from compile_plugins import load_config, find_plugins
+
+    parser = argparse.ArgumentParser(description="Native/forward/stock index and per-plugin module requirements")
+    sub = parser.add_subparsers(dest='command')
+    lookup = sub.add_parser('lookup', help="show where a symbol is declared")
+    lookup.add_argument('names', nargs='+')
+    report = sub.add_parser('report', help="modules each plugin really uses")
+    report.add_argument('plugins', nargs='*')
+    report.add_argument('--modules-ini', help="server modules.ini to check for modules no plugin needs")
+    report.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    config = load_config()
+    index = SymbolIndex(config['root'], [config['include']])
+
+    if args.command == 'lookup':
+        ok = True
+        for name in args.names:
+            found = index.lookup(name)
+            ok = ok and bool(found)
+            if not found:
+                print(f"❓ {name}: not declared in {config['include']}")
+            for symbol in found:
+                print(f"{symbol['kind']:<7} {name:<32} {symbol['header']}:{symbol['line']}  [{symbol['module']}]")
+        index.save()
+        return ok
+
+    if args.command != 'report':
+        parser.print_help()
+        return True
+
+    plugins = [os.path.abspath(p) for p in args.plugins] or find_plugins(config['scripting'])
+    results = [index.analyze_plugin(plugin) for plugin in plugins]
+    index.save()
+    required = sorted({m for r in results for m in r['required_modules']})
+    summary = {'plugins': results, 'required_modules': required}
+    if args.modules_ini:
+        summary['droppable_modules'] = droppable_modules(parse_modules_ini(args.modules_ini), required)
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return True
+    for r in results:
+        print(f"📦 {r['plugin']}: {', '.join(r['required_modules']) or 'core only'}")
+        for module, names in r['natives'].items():
+            if module != CORE_MODULE:
+                print(f"   {module}: {', '.join(names)}")
+        if r['module_forwards']:
+            print(f"   forwards: {', '.join(r['module_forwards'])}")
+        if r['unused_includes']:
+            print(f"   ⚠️ included but unused: {', '.join(r['unused_includes'])} (remove the #include to drop the module)")
+    print(f"\n🧩 Modules required by these plugins: {', '.join(required) or 'none'}")
+    if args.modules_ini:
+        print(f"✂️ Not needed in {args.modules_ini}: {', '.join(summary['droppable_modules']) or 'none'}")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main(sys.argv[1:]) else 1)
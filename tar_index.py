@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""Индекс членов tar-архивов с исходниками: чтение отдельных файлов без распаковки.
+Член архива адресуется путем вида scripting/classic.tar:classic/admin.sma"""
+import os, sys, json, mmap, hashlib, tarfile, argparse, threading
+
+from fileutil import atomic_write
+from pipeline_trace import span
+
+INDEX_VERSION = 1
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_DIR = os.path.join(".build_cache", "tar_index")
+SOURCES_DIR = os.path.join(".build_cache", "sources")
+ARCHIVE_EXTENSION = ".tar"
+MEMBER_MARKER = ARCHIVE_EXTENSION + ":"
+
+_archives = {}
+_archives_lock = threading.Lock()
+
+def project_root():
+    return os.getenv('ROOT_DIR', ROOT_DIR)
+
+def split_member_path(path):
+    """(путь архива, имя члена) или None, если путь не указывает внутрь архива"""
+    marker = path.find(MEMBER_MARKER)
+    if marker < 0:
+        return None
+    return path[:marker + len(ARCHIVE_EXTENSION)], path[marker + len(MEMBER_MARKER):].replace(os.sep, '/')
+
+def member_path(archive, member):
+    return f"{archive}:{member}"
+
+class TarIndex:
+    """Смещения, размеры и sha256 членов архива; индекс строится один раз
+    и хранится в .build_cache/tar_index, данные читаются срезами mmap"""
+
+    def __init__(self, archive, root=None):
+        self.archive = os.path.abspath(archive)
+        self.root = os.path.abspath(root or project_root())
+        digest = hashlib.sha1(self.archive.encode('utf-8')).hexdigest()[:12]
+        self.index_path = os.path.join(self.root, INDEX_DIR, f"{os.path.basename(self.archive)}-{digest}.json")
+        stat = os.stat(self.archive)
+        self.signature = [stat.st_size, stat.st_mtime_ns]
+        self.members = {}
+        self._file = None
+        self._map = None
+        self._lock = threading.Lock()
+        if not self.load():
+            self.build()
+
+    def load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get('version') != INDEX_VERSION or data.get('archive') != self.signature:
+            return False
+        self.members = data['members']
+        return True
+
+    def build(self):
+        """Один проход по архиву (только несжатый tar: смещения должны быть в файле)"""
+        members = {}
+        with tarfile.open(self.archive, 'r:') as tar:
+            for info in tar:
+                if not info.isfile():
+                    continue
+                data = tar.extractfile(info).read()
+                members[info.name] = {
+                    'offset': info.offset_data,
+                    'size': info.size,
+                    'sha256': hashlib.sha256(data).hexdigest(),
+                    'mtime': int(info.mtime),
+                    'mode': info.mode,
+                }
+        self.members = members
+        atomic_write(self.index_path, json.dumps({'version': INDEX_VERSION, 'archive': self.signature,
+                                                  'members': members}, indent=1, sort_keys=True))
+
+    def _mapping(self):
+        with self._lock:
+            if self._map is None:
+                self._file = open(self.archive, 'rb')
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._map
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._file.close()
+                self._map = self._file = None
+
+    def names(self, suffix=''):
+        return sorted(name for name in self.members if name.endswith(suffix))
+
+    def isfile(self, member):
+        return member in self.members
+
+    def entry(self, member):
+        try:
+            return self.members[member]
+        except KeyError:
+            raise FileNotFoundError(f"{member} not found in {self.archive}") from None
+
+    def read(self, member, verify=False):
+        entry = self.entry(member)
+        data = self._mapping()[entry['offset']:entry['offset'] + entry['size']]
+        if verify and hashlib.sha256(data).hexdigest() != entry['sha256']:
+            raise ValueError(f"{member}: content does not match the index")
+        return data
+
+def open_archive(archive):
+    """TarIndex архива; пересоздается, если архив изменился с прошлого вызова"""
+    archive = os.path.abspath(archive)
+    stat = os.stat(archive)
+    with _archives_lock:
+        index = _archives.get(archive)
+        if index is None or index.signature != [stat.st_size, stat.st_mtime_ns]:
+            if index is not None:
+                index.close()
+            index = _archives[archive] = TarIndex(archive)
+        return index
+
+# ---------------------------------------------------- файлы и члены архивов
+
+def source_exists(path):
+    split = split_member_path(path)
+    if not split:
+        return os.path.isfile(path)
+    try:
+        return open_archive(split[0]).isfile(split[1])
+    except OSError:
+        return False
+
+def source_stat(path):
+    """(mtime_ns, size) файла; для члена архива - mtime самого архива"""
+    split = split_member_path(path)
+    if not split:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    index = open_archive(split[0])
+    return index.signature[1], index.entry(split[1])['size']
+
+def read_source(path):
+    with span(f"read {os.path.basename(path)}", 'file', path=path):
+        split = split_member_path(path)
+        if not split:
+            with open(path, 'rb') as f:
+                return f.read()
+        return open_archive(split[0]).read(split[1])
+
+def find_archive_sources(directory, suffix='.sma'):
+    """Пути членов с нужным расширением во всех .tar каталога (рекурсивно)"""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.endswith(ARCHIVE_EXTENSION):
+                archive = os.path.join(dirpath, name)
+                try:
+                    index = open_archive(archive)
+                except (OSError, tarfile.TarError) as e:
+                    print(f"⚠️ Cannot index {archive}: {e}")
+                    continue
+                found.extend(member_path(archive, member) for member in index.names(suffix))
+    return found
+
+def materialized_path(path, root):
+    archive, member = split_member_path(path)
+    relative = os.path.relpath(os.path.abspath(archive), root)
+    return os.path.join(root, SOURCES_DIR, relative, member)
+
+def materialize(path, root):
+    """Реальный файл для компилятора: обычный путь как есть, член архива -
+    копия в .build_cache/sources (перезаписывается только при смене содержимого)"""
+    if not split_member_path(path):
+        return path
+    target = materialized_path(path, root)
+    data = read_source(path)
+    try:
+        with open(target, 'rb') as f:
+            if f.read() == data:
+                return target
+    except OSError:
+        pass
+    atomic_write(target, data)
+    return target
+
+def logical_path(path, root):
+    """Обратное к materialize: копия из .build_cache/sources -> путь члена архива"""
+    sources = os.path.join(os.path.abspath(root), SOURCES_DIR) + os.sep
+    absolute = os.path.abspath(path)
+    if not absolute.startswith(sources):
+        return path
+    relative = absolute[len(sources):]
+    marker = relative.find(ARCHIVE_EXTENSION + os.sep)
+    if marker < 0:
+        return path
+    archive = os.path.join(root, relative[:marker + len(ARCHIVE_EXTENSION)])
+    return member_path(archive, relative[marker + len(ARCHIVE_EXTENSION) + 1:].replace(os.sep, '/'))
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Index and read tar archives of plugin sources")
+    parser.add_argument('--archive', default=os.path.join(project_root(), 'scripting', 'classic.tar'))
+    sub = parser.add_subparsers(dest='command')
+    sub.add_parser('list', help="show indexed members")
+    cat = sub.add_parser('cat', help="print one member without unpacking the archive")
+    cat.add_argument('member')
+    sub.add_parser('verify', help="check every member against its indexed sha256")
+    args = parser.parse_args(argv)
+
+    try:
+        index = open_archive(args.archive)
+    except (OSError, tarfile.TarError) as e:
+        print(f"❌ Cannot index {args.archive}: {e}")
+        return False
+
+    if args.command == 'cat':
+        try:
+            sys.stdout.buffer.write(index.read(args.member))
+        except FileNotFoundError as e:
+            print(f"❌ {e}")
+            return False
+        return True
+
+    if args.command == 'verify':
+        bad = []
+        for name in index.names():
+            try:
+                index.read(name, verify=True)
+            except ValueError:
+                bad.append(name)
+        for name in bad:
+            print(f"❌ {name}: hash mismatch")
+        print(f"✅ {len(index.members) - len(bad)}/{len(index.members)} members verified")
+        return not bad
+
+    for name in index.names():
+        entry = index.members[name]
+        print(f"{entry['offset']:>10} {entry['size']:>10}  {entry['sha256'][:12]}  {name}")
+    print(f"📦 {len(index.members)} members, index: {index.index_path}")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main(sys.argv[1:]) else 1)
@@ -0,0 +1,65 @@
+"""amxx_info.py на плагине, собранном настоящим amxxpc 1.9 (tests/fixtures/amxx_info_fixture.sma)"""
+import os, sys, struct
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from amxx_info import AmxxError, BIN_HEADER, SECTION, read_amxx, amxx_summary, size_changes
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'amxx_info_fixture.amxx')
+
+def fixture_bytes():
+    with open(FIXTURE, 'rb') as f:
+        return f.read()
+
+def test_real_compiler_output():
+    sections = read_amxx(fixture_bytes())
+    assert len(sections) == 1
+    section = sections[0]
+    # Размеры, которые напечатал сам компилятор: Code 780, Data 4916, Stack/heap 32768, Total 39004
+    assert (section['code'], section['data'], section['stack_heap'], section['memory']) == (780, 4916, 32768, 39004)
+    assert section['cellsize'] == 4
+    assert section['file_version'] == 8
+    assert section['debug'] is True
+    assert (section['image_size'], section['memsize'], section['disk_size']) == (7670, 39004, 1528)
+    assert section['publics'] == ['client_putinserver', 'cmd_money', 'fw_PlayerPreThink', 'plugin_init']
+    assert section['natives'] == ['register_plugin', 'register_forward', 'register_clcmd', 'get_user_name',
+                                  'is_user_alive', 'entity_get_int', 'cs_get_user_money', 'pev', 'client_print']
+    assert section['pubvars'] == ['MaxClients', 'NULL_STRING', 'NULL_VECTOR']
+    # #pragma reqlib/loadlib из fakemeta.inc, engine.inc, cstrike.inc лежат в таблице тегов (?rl_/?f_)
+    assert section['libraries'] == ['fakemeta', 'engine', 'cstrike']
+    assert section['classes'] == []
+    assert section['tags'] == ['Float']
+
+def test_summary():
+    assert amxx_summary(FIXTURE) == {
+        'code': 780, 'data': 4916, 'stack_heap': 32768, 'memory': 39004, 'debug': True,
+        'publics': 4, 'natives': 9, 'libraries': ['fakemeta', 'engine', 'cstrike'], 'sections': [4],
+    }
+
+def test_size_changes_against_fixture():
+    summary = amxx_summary(FIXTURE)
+    grown = dict(summary, code=summary['code'] + 780, natives=10)
+    previous = {'plugins': [{'plugin': 'fixture', 'amxx': summary}]}
+    changes = size_changes(previous, [{'plugin': 'fixture', 'amxx': grown}], max_growth=10)
+    assert changes == [{'plugin': 'fixture', 'regressions': ['code +780 B'], 'fields': {
+        'code': {'old': 780, 'new': 1560, 'delta': 780, 'percent': 100.0},
+        'natives': {'old': 9, 'new': 10, 'delta': 1, 'percent': 11.1},
+    }}]
+
+@pytest.mark.parametrize('damage, message', [
+    (lambda data: data[:4], "file is truncated"),
+    (lambda data: b'\0\0\0\0' + data[4:], "bad AMXX magic"),
+    (lambda data: data[:BIN_HEADER.size + SECTION.size + 100], "outside the file"),
+    (lambda data: data[:-10] + b'\0' * 10, "section 0"),
+])
+def test_damaged_file(damage, message):
+    with pytest.raises(AmxxError, match=message):
+        read_amxx(damage(fixture_bytes()))
+
+def test_summary_reports_errors(tmp_path):
+    path = tmp_path / 'broken.amxx'
+    path.write_bytes(struct.pack('<I', 0x12345678) + b'\0' * 8)
+    assert amxx_summary(str(path)) == {'error': 'bad AMXX magic 0x12345678'}
+    assert 'error' in amxx_summary(str(tmp_path / 'missing.amxx'))
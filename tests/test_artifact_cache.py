@@ -0,0 +1,100 @@
+"""Кэш артефактов: LRU-вытеснение локального каталога и HTTP-бэкенд поверх artifact_cache.py serve"""
+import os, sys, json, hashlib, threading, urllib.request, urllib.error
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import artifact_cache
+from artifact_cache import LocalCache, HttpCache, make_handler
+from http.server import ThreadingHTTPServer
+
+def key(n):
+    return hashlib.sha256(str(n).encode()).hexdigest()
+
+def age(cache, k, when):
+    for path in cache._entry(k):
+        os.utime(path, (when, when))
+
+def test_lru_eviction(tmp_path):
+    cache = LocalCache(str(tmp_path), max_bytes=0)
+    for n in range(5):
+        cache.put(key(n), b'x' * 1000, {'plugin': n})
+        age(cache, key(n), 1000 + n)
+    entry_size = sum(size for _, size, k in cache.entries() if k == key(0))
+    # Чтение делает запись свежей: key(0) переживает вытеснение, key(1) и key(2) - самые старые
+    assert cache.get(key(0))[1]['plugin'] == 0
+
+    # Вытеснение идет до EVICT_TO лимита: 6 записей при лимите 4.5 -> остаются 4
+    cache.max_bytes = entry_size * 9 // 2
+    cache.put(key(5), b'x' * 1000, {'plugin': 5})
+    kept = {k for _, _, k in cache.entries()}
+    assert kept == {key(0), key(3), key(4), key(5)}
+    assert cache.get(key(1)) is None
+    assert sum(size for _, size, _ in cache.entries()) <= cache.max_bytes
+
+def test_put_scans_cache_only_when_over_limit(tmp_path, monkeypatch):
+    cache = LocalCache(str(tmp_path), max_bytes=100 * 1024)
+    scans = []
+    entries = LocalCache.entries
+    monkeypatch.setattr(LocalCache, 'entries', lambda self: scans.append(1) or entries(self))
+    for n in range(50):
+        cache.put(key(n), b'x' * 1000, {})
+    assert len(scans) == 1
+
+    # Превышение лимита: одно вытеснение с запасом, следующие put снова без обхода
+    for n in range(50, 110):
+        cache.put(key(n), b'x' * 1000, {})
+    assert 2 <= len(scans) <= 4
+    total = sum(size for _, size, _ in entries(cache))
+    assert total <= cache.max_bytes
+    assert cache._size == total
+
+def test_corrupted_entry_is_a_miss(tmp_path):
+    cache = LocalCache(str(tmp_path))
+    cache.put(key(1), b'amxx', {})
+    with open(cache._entry(key(1))[0], 'wb') as f:
+        f.write(b'tampered')
+    assert cache.get(key(1)) is None
+
+@pytest.fixture
+def server(tmp_path):
+    store = LocalCache(str(tmp_path / 'remote'), max_bytes=10 * 1024 * 1024)
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(store))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield store, f"http://127.0.0.1:{httpd.server_port}/cache"
+    httpd.shutdown()
+    httpd.server_close()
+
+def test_http_round_trip(server):
+    store, url = server
+    remote = HttpCache(url)
+    assert remote.get(key(1)) is None
+
+    remote.put(key(1), b'\x00amxx image', {'plugin': 'test'})
+    data, metadata = remote.get(key(1))
+    assert data == b'\x00amxx image'
+    assert metadata['plugin'] == 'test' and metadata['size'] == len(data)
+    # Сервер хранит записи в том же формате, что и локальный кэш
+    assert store.get(key(1)) == (data, metadata)
+
+    with open(store._entry(key(1))[0], 'wb') as f:
+        f.write(b'tampered')
+    assert remote.get(key(1)) is None
+
+def test_http_rejects_bad_keys(server):
+    _, url = server
+    for name, code in (('../../etc/passwd', 404), ('nothex.amxx', 404), (f"{key(1)}.txt", 404)):
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{url}/{name}", timeout=5)
+        assert error.value.code == code
+    request = urllib.request.Request(f"{url}/{key(1)}.exe", data=b'x', method='PUT')
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(request, timeout=5)
+    assert error.value.code == 400
+
+def test_unreachable_server_is_a_miss():
+    remote = HttpCache("http://127.0.0.1:9", timeout=1)
+    assert remote.get(key(1)) is None
+    remote.put(key(1), b'amxx', {})
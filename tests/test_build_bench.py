@@ -0,0 +1,30 @@
+"""build_bench.py: с базой сравниваются только замеры с той же задержкой, числом CPU и -j"""
+import os, sys, copy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import build_bench
+
+def results(median, cpus=4, jobs=4, latency=0.05):
+    return {'latency': latency, 'machine': {'cpus': cpus, 'jobs': jobs},
+            'scales': {'small': {'params': [20, 10, 5], 'scenarios': {'compile-full': {'median': median}}}}}
+
+def test_regression_over_tolerance():
+    baseline = results(2.0)
+    assert build_bench.incomparable(baseline, results(3.0)) is None
+    [regression] = build_bench.compare(baseline, results(3.0), tolerance=25)
+    assert regression['scenario'] == 'compile-full' and regression['percent'] == 50.0
+    assert build_bench.compare(baseline, results(2.4), tolerance=25) == []
+
+def test_noise_floor_and_other_params_are_ignored():
+    assert build_bench.compare(results(0.01), results(0.04), tolerance=25) == []
+    other = copy.deepcopy(results(9.0))
+    other['scales']['small']['params'] = [100, 40, 20]
+    assert build_bench.compare(results(2.0), other) == []
+
+def test_other_machine_is_not_comparable():
+    baseline = results(2.0, cpus=1, jobs=1)
+    assert build_bench.incomparable(baseline, results(3.0, cpus=4, jobs=1)) == "cpus 1 vs 4"
+    assert build_bench.incomparable(baseline, results(3.0, cpus=1, jobs=4)) == "jobs 1 vs 4"
+    assert build_bench.incomparable(baseline, results(3.0, cpus=1, jobs=1, latency=0.1)) == \
+        "compiler latency 0.05s vs 0.1s"
@@ -0,0 +1,145 @@
+"""Дельта-деплой на локальные каталоги-серверы: push, изменения, откат, --verify и очистка объектов"""
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import deploy
+from fileutil import _UMASK
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def make_project(root):
+    config = {'root': str(root), 'compiled': str(root / 'compiled'),
+              'lang': str(root / 'lang'), 'configs': str(root / 'configs')}
+    write(os.path.join(config['compiled'], 'a.amxx'), b'A1')
+    write(os.path.join(config['compiled'], 'b.amxx'), b'B1')
+    write(os.path.join(config['lang'], 'mirgame.txt'), b'[en]\nHELLO = Hello\n')
+    write(os.path.join(config['configs'], 'mirgame', 'main.cfg'), b'mp_timelimit 20\n')
+    return config
+
+def push(config, targets, build, **kwargs):
+    manifest = deploy.build_manifest(config, {'build': build, 'full_version': '1.0.0'})
+    return deploy.run_parallel(deploy.push, targets, manifest, config['root'],
+                               kwargs.get('dry_run', False), kwargs.get('verify', False),
+                               kwargs.get('keep', deploy.KEEP_MANIFESTS))
+
+def file_modes(target):
+    return {rel: os.stat(os.path.join(target, rel)).st_mode & 0o777 for rel in server_files(target)}
+
+def server_files(target):
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(target):
+        dirnames[:] = [d for d in dirnames if d != deploy.STATE_DIR]
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            files[os.path.relpath(path, target).replace(os.sep, '/')] = read(path)
+    return files
+
+V1 = {'plugins/a.amxx': b'A1', 'plugins/b.amxx': b'B1',
+      'data/lang/mirgame.txt': b'[en]\nHELLO = Hello\n', 'configs/mirgame/main.cfg': b'mp_timelimit 20\n'}
+
+def test_push_change_push_rollback(tmp_path):
+    config = make_project(tmp_path / 'project')
+    targets = [str(tmp_path / 'server1'), str(tmp_path / 'server2')]
+
+    reports = push(config, targets, '01D0001l')
+    for report, target in zip(reports, targets):
+        assert sorted(report['changes']['add']) == sorted(V1)
+        assert report['previous_build'] is None
+        assert server_files(target) == V1
+        # Новые файлы читаются HLDS под другим пользователем: не 0600 от mkstemp
+        assert set(file_modes(target).values()) == {0o666 & ~_UMASK}
+        assert deploy.Target(target).history() == [1]
+
+    # Второй билд: a изменен, b удален, c добавлен - копируется только дельта
+    write(os.path.join(config['compiled'], 'a.amxx'), b'A2')
+    os.remove(os.path.join(config['compiled'], 'b.amxx'))
+    write(os.path.join(config['compiled'], 'c.amxx'), b'C2')
+    reports = push(config, targets, '01D0002l')
+    v2 = dict(V1, **{'plugins/a.amxx': b'A2', 'plugins/c.amxx': b'C2'})
+    del v2['plugins/b.amxx']
+    for report, target in zip(reports, targets):
+        assert report['changes'] == {'add': ['plugins/c.amxx'], 'update': ['plugins/a.amxx'],
+                                     'delete': ['plugins/b.amxx']}
+        assert report['bytes'] == 4
+        assert report['previous_build'] == '01D0001l'
+        assert server_files(target) == v2
+        assert set(file_modes(target).values()) == {0o666 & ~_UMASK}
+        assert deploy.Target(target).history() == [1, 2]
+        assert deploy.Target(target).current()['build'] == '01D0002l'
+
+    # Повторный push без изменений ничего не пишет и не добавляет историю
+    for report, target in zip(push(config, targets, '01D0002l'), targets):
+        assert not any(report['changes'].values())
+        assert deploy.Target(target).history() == [1, 2]
+
+    for report, target in zip(deploy.run_parallel(deploy.rollback, targets), targets):
+        assert 'error' not in report
+        assert report['build'] == '01D0001l'
+        assert server_files(target) == V1
+        assert deploy.Target(target).history() == [1]
+
+    report = deploy.rollback(targets[0])
+    assert report['error'] == "no previous deployment to roll back to"
+    assert server_files(targets[0]) == V1
+
+def test_dry_run_writes_nothing(tmp_path):
+    config = make_project(tmp_path / 'project')
+    target = str(tmp_path / 'server')
+    [report] = push(config, [target], '01D0001l', dry_run=True)
+    assert sorted(report['changes']['add']) == sorted(V1)
+    assert report['bytes'] == 0
+    assert server_files(target) == {}
+    assert deploy.Target(target).history() == []
+
+def test_verify_repairs_drift(tmp_path):
+    config = make_project(tmp_path / 'project')
+    target = str(tmp_path / 'server')
+    push(config, [target], '01D0001l')
+
+    write(os.path.join(target, 'plugins', 'a.amxx'), b'edited by hand')
+    os.remove(os.path.join(target, 'configs', 'mirgame', 'main.cfg'))
+    assert deploy.Target(target).drifted(deploy.Target(target).current()) == \
+        ['configs/mirgame/main.cfg', 'plugins/a.amxx']
+
+    # Без --verify манифест совпадает и дрейф не замечается
+    [report] = push(config, [target], '01D0001l')
+    assert not any(report['changes'].values())
+    assert read(os.path.join(target, 'plugins', 'a.amxx')) == b'edited by hand'
+
+    [report] = push(config, [target], '01D0001l', verify=True)
+    assert report['changes']['update'] == ['configs/mirgame/main.cfg', 'plugins/a.amxx']
+    assert server_files(target) == V1
+    assert deploy.Target(target).drifted(deploy.Target(target).current()) == []
+    # Ремонт не считается новым деплоем
+    assert deploy.Target(target).history() == [1]
+
+def test_prune_keeps_objects_of_kept_manifests(tmp_path):
+    config = make_project(tmp_path / 'project')
+    target = str(tmp_path / 'server')
+    for number, data in enumerate((b'A1', b'A2', b'A3'), 1):
+        write(os.path.join(config['compiled'], 'a.amxx'), data)
+        push(config, [target], f"01D000{number}l", keep=2)
+
+    server = deploy.Target(target)
+    assert server.history() == [2, 3]
+    objects = {name for _, _, names in os.walk(server.objects_dir) for name in names}
+    kept = {entry['sha256'] for number in server.history() for entry in server.manifest(number)['files'].values()}
+    assert objects == kept
+    assert deploy.file_digest(os.path.join(config['compiled'], 'b.amxx')) in objects
+    assert all(read(server.object_path(digest)) in (b'A2', b'A3') or digest in kept for digest in objects)
+    assert not any(read(os.path.join(dirpath, name)) == b'A1'
+                   for dirpath, _, names in os.walk(server.objects_dir) for name in names)
+
+    # Откат после очистки идет из оставшихся объектов
+    report = deploy.rollback(target)
+    assert 'error' not in report
+    assert read(os.path.join(target, 'plugins', 'a.amxx')) == b'A2'
+    assert server.history() == [2]
@@ -0,0 +1,54 @@
+"""Граф #include: неразрешенные #tryinclude подхватываются, когда заголовок появляется"""
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from include_graph import IncludeGraph
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+def make_tree(root):
+    include = root / 'scripting' / 'include'
+    write(str(include / 'version.inc'), '#define PROJECT_VERSION "1.0.0"\n')
+    plugin = str(root / 'scripting' / 'test.sma')
+    write(plugin, '#include <version>\n#tryinclude <version_build>\n#include <absent>\n\npublic plugin_init() {}\n')
+    output = str(root / 'compiled' / 'test.amxx')
+    write(output, 'amxx')
+    return plugin, str(include), output
+
+def test_tryinclude_created_after_scan_joins_closure(tmp_path):
+    plugin, include, output = make_tree(tmp_path)
+    graph = IncludeGraph(str(tmp_path), [include])
+    inputs = graph.closure(plugin)
+    assert set(inputs) == {'scripting/test.sma', 'scripting/include/version.inc'}
+    assert graph.files['scripting/test.sma']['optional'] == ['version_build']
+    assert graph.files['scripting/test.sma']['missing'] == ['absent']
+    graph.record_build(plugin, inputs=inputs)
+    graph.save()
+
+    # layout split: заголовок появляется, сам плагин не меняется (mtime/size те же)
+    write(os.path.join(include, 'version_build.inc'), '#define PROJECT_BUILD "01D0002l"\n')
+    graph = IncludeGraph(str(tmp_path), [include])
+    inputs = graph.closure(plugin)
+    assert 'scripting/include/version_build.inc' in inputs
+    assert graph.rebuild_reasons(plugin, output, current=inputs) == \
+        ["new include scripting/include/version_build.inc"]
+    graph.record_build(plugin, inputs=inputs)
+
+    write(os.path.join(include, 'version_build.inc'), '#define PROJECT_BUILD "01D0003l"\n')
+    graph.invalidate([os.path.join(include, 'version_build.inc')])
+    assert graph.rebuild_reasons(plugin, output) == ["header changed scripting/include/version_build.inc"]
+
+def test_invalidate_resolves_tryinclude_in_long_running_graph(tmp_path):
+    plugin, include, output = make_tree(tmp_path)
+    graph = IncludeGraph(str(tmp_path), [include])
+    graph.record_build(plugin)
+
+    write(os.path.join(include, 'version_build.inc'), '#define PROJECT_BUILD "01D0002l"\n')
+    assert graph.rebuild_reasons(plugin, output) == []
+    graph.invalidate()
+    assert graph.rebuild_reasons(plugin, output) == ["new include scripting/include/version_build.inc"]
+    assert graph.files['scripting/test.sma']['optional'] == []
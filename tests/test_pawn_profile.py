@@ -0,0 +1,115 @@
+"""pawn_profile.py без компилятора: обертки в той же ветке #if и строке, что и тело функции; разбор дампов"""
+import os, re, sys, glob
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import pytest
+
+from pawn_profile import instrument_source, parse_dumps, cost_table, PREFIX
+from tar_index import find_archive_sources, read_source
+
+WRAPPER_RE = re.compile(r'(?:\bpublic )?(?:\w+:)?(@?\w+)\(([^;]*?)\) \{ (?:\w+\(\); )?new ' + PREFIX
+                        + r'_start = tickcount\(\); (?:new \S+ = )?' + PREFIX + r'(\d+)\(')
+RENAMED_RE = re.compile(r'^[ \t]*(?:stock[ \t]+|static[ \t]+)*(?:\w+:)?' + PREFIX + r'(\d+)\s*\(', re.MULTILINE)
+CONDITIONAL_RE = re.compile(r'^[ \t]*#[ \t]*(if|else|elseif|endif)\b')
+
+def sources():
+    scripting = os.path.join(ROOT_DIR, 'scripting')
+    paths = sorted(glob.glob(os.path.join(scripting, '*.sma'))) + find_archive_sources(scripting)
+    return [(os.path.relpath(p, ROOT_DIR), read_source(p).decode('utf-8', errors='replace')) for p in paths]
+
+def scopes(lines):
+    """Для каждой строки - стек (строка #if, номер ветки) охватывающих условных блоков"""
+    stack, result = [], []
+    for number, line in enumerate(lines):
+        match = CONDITIONAL_RE.match(line)
+        if match and match.group(1) == 'if':
+            stack.append((number, 0))
+        elif match and match.group(1) in ('else', 'elseif') and stack:
+            stack[-1] = (stack[-1][0], stack[-1][1] + 1)
+        elif match and stack:
+            stack.pop()
+        result.append(tuple(stack))
+    return result
+
+SOURCES = sources()
+
+@pytest.mark.parametrize('path, text', SOURCES, ids=[path for path, _ in SOURCES])
+def test_wrappers_share_line_and_preprocessor_scope(path, text):
+    plugin = os.path.splitext(os.path.basename(path))[0]
+    instrumented, names = instrument_source(text, plugin)
+    original_lines = text.split('\n')
+    lines = instrumented.split('\n')
+    # Исходные строки не сдвигаются: директивы препроцессора на своих местах
+    for number, line in enumerate(original_lines):
+        if CONDITIONAL_RE.match(line) or line.lstrip().startswith('#include'):
+            assert lines[number] == line
+
+    renamed = {int(m.group(1)): instrumented.count('\n', 0, m.start()) for m in RENAMED_RE.finditer(instrumented)}
+    wrapped = {}
+    for number, line in enumerate(lines[:len(original_lines)]):
+        for match in WRAPPER_RE.finditer(line):
+            wrapped[match.group(1)] = (int(match.group(3)), number)
+    assert sorted(wrapped) == sorted(names)
+    assert sorted(renamed) == list(range(len(names)))
+
+    scope = scopes(lines)
+    for name, (index, number) in wrapped.items():
+        assert names[index] == name
+        assert renamed[index] <= number
+        assert scope[number] == scope[renamed[index]], f"{name}: wrapper outside the #if branch of its body"
+    assert instrumented.count('{') - text.count('{') == instrumented.count('}') - text.count('}')
+
+def test_classic_admin_sql_and_braceless_publics():
+    text = next(text for path, text in SOURCES if path.replace(os.sep, '/').endswith('classic/admin.sma'))
+    instrumented, names = instrument_source(text, 'admin')
+    assert {'adminSql', 'client_authorized', 'plugin_init'} <= set(names)
+    lines = instrumented.split('\n')
+    sql = next(n for n, line in enumerate(lines) if 'public adminSql()' in line)
+    assert lines[sql + 1].strip() == '#endif'
+    authorized = next(line for line in lines if 'public client_authorized(id)' in line)
+    assert authorized.lstrip().startswith('return get_pcvar_num(amx_mode) ? accessUser(id) : PLUGIN_CONTINUE; public')
+
+def test_wrapper_keeps_tag_params_and_return():
+    text = ("#include <amxmodx>\n\n"
+            "public Float:get_speed(id, const name[] = \"x\", // комментарий\n"
+            "\tFloat:scale)\n{\n\treturn scale;\n}\n\n"
+            "public plugin_init()\n{\n\tregister_plugin(\"t\", \"1\", \"a\");\n}\n\n"
+            "public cmd_any(id, ...) return 1\n"
+            "@task_event() server_print(\"x\")\n")
+    instrumented, names = instrument_source(text, 't')
+    assert names == ['get_speed', 'plugin_init', '@task_event']
+    lines = instrumented.split('\n')
+    assert lines[6] == ('} public Float:get_speed(id, const name[] = "x", Float:scale) { new __prof_start = tickcount(); '
+                        'new Float:__prof_ret = __prof0(id, name, scale); __prof_add(0, __prof_start); return __prof_ret; }')
+    assert lines[11] == ('} public plugin_init() { __prof_init(); new __prof_start = tickcount(); __prof1(); '
+                         '__prof_add(1, __prof_start); }')
+    # Функции с ... не оборачиваются, функция без скобок - оборачивается на своей строке
+    assert lines[13] == 'public cmd_any(id, ...) return 1'
+    assert lines[14] == ('__prof2() server_print("x"); @task_event() { new __prof_start = tickcount(); __prof2(); '
+                         '__prof_add(2, __prof_start); }')
+    assert 'public plugin_end()' in instrumented
+
+def test_parse_dumps_accumulates_across_resets():
+    log = [
+        "L 10/17/2026 - 12:00:00: [prof] admin client_authorized 10 20 5",
+        "[prof] admin client_authorized 25 40 9",
+        "garbage line",
+        "[prof] mapchooser plugin_init 1 3 3",
+        # Смена карты: счетчики обнулились
+        "[prof] admin client_authorized 4 2 1",
+        "[prof] admin cmdReload 2 100 80",
+    ]
+    stats = parse_dumps(log)
+    assert stats[('admin', 'client_authorized')] == {'calls': 29, 'total_ms': 42, 'max_ms': 9}
+    assert stats[('mapchooser', 'plugin_init')] == {'calls': 1, 'total_ms': 3, 'max_ms': 3}
+
+    table = cost_table(stats)
+    assert [entry['plugin'] for entry in table] == ['admin', 'mapchooser']
+    admin = table[0]
+    assert admin['calls'] == 31 and admin['total_ms'] == 142
+    assert [f['function'] for f in admin['functions']] == ['cmdReload', 'client_authorized']
+    assert admin['functions'][0]['avg_ms'] == 50.0
+    assert admin['share'] == round(100 * 142 / 145, 2)
+    assert cost_table({}) == []
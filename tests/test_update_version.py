@@ -0,0 +1,37 @@
+"""update_version.py run --json: ok отражает, записан ли номер сборки"""
+import os, sys, json, shutil
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import update_version
+
+def make_project(tmp_path, monkeypatch):
+    include = tmp_path / 'scripting' / 'include'
+    include.mkdir(parents=True)
+    shutil.copy2(os.path.join(ROOT_DIR, 'scripting', 'include', 'version.inc'), include / 'version.inc')
+    monkeypatch.chdir(tmp_path)
+    return include / 'version.inc'
+
+def run_json(capsys, *tokens):
+    ok = update_version.run_commands(list(tokens), as_json=True)
+    return ok, json.loads(capsys.readouterr().out)
+
+def test_build_number_written(tmp_path, monkeypatch, capsys):
+    version_file = make_project(tmp_path, monkeypatch)
+    ok, report = run_json(capsys, 'build-mirgame', 'info')
+    assert ok and report['ok']
+    assert [r['ok'] for r in report['results']] == [True, True]
+    assert f'"{report["version"]["build"]}"' in version_file.read_text(encoding='utf-8')
+
+def test_failed_commit_is_not_ok(tmp_path, monkeypatch, capsys):
+    version_file = make_project(tmp_path, monkeypatch)
+    before = version_file.read_text(encoding='utf-8')
+    monkeypatch.setattr(update_version.VersionDocument, 'commit', lambda self: False)
+    for command in ('build-mirgame', 'build'):
+        ok, report = run_json(capsys, command, 'info')
+        assert not ok and not report['ok']
+        assert [r['ok'] for r in report['results']] == [False]
+        assert update_version.handle_command([command]) is False
+        capsys.readouterr()
+    assert version_file.read_text(encoding='utf-8') == before
@@ -0,0 +1,50 @@
+"""Раскладка split: после layout split и build-mirgame собранные плагины пересобираются с новым номером"""
+import os, sys, json, shutil, subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import build_bench
+from fileutil import atomic_write
+
+PLUGINS = ('example_plugin.sma', 'test.sma')
+
+def make_project(tree):
+    """Копия системы сборки с двумя плагинами из scripting/ и заменой amxxpc из build_bench.py"""
+    for rel in build_bench.tool_files(ROOT_DIR):
+        target = os.path.join(tree, rel)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(os.path.join(ROOT_DIR, rel), target)
+    for name in PLUGINS:
+        shutil.copy2(os.path.join(ROOT_DIR, 'scripting', name), os.path.join(tree, 'scripting', name))
+    atomic_write(os.path.join(tree, 'amxxpc'), build_bench.FAKE_COMPILER, 0o755)
+    subprocess.run(['git', 'init', '-q', '-b', 'main'], cwd=tree, check=True)
+    build_bench.git(tree, 'add', '-A')
+    build_bench.git(tree, 'commit', '-q', '-m', 'layout test')
+
+def run(tree, *command):
+    proc = subprocess.run(command, cwd=tree, env=build_bench.bench_env(0), capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+
+def compile_all(tree):
+    """{плагин: причины пересборки} из compile-report.json (пусто - плагин актуален)"""
+    run(tree, 'bash', 'compile.sh', '-j', '2', '--no-cache')
+    with open(os.path.join(tree, 'compile-report.json'), encoding='utf-8') as f:
+        report = json.load(f)
+    return {os.path.basename(p['plugin']): p.get('reasons') or [] for p in report['plugins']}
+
+def test_split_layout_rebuilds_plugins_on_new_build_number(tmp_path):
+    tree = str(tmp_path)
+    make_project(tree)
+    assert all(compile_all(tree).values())
+    assert not any(compile_all(tree).values())
+
+    run(tree, sys.executable, 'update_version.py', 'layout', 'split')
+    run(tree, sys.executable, 'update_version.py', 'build-mirgame')
+    for name, reasons in compile_all(tree).items():
+        assert "new include scripting/include/version_build.inc" in reasons, name
+
+    # Дальше номер сборки меняет только version_build.inc
+    run(tree, sys.executable, 'update_version.py', 'build-mirgame')
+    assert compile_all(tree) == {name: ["header changed scripting/include/version_build.inc"]
+                                 for name in PLUGINS}
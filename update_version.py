@@ -1,151 +1,372 @@
 #!/usr/bin/env python3
-import re, datetime, os, sys, json, subprocess
+import re, io, datetime, os, sys, json, subprocess, functools, contextlib
+
+import git_meta
+import build_history
+import build_records
+import pipeline_trace
+from fileutil import atomic_write
+from pipeline_trace import span
 
 VERSION_FILE = "scripting/include/version.inc"
+VERSION_BUILD_FILE_NAME = "version_build.inc"
 BUILD_HISTORY_FILE = ".build_history.json"
+BUILD_RECORDS_FILE = build_records.RECORDS_FILE
+VERSION_GUARD_END = "#endif // _version_included"
 
-def get_build_history():
-    """Загружает историю сборок"""
-    if os.path.exists(BUILD_HISTORY_FILE):
-        with open(BUILD_HISTORY_FILE, 'r') as f:
-            return json.load(f)
-    return {
-        "major_version": 1,
-        "branch_builds": {},
-        "total_builds": 0,
-        "last_build_date": ""
-    }
+# Раскладка версии: inline - все поля в version.inc (по умолчанию),
+# split - изменчивые поля сборки/коммита в генерируемом version_build.inc
+LAYOUT_DEFINE = 'PROJECT_VERSION_LAYOUT'
+LAYOUT_INLINE, LAYOUT_SPLIT = 'inline', 'split'
 
-def save_build_history(history):
-    """Сохраняет историю сборок"""
-    with open(BUILD_HISTORY_FILE, 'w') as f:
-        json.dump(history, f, indent=2)
+# Изменчивые define -> тип (True - строка, False - число, None - выражение)
+VOLATILE_DEFINES = {
+    'PROJECT_BUILD': True,
+    'PROJECT_BUILD_NUM': False,
+    'PROJECT_BUILD_TYPE': True,
+    'PROJECT_BRANCH_CODE': True,
+    'PROJECT_BUILD_SUFFIX': True,
+    'PROJECT_BUILD_DATE': True,
+    'PROJECT_BUILD_TIME': True,
+    'PROJECT_BUILD_TIMESTAMP': True,
+    'PROJECT_COMMIT_HASH': True,
+    'PROJECT_COMMIT_SHORT_HASH': True,
+    'PROJECT_COMMIT_AUTHOR': True,
+    'PROJECT_COMMIT_DATE': True,
+}
+# В inline-раскладке время сборки подставляет сам компилятор
+INLINE_EXPRESSIONS = {
+    'PROJECT_BUILD_TIME': '__TIME__',
+    'PROJECT_BUILD_TIMESTAMP': '__DATE__ " " __TIME__',
+}
+
+DEFINE_LINE_RE = re.compile(
+    r'^(?P<head>[ \t]*#define[ \t]+(?P<name>\w+))[ \t]+'
+    r'(?:"(?P<string>[^"]*)"|(?P<number>-?\d+)\b|(?P<raw>\S.*?))'
+    r'(?P<tail>[ \t]*(?://.*)?)$'
+)
+
+# Поле info -> (имя define, строковое ли значение)
+VERSION_INFO_FIELDS = {
+    'version': ('PROJECT_VERSION', True),
+    'suffix': ('PROJECT_VERSION_SUFFIX', True),
+    'build': ('PROJECT_BUILD', True),
+    'build_num': ('PROJECT_BUILD_NUM', False),
+    'build_date': ('PROJECT_BUILD_DATE', True),
+    'major': ('PROJECT_VERSION_MAJOR', True),
+    'minor': ('PROJECT_VERSION_MINOR', True),
+    'patch': ('PROJECT_VERSION_PATCH', True),
+    'major_num': ('PROJECT_VERSION_MAJOR_NUM', False),
+    'minor_num': ('PROJECT_VERSION_MINOR_NUM', False),
+    'patch_num': ('PROJECT_VERSION_PATCH_NUM', False),
+    'version_num': ('PROJECT_VERSION_NUM', False),
+    'name': ('PROJECT_NAME', True),
+    'author': ('PROJECT_AUTHOR', True),
+    'tag': ('PROJECT_VERSION_TAG', True),
+}
+
+class VersionDocument:
+    """Разобранный version.inc: все #define индексируются за один проход,
+    изменения накапливаются и записываются одной атомарной операцией"""
+
+    def __init__(self, path, text, overlay=None):
+        self.path = path
+        self.lines = text.splitlines(keepends=True)
+        self.defines = {}
+        self.pending = {}
+        self.overlay = overlay
+        for index, line in enumerate(self.lines):
+            match = DEFINE_LINE_RE.match(line.rstrip('\r\n'))
+            if match and match.group('name') not in self.defines:
+                self.defines[match.group('name')] = (index, match)
+
+    @classmethod
+    def load(cls, path=VERSION_FILE):
+        with span(f"read {os.path.basename(path)}", 'file', path=path), open(path, 'r', encoding='utf-8') as f:
+            doc = cls(path, f.read())
+        if doc.layout == LAYOUT_SPLIT:
+            doc.overlay = load_build_overlay(build_file_path(path))
+        return doc
+
+    @property
+    def layout(self):
+        return self.get(LAYOUT_DEFINE) or LAYOUT_INLINE
+
+    def _target(self, name):
+        """Документ, в котором живет define (version_build.inc для изменчивых в split)"""
+        if self.overlay is not None and name in VOLATILE_DEFINES:
+            return self.overlay
+        return self
+
+    def get(self, name, is_string=True):
+        """Значение define с учетом неподтвержденных изменений (None если нет)"""
+        target = self._target(name)
+        if name in target.pending:
+            return str(target.pending[name][0])
+        return target.stored(name, is_string)
+
+    def stored(self, name, is_string=True):
+        """Значение define в том виде, в каком оно лежит в файле
+        (is_string=None - выражение без кавычек)"""
+        entry = self.defines.get(name)
+        if not entry:
+            return None
+        group = {True: 'string', False: 'number', None: 'raw'}[is_string]
+        return entry[1].group(group)
+
+    def set(self, name, value, is_string=True):
+        """Ставит изменение define в очередь до commit()"""
+        self._target(name).pending[name] = (value, is_string)
+        return True
 
-def get_current_version_info():
-    if not os.path.exists(VERSION_FILE):
+    @property
+    def dirty(self):
+        """Есть ли изменения, которые реально меняют файл"""
+        return any(self.stored(name, is_string) != str(value)
+                   for name, (value, is_string) in self.pending.items())
+
+    def info(self):
+        """Словарь версии в формате get_current_version_info()"""
+        return {field: self.get(name, is_string)
+                for field, (name, is_string) in VERSION_INFO_FIELDS.items()}
+
+    def render(self):
+        """Собирает новый текст файла с примененными изменениями"""
+        lines = list(self.lines)
+        missing = []
+        for name, (value, is_string) in self.pending.items():
+            literal = f'"{value}"' if is_string else f'{value}'
+            entry = self.defines.get(name)
+            # Многострочные макросы (с \ в конце) не переписываем
+            if entry and not (entry[1].group('raw') or '').endswith('\\'):
+                index, match = entry
+                ending = lines[index][len(lines[index].rstrip('\r\n')):]
+                lines[index] = f"#define {name} {literal}{match.group('tail')}{ending}"
+            else:
+                print(f"⚠️ Define {name} not found in pattern")
+                missing.append(f"#define {name} {literal}\n")
+
+        if missing:
+            guard = next((i for i, line in enumerate(lines)
+                          if line.strip() == VERSION_GUARD_END), None)
+            if guard is not None:
+                lines[guard:guard] = missing
+            else:
+                if lines and not lines[-1].endswith('\n'):
+                    lines[-1] += '\n'
+                lines.extend(missing)
+        return ''.join(lines)
+
+    def commit(self):
+        """Атомарно записывает изменения (временный файл + rename)"""
+        overlay = self.overlay
+        if overlay is not None and not overlay.commit():
+            return False
+        if not self.dirty:
+            self.pending.clear()
+            return True
+        try:
+            content = self.render()
+            atomic_write(self.path, content)
+        except Exception as e:
+            print(f"❌ Error writing version file: {e}")
+            return False
+
+        self.__init__(self.path, content, overlay)
+        return True
+
+def build_file_path(version_path=VERSION_FILE):
+    return os.path.join(os.path.dirname(version_path), VERSION_BUILD_FILE_NAME)
+
+def render_build_include(values):
+    """Текст version_build.inc: переопределяет изменчивые поля version.inc"""
+    lines = [
+        "// Generated by update_version.py (split version layout) - do not edit or commit\n",
+        "#if defined _version_build_included\n",
+        "    #endinput\n",
+        "#endif\n",
+        "#define _version_build_included\n",
+        "\n",
+        "#include <version>\n",
+        "\n",
+    ]
+    for name, is_string in VOLATILE_DEFINES.items():
+        value = values.get(name)
+        if value is None:
+            value = "" if is_string else 0
+        literal = f'"{value}"' if is_string else f'{value}'
+        lines.append(f"#undef {name}\n")
+        lines.append(f"#define {name} {literal}\n")
+    return ''.join(lines)
+
+def load_build_overlay(path):
+    """version_build.inc как VersionDocument (шаблон, если файла еще нет)"""
+    if os.path.exists(path):
+        return VersionDocument.load(path)
+    return VersionDocument(path, render_build_include({}))
+
+def load_version_document(path=VERSION_FILE):
+    """Загружает version.inc (None если файл недоступен)"""
+    if not os.path.exists(path):
         return None
-    
     try:
-        with open(VERSION_FILE, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        def find_define(pattern):
-            match = re.search(pattern, content, re.MULTILINE)
-            return match.group(1) if match else None
-        
-        return {
-            'version': find_define(r'#define PROJECT_VERSION\s+"([^"]+)"'),
-            'suffix': find_define(r'#define PROJECT_VERSION_SUFFIX\s+"([^"]*)"'),
-            'build': find_define(r'#define PROJECT_BUILD\s+"([^"]+)"'),
-            'build_num': find_define(r'#define PROJECT_BUILD_NUM\s+(\d+)'),
-            'build_date': find_define(r'#define PROJECT_BUILD_DATE\s+"([^"]+)"'),
-            'major': find_define(r'#define PROJECT_VERSION_MAJOR\s+"([^"]+)"'),
-            'minor': find_define(r'#define PROJECT_VERSION_MINOR\s+"([^"]+)"'),
-            'patch': find_define(r'#define PROJECT_VERSION_PATCH\s+"([^"]+)"'),
-            'major_num': find_define(r'#define PROJECT_VERSION_MAJOR_NUM\s+(\d+)'),
-            'minor_num': find_define(r'#define PROJECT_VERSION_MINOR_NUM\s+(\d+)'),
-            'patch_num': find_define(r'#define PROJECT_VERSION_PATCH_NUM\s+(\d+)'),
-            'name': find_define(r'#define PROJECT_NAME\s+"([^"]+)"'),
-            'author': find_define(r'#define PROJECT_AUTHOR\s+"([^"]+)"'),
-            'tag': find_define(r'#define PROJECT_VERSION_TAG\s+"([^"]*)"')
-        }
+        return VersionDocument.load(path)
     except Exception as e:
         print(f"❌ Error reading version file: {e}")
         return None
 
-def safe_update_define(content, define_name, new_value, is_string=True):
-    if is_string:
-        pattern = rf'#define {define_name}\s+"[^"]*"'
-        replacement = f'#define {define_name} "{new_value}"'
-    else:
-        pattern = rf'#define {define_name}\s+\d+'
-        replacement = f'#define {define_name} {new_value}'
+def get_build_history():
+    """Загружает историю сборок"""
+    return build_history.load_history(BUILD_HISTORY_FILE)
+
+def save_build_history(history):
+    """Сохраняет историю сборок"""
+    build_history.save_history(history, BUILD_HISTORY_FILE)
+
+def get_current_version_info(doc=None):
+    doc = doc or load_version_document()
+    return doc.info() if doc else None
+
+def update_version_define(define_name, new_value, is_string=True, doc=None):
+    """Меняет один define; без doc - сразу записывает файл"""
+    if doc is not None:
+        return doc.set(define_name, new_value, is_string)
+
+    doc = load_version_document()
+    if not doc:
+        return False
+    doc.set(define_name, new_value, is_string)
+    return doc.commit()
+
+def update_version_num(major, minor, patch, doc=None):
+    """Обновляет PROJECT_VERSION_NUM в формате MMMmmmppp"""
+    version_num = (major * 10000) + (minor * 100) + patch
+    return update_version_define('PROJECT_VERSION_NUM', version_num, False, doc)
+
+def update_build_date(doc=None):
+    now = datetime.datetime.now()
+    standalone = doc is None
+    doc = doc or load_version_document()
+    if not doc:
+        return False
     
-    new_content, count = re.subn(pattern, replacement, content, flags=re.MULTILINE)
+    doc.set('PROJECT_BUILD_DATE', now.strftime('%Y-%m-%d'))
+    if doc.layout == LAYOUT_SPLIT:
+        # Фиксированное время вместо __TIME__: вывод компилятора воспроизводим
+        doc.set('PROJECT_BUILD_TIME', now.strftime('%H:%M:%S'))
+        doc.set('PROJECT_BUILD_TIMESTAMP', now.strftime('%Y-%m-%d %H:%M:%S'))
+    return doc.commit() if standalone else True
+
+def set_version_layout(layout, doc=None):
+    """Переключает раскладку: inline (все в version.inc) или split
+    (изменчивые поля сборки и коммита - в генерируемом version_build.inc)"""
+    doc = doc or load_version_document()
+    if not doc:
+        return False
+    if layout not in (LAYOUT_INLINE, LAYOUT_SPLIT):
+        print(f"❌ Unknown layout: {layout} (expected {LAYOUT_INLINE} or {LAYOUT_SPLIT})")
+        return False
+    if doc.layout == layout:
+        print(f"✅ Version layout is already {layout}")
+        return True
+    
+    build_path = build_file_path(doc.path)
+    if layout == LAYOUT_SPLIT:
+        values = {name: doc.stored(name, is_string) for name, is_string in VOLATILE_DEFINES.items()}
+        atomic_write(build_path, render_build_include(values))
+        # В version.inc остаются стабильные заглушки
+        for name, is_string in VOLATILE_DEFINES.items():
+            doc.set(name, "" if is_string else 0, is_string)
+        doc.set(LAYOUT_DEFINE, LAYOUT_SPLIT)
+        doc.overlay = VersionDocument.load(build_path)
+        update_build_date(doc)
+    else:
+        values = {name: doc.get(name, is_string) for name, is_string in VOLATILE_DEFINES.items()}
+        doc.overlay = None
+        for name, is_string in VOLATILE_DEFINES.items():
+            if name in INLINE_EXPRESSIONS:
+                doc.set(name, INLINE_EXPRESSIONS[name], None)
+            else:
+                doc.set(name, values[name] if values[name] is not None else ("" if is_string else 0), is_string)
+        doc.set(LAYOUT_DEFINE, LAYOUT_INLINE)
     
-    if count == 0:
-        print(f"⚠️ Define {define_name} not found in pattern")
-        return content, False
+    if not doc.commit():
+        return False
+    if layout == LAYOUT_INLINE and os.path.exists(build_path):
+        os.unlink(build_path)
     
-    return new_content, True
+    print(f"✅ Version layout set to {layout}")
+    if layout == LAYOUT_SPLIT:
+        print(f"   Build and commit fields: {build_path}")
+        print("   Plugins that print build info need: #tryinclude <version_build>")
+    return True
 
-def update_version_define(define_name, new_value, is_string=True):
+@functools.lru_cache(maxsize=None)
+def _read_git_info():
+    """Читает данные коммита из .git; git CLI - только запасной вариант"""
     try:
-        with open(VERSION_FILE, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        new_content, success = safe_update_define(content, define_name, new_value, is_string)
-        
-        if not success:
-            if '#endif // _version_included' in new_content:
-                new_content = new_content.replace('#endif // _version_included', 
-                                                 f'#define {define_name} "{new_value}"\n#endif // _version_included' 
-                                                 if is_string else 
-                                                 f'#define {define_name} {new_value}\n#endif // _version_included')
-        
-        with open(VERSION_FILE, 'w', encoding='utf-8') as f:
-            f.write(new_content)
-        
-        return True
-    except Exception as e:
-        print(f"❌ Error updating {define_name}: {e}")
-        return False
-def update_version_num(major, minor, patch):
-    """Обновляет PROJECT_VERSION_NUM в формате MMMmmmppp"""
-    version_num = (major * 10000) + (minor * 100) + patch
-    return update_version_define('PROJECT_VERSION_NUM', version_num, False)
+        with span('read .git commit', 'git'):
+            return git_meta.read_git_info()
+    except Exception:
+        pass
 
-def update_build_date():
-    return update_version_define('PROJECT_BUILD_DATE', datetime.datetime.now().strftime('%Y-%m-%d'))
+    with span('git CLI fallback', 'subprocess'):
+        return _run_git_info()
+
+def _run_git_info():
+    git_info = {}
+    git_info['commit_hash'] = subprocess.check_output(
+        ['git', 'rev-parse', 'HEAD'], 
+        stderr=subprocess.DEVNULL
+    ).decode().strip()
+    
+    git_info['commit_short_hash'] = subprocess.check_output(
+        ['git', 'rev-parse', '--short', 'HEAD'],
+        stderr=subprocess.DEVNULL
+    ).decode().strip()
+    
+    git_info['commit_author'] = subprocess.check_output(
+        ['git', 'log', '-1', '--pretty=format:%an'],
+        stderr=subprocess.DEVNULL
+    ).decode().strip()
+    
+    git_info['commit_date'] = subprocess.check_output(
+        ['git', 'log', '-1', '--pretty=format:%cd', '--date=short'],
+        stderr=subprocess.DEVNULL
+    ).decode().strip()
+    return git_info
 
 def get_git_info():
     """Получает информацию о git коммите"""
-    git_info = {
-        'commit_hash': '',
-        'commit_short_hash': '',
-        'commit_author': '',
-        'commit_date': ''
-    }
-    
     try:
-        git_info['commit_hash'] = subprocess.check_output(
-            ['git', 'rev-parse', 'HEAD'], 
-            stderr=subprocess.DEVNULL
-        ).decode().strip()
-        
-        git_info['commit_short_hash'] = subprocess.check_output(
-            ['git', 'rev-parse', '--short', 'HEAD'],
-            stderr=subprocess.DEVNULL
-        ).decode().strip()
-        
-        git_info['commit_author'] = subprocess.check_output(
-            ['git', 'log', '-1', '--pretty=format:%an'],
-            stderr=subprocess.DEVNULL
-        ).decode().strip()
-        
-        git_info['commit_date'] = subprocess.check_output(
-            ['git', 'log', '-1', '--pretty=format:%cd', '--date=short'],
-            stderr=subprocess.DEVNULL
-        ).decode().strip()
-        
+        return dict(_read_git_info())
     except Exception as e:
         print(f"⚠️ Could not get git info: {e}")
-        git_info['commit_hash'] = 'unknown'
-        git_info['commit_short_hash'] = 'unknown'
-        git_info['commit_author'] = os.getenv('GITHUB_ACTOR', 'unknown')
-        git_info['commit_date'] = datetime.datetime.now().strftime('%Y-%m-%d')
-    
-    return git_info
+        return {
+            'commit_hash': 'unknown',
+            'commit_short_hash': 'unknown',
+            'commit_author': os.getenv('GITHUB_ACTOR', 'unknown'),
+            'commit_date': datetime.datetime.now().strftime('%Y-%m-%d')
+        }
 
-def update_git_info():
-    """Обновляет информацию о git коммите в version.inc"""
+def update_git_info(doc=None, commit=None):
+    """Обновляет информацию о git коммите в version.inc; commit - записать сразу
+    (по умолчанию только без переданного doc, иначе записывает вызывающий)"""
     git_info = get_git_info()
     
-    success = True
-    success &= update_version_define('PROJECT_COMMIT_HASH', git_info['commit_hash'])
-    success &= update_version_define('PROJECT_COMMIT_SHORT_HASH', git_info['commit_short_hash'])
-    success &= update_version_define('PROJECT_COMMIT_AUTHOR', git_info['commit_author'])
-    success &= update_version_define('PROJECT_COMMIT_DATE', git_info['commit_date'])
+    standalone = doc is None
+    commit = standalone if commit is None else commit
+    if standalone:
+        doc = load_version_document()
+        if not doc:
+            return False
+    
+    doc.set('PROJECT_COMMIT_HASH', git_info['commit_hash'])
+    doc.set('PROJECT_COMMIT_SHORT_HASH', git_info['commit_short_hash'])
+    doc.set('PROJECT_COMMIT_AUTHOR', git_info['commit_author'])
+    doc.set('PROJECT_COMMIT_DATE', git_info['commit_date'])
+    
+    success = doc.commit() if commit else True
     
     if success:
         print("✅ Git commit information updated")
@@ -157,31 +378,18 @@ def update_git_info():
     
     return success
 
-def generate_mirgame_build_number(branch_code, build_suffix):
+def generate_mirgame_build_number(branch_code, build_suffix, doc=None):
     """Генерирует номер сборки в стиле MirGame"""
-    history = get_build_history()
-    
-    info = get_current_version_info()
+    info = get_current_version_info(doc)
     major_version = int(info['major'] or 1)
     
-    # Логируем текущее состояние
-    print(f"🔧 Build history for branch {branch_code}: {history['branch_builds'].get(branch_code, 0)}")
-    
-    if branch_code not in history["branch_builds"]:
-        history["branch_builds"][branch_code] = 0
-    
-    history["branch_builds"][branch_code] += 1
-    history["total_builds"] += 1
-    history["major_version"] = major_version
-    history["last_build_date"] = datetime.datetime.now().isoformat()
-    
-    build_number = history["branch_builds"][branch_code]
+    # Номер выделяется под блокировкой и сразу фиксируется в журнале
+    build_number, _ = build_history.allocate_build(branch_code, major_version, BUILD_HISTORY_FILE)
+    print(f"🔧 Build history for branch {branch_code}: {build_number - 1}")
     
     formatted_build = f"{build_number:04d}"
     mirgame_build_number = f"{major_version:02d}{branch_code}{formatted_build}{build_suffix}"
     
-    save_build_history(history)
-    
     print(f"🔧 Generated build {mirgame_build_number} (counter: {build_number})")
     return mirgame_build_number, build_number
 
@@ -254,10 +462,10 @@ def detect_build_type():
     else:
         return 'local'
 
-def update_build_number():
+def update_build_number(doc=None):
     """Обновляет номер сборки в стиле MirGame"""
-    info = get_current_version_info()
-    if not info:
+    doc = doc or load_version_document()
+    if not doc:
         return False
     
     branch_name = get_current_branch_name()
@@ -265,18 +473,18 @@ def update_build_number():
     build_type = detect_build_type()
     build_suffix = get_build_suffix(build_type)
     
-    mirgame_build_number, build_counter = generate_mirgame_build_number(branch_code, build_suffix)
+    mirgame_build_number, build_counter = generate_mirgame_build_number(branch_code, build_suffix, doc)
     
-    success = True
-    success &= update_version_define('PROJECT_BUILD', mirgame_build_number)
-    success &= update_version_define('PROJECT_BUILD_NUM', build_counter, False)
-    success &= update_version_define('PROJECT_BUILD_TYPE', build_type)
-    success &= update_version_define('PROJECT_BRANCH_CODE', branch_code)
-    success &= update_version_define('PROJECT_BUILD_SUFFIX', build_suffix)
-    success &= update_build_date()
-    success &= update_git_info()
+    doc.set('PROJECT_BUILD', mirgame_build_number)
+    doc.set('PROJECT_BUILD_NUM', build_counter, False)
+    doc.set('PROJECT_BUILD_TYPE', build_type)
+    doc.set('PROJECT_BRANCH_CODE', branch_code)
+    doc.set('PROJECT_BUILD_SUFFIX', build_suffix)
+    update_build_date(doc)
+    update_git_info(doc)
     
-    if success:
+    if doc.commit():
+        record_build(mirgame_build_number, branch_code, build_counter, build_suffix, build_type, branch_name, doc)
         print(f"✅ Номер сборки обновлен: {mirgame_build_number}")
         print(f"   Ветка: {branch_name} ({branch_code})")
         print(f"   Тип: {build_type} ({build_suffix})")
@@ -284,6 +492,28 @@ def update_build_number():
         return mirgame_build_number
     return False
 
+def record_build(build, branch_code, counter, suffix, build_type, branch_name, doc):
+    """Запись о сборке в .build_history.db; сбой базы не мешает выдаче номера"""
+    info = doc.info()
+    try:
+        with build_records.open_records(BUILD_RECORDS_FILE, BUILD_HISTORY_FILE) as records:
+            records.add_build(build, branch_code, counter, int(info['major'] or 1), suffix, build_type, branch_name,
+                              get_git_info()['commit_hash'], f"{info['version'] or ''}{info['suffix'] or ''}")
+    except Exception as e:
+        print(f"⚠️ Build record not saved: {e}")
+
+@functools.lru_cache(maxsize=None)
+def _read_branch_name():
+    """Имя ветки из .git/HEAD; git CLI - только запасной вариант"""
+    try:
+        with span('read .git HEAD', 'git'):
+            return git_meta.read_branch_name()
+    except Exception:
+        with span('git branch --show-current', 'subprocess'):
+            result = subprocess.check_output(['git', 'branch', '--show-current'],
+                                            stderr=subprocess.DEVNULL)
+        return result.decode().strip()
+
 def get_current_branch_name():
     """Получает имя текущей ветки Git"""
     try:
@@ -307,9 +537,7 @@ def get_current_branch_name():
             elif ref.startswith('refs/pull/'):
                 return 'pr'
         
-        result = subprocess.check_output(['git', 'branch', '--show-current'], 
-                                        stderr=subprocess.DEVNULL)
-        branch_name = result.decode().strip()
+        branch_name = _read_branch_name()
         
         patterns = ['hotfix/', 'alpha/', 'beta/', 'rc/', 'feature/', 'bugfix/']
         for pattern in patterns:
@@ -384,8 +612,9 @@ def get_branch_stats():
     
     return True
 
-def increment_version(version_type):
-    info = get_current_version_info()
+def increment_version(version_type, doc=None):
+    doc = doc or load_version_document()
+    info = get_current_version_info(doc) if doc else None
     if not info:
         print("❌ Cannot get version info")
         return False
@@ -416,30 +645,30 @@ def increment_version(version_type):
     print(f"🔄 Updating version: {old_version} → {new_version}")
     print("📌 Removing version suffix (as per SemVer rules)")
     
-    # Обновляем ВСЕ версионные поля
-    success1 = update_version_define('PROJECT_VERSION', new_version)
-    success2 = update_version_define('PROJECT_VERSION_MAJOR', str(major))
-    success3 = update_version_define('PROJECT_VERSION_MAJOR_NUM', major, False)
-    success4 = update_version_define('PROJECT_VERSION_MINOR', str(minor))
-    success5 = update_version_define('PROJECT_VERSION_MINOR_NUM', minor, False)
-    success6 = update_version_define('PROJECT_VERSION_PATCH', str(patch))
-    success7 = update_version_define('PROJECT_VERSION_PATCH_NUM', patch, False)  # ДОБАВЛЕНО
-    success8 = update_version_num(major, minor, patch)  # ДОБАВЛЕНО
-    success9 = update_build_date()
-    success10 = update_version_define('PROJECT_VERSION_SUFFIX', "")
-    success11 = update_version_define('PROJECT_VERSION_TAG', "")
-    success12 = update_git_info()
-    
-    if all([success1, success2, success3, success4, success5, success6, 
-            success7, success8, success9, success10, success11, success12]):
+    # Обновляем ВСЕ версионные поля одной записью
+    doc.set('PROJECT_VERSION', new_version)
+    doc.set('PROJECT_VERSION_MAJOR', str(major))
+    doc.set('PROJECT_VERSION_MAJOR_NUM', major, False)
+    doc.set('PROJECT_VERSION_MINOR', str(minor))
+    doc.set('PROJECT_VERSION_MINOR_NUM', minor, False)
+    doc.set('PROJECT_VERSION_PATCH', str(patch))
+    doc.set('PROJECT_VERSION_PATCH_NUM', patch, False)
+    update_version_num(major, minor, patch, doc)
+    update_build_date(doc)
+    doc.set('PROJECT_VERSION_SUFFIX', "")
+    doc.set('PROJECT_VERSION_TAG', "")
+    update_git_info(doc)
+    
+    if doc.commit():
         print(f"✅ Version updated successfully to {new_version}")
         return True
     else:
         print("❌ Failed to update version")
         return False
 
-def update_version_suffix(suffix_type, number=""):
-    info = get_current_version_info()
+def update_version_suffix(suffix_type, number="", doc=None):
+    doc = doc or load_version_document()
+    info = get_current_version_info(doc) if doc else None
     if not info:
         return False
     
@@ -456,23 +685,35 @@ def update_version_suffix(suffix_type, number=""):
         new_suffix = info['suffix'] or ""
         new_tag = info.get('tag', '')
     
-    success1 = update_version_define('PROJECT_VERSION_SUFFIX', new_suffix)
-    success2 = update_version_define('PROJECT_VERSION_TAG', new_tag)
-    success3 = update_build_date()
-    success4 = update_git_info()
+    doc.set('PROJECT_VERSION_SUFFIX', new_suffix)
+    doc.set('PROJECT_VERSION_TAG', new_tag)
+    update_build_date(doc)
+    update_git_info(doc)
     
-    if success1 and success2 and success3 and success4:
+    if doc.commit():
         action = "removed" if not new_suffix else f"set to {new_suffix}"
         print(f"✅ Version suffix {action}")
         return True
     return False
 
-def validate_version_consistency():
+def validate_version_consistency(doc=None):
     """Проверяет согласованность версионных данных"""
-    info = get_current_version_info()
+    info = get_current_version_info(doc)
     if not info:
         return False
     
+    issues = find_version_issues(info)
+    if issues:
+        print("⚠️ Version consistency issues found:")
+        for issue in issues:
+            print(f"   - {issue}")
+        return False
+    
+    print("✅ Version data is consistent")
+    return True
+
+def find_version_issues(info):
+    """Список расхождений между строковыми и числовыми полями версии"""
     issues = []
     
     # Проверяем соответствие строковых и числовых значений
@@ -489,32 +730,144 @@ def validate_version_consistency():
             issues.append(f"PATCH mismatch: {info['patch']} vs {info['patch_num']}")
     
     # Проверяем PROJECT_VERSION_NUM
-    expected_num = (int(info.get('major', 0)) * 10000 + 
-                   int(info.get('minor', 0)) * 100 + 
-                   int(info.get('patch', 0)))
-    actual_num = int(info.get('version_num', 0))
+    expected_num = (int(info.get('major') or 0) * 10000 + 
+                   int(info.get('minor') or 0) * 100 + 
+                   int(info.get('patch') or 0))
+    actual_num = int(info.get('version_num') or 0)
     if expected_num != actual_num:
         issues.append(f"VERSION_NUM mismatch: expected {expected_num}, got {actual_num}")
-    
-    if issues:
-        print("⚠️ Version consistency issues found:")
-        for issue in issues:
-            print(f"   - {issue}")
+    return issues
+
+def version_summary(doc):
+    """Текущее состояние версии для JSON-вывода"""
+    info = get_current_version_info(doc) or {}
+    build = info.get('build') or ""
+    return dict(info,
+                full_version=f"{info.get('version') or '0.1.0'}{info.get('suffix') or ''}",
+                build_num=doc.get('PROJECT_BUILD_NUM', False) if doc else None,
+                build_type=doc.get('PROJECT_BUILD_TYPE') if doc else None,
+                layout=doc.layout if doc else LAYOUT_INLINE,
+                decoded=decode_build_number(build) if build else None)
+
+def _build_data(doc, args):
+    return {'build': doc.get('PROJECT_BUILD'), 'build_num': doc.get('PROJECT_BUILD_NUM', False),
+            'build_type': doc.get('PROJECT_BUILD_TYPE'), 'branch_code': doc.get('PROJECT_BRANCH_CODE'),
+            'suffix': doc.get('PROJECT_BUILD_SUFFIX'), 'branch': get_current_branch_name()}
+
+def _decode_data(doc, args):
+    build = args[0] if args else doc.get('PROJECT_BUILD') or ""
+    return {'build': build, 'decoded': decode_build_number(build)}
+
+def _version_data(doc, args):
+    summary = version_summary(doc)
+    return {'version': summary['version'], 'suffix': summary['suffix'], 'full_version': summary['full_version']}
+
+# Структурированный результат команды для `run --json` (вычисляется после ее выполнения)
+COMMAND_DATA = {
+    'build-mirgame': _build_data,
+    'build': _build_data,
+    'decode-build': _decode_data,
+    'build-history': lambda doc, args: get_build_history(),
+    'branch-stats': lambda doc, args: get_build_history()['branch_builds'],
+    'info': lambda doc, args: version_summary(doc),
+    'validate': lambda doc, args: {'issues': find_version_issues(doc.info())},
+    'major': _version_data,
+    'minor': _version_data,
+    'patch': _version_data,
+    'snapshot': _version_data,
+    'release': _version_data,
+    'alpha': _version_data,
+    'beta': _version_data,
+    'rc': _version_data,
+    'hotfix': _version_data,
+    'get-version': lambda doc, args: {'value': _version_data(doc, args)['version'] or "0.1.0"},
+    'get-suffix': lambda doc, args: {'value': _version_data(doc, args)['suffix'] or ""},
+    'get-full-version': lambda doc, args: {'value': _version_data(doc, args)['full_version']},
+    'get-build': lambda doc, args: {'value': doc.get('PROJECT_BUILD') or ""},
+    'git-info': lambda doc, args: get_git_info(),
+    'layout': lambda doc, args: {'layout': doc.layout},
+}
+
+COMMAND_ALIASES = {
+    'bm': 'build-mirgame', 'db': 'decode-build', 'bh': 'build-history', 'bs': 'branch-stats',
+    '-i': 'info', '--major': 'major', '-v': 'validate', '--minor': 'minor', '--patch': 'patch',
+    '-b': 'build', '-s': 'snapshot', '-r': 'release', '-a': 'alpha', '-be': 'beta', '-rc': 'rc',
+    '-hf': 'hotfix', 'gi': 'git-info',
+}
+
+def split_run_commands(tokens):
+    """[(команда, [аргументы])]: аргументы - все токены до следующего имени команды"""
+    commands = []
+    for token in tokens:
+        name = COMMAND_ALIASES.get(token.lower(), token.lower())
+        if name in COMMAND_DATA:
+            commands.append((name, []))
+        elif commands:
+            commands[-1][1].append(token)
+        else:
+            raise ValueError(f"Unknown command: {token}")
+    return commands
+
+def run_commands(tokens, as_json=False):
+    """Выполняет последовательность команд над одним загруженным version.inc.
+    С as_json вывод команд собирается, а в stdout печатается один JSON-документ"""
+    try:
+        commands = split_run_commands(tokens)
+    except ValueError as e:
+        if as_json:
+            print(json.dumps({'ok': False, 'error': str(e), 'results': []}, indent=2))
+        else:
+            print(f"❌ {e}")
         return False
-    
-    print("✅ Version data is consistent")
-    return True
 
-def handle_command(args):
+    doc = load_version_document()
+    results = []
+    ok = True
+    for command, args in commands:
+        output = io.StringIO()
+        result = {'command': command, 'args': args}
+        try:
+            if as_json:
+                with contextlib.redirect_stdout(output):
+                    success = handle_command([command] + args, doc)
+            else:
+                success = handle_command([command] + args, doc)
+            result['ok'] = bool(success)
+            if success and doc:
+                result['data'] = COMMAND_DATA[command](doc, args)
+        except Exception as e:
+            result['ok'] = False
+            result['error'] = str(e)
+        result['output'] = output.getvalue()
+        results.append(result)
+        if not result['ok']:
+            ok = False
+            break
+
+    if as_json:
+        print(json.dumps({'ok': ok, 'version_file': VERSION_FILE,
+                          'version': version_summary(doc) if doc else None,
+                          'results': results}, indent=2, ensure_ascii=False))
+    return ok
+
+def handle_command(args, doc=None):
     if not args or args[0] in ['-h', '--help']:
         show_help()
         return True
     
     command = args[0].lower()
+    with span(f"command {command}", 'command', args=' '.join(args[1:])):
+        return _handle_command(command, args, doc)
+
+def _handle_command(command, args, doc=None):
+    if command == 'run':
+        tokens = [arg for arg in args[1:] if arg != '--json']
+        return run_commands(tokens, as_json='--json' in args[1:])
+    doc = doc or load_version_document()
     
     if command in ['build-mirgame', 'bm']:
-        result = update_build_number()
-        return result is not None
+        result = update_build_number(doc)
+        return bool(result)
         
     elif command in ['decode-build', 'db']:
         if len(args) > 1:
@@ -531,7 +884,7 @@ def handle_command(args):
             else:
                 print("❌ Неверный формат номера сборки")
         else:
-            info = get_current_version_info()
+            info = get_current_version_info(doc)
             if info and info.get('build'):
                 decoded = decode_build_number(info['build'])
                 if decoded:
@@ -549,13 +902,19 @@ def handle_command(args):
         print(f"   Всего сборок: {history['total_builds']}")
         print(f"   Последняя сборка: {history['last_build_date']}")
         get_branch_stats()
+        if os.path.exists(BUILD_RECORDS_FILE):
+            with build_records.open_records(BUILD_RECORDS_FILE) as records:
+                recent = records.query(limit=5)
+            print("🕒 Последние сборки (python3 build_records.py list):")
+            for record in recent:
+                print(f"   {build_records.format_build(record)}")
         return True
         
     elif command in ['branch-stats', 'bs']:
         return get_branch_stats()
     
     elif command in ['info', '-i']:
-        info = get_current_version_info()
+        info = get_current_version_info(doc)
         if info:
             full_version = f"{info['version'] or '0.1.0'}{info['suffix'] or ''}"
             
@@ -574,61 +933,71 @@ def handle_command(args):
         return True
         
     elif command in ['major', '--major']:
-        return increment_version("major")
+        return increment_version("major", doc)
     elif command in ['validate', '-v']:
-        return validate_version_consistency()
+        return validate_version_consistency(doc)
         
     elif command in ['minor', '--minor']:
-        return increment_version("minor")
+        return increment_version("minor", doc)
         
     elif command in ['patch', '--patch']:
-        return increment_version("patch")
+        return increment_version("patch", doc)
         
     elif command in ['build', '-b']:
-        result = update_build_number()
-        return result is not None
+        result = update_build_number(doc)
+        return bool(result)
         
     elif command in ['snapshot', '-s']:
         number = args[1] if len(args) > 1 else ""
-        return update_version_suffix("snapshot", number)
+        return update_version_suffix("snapshot", number, doc)
         
     elif command in ['release', '-r']:
-        return update_version_suffix("release")
+        return update_version_suffix("release", doc=doc)
         
     elif command in ['alpha', '-a']:
         number = args[1] if len(args) > 1 else "1"
-        return update_version_suffix("alpha", number)
+        return update_version_suffix("alpha", number, doc)
         
     elif command in ['beta', '-be']:
         number = args[1] if len(args) > 1 else "1"
-        return update_version_suffix("beta", number)
+        return update_version_suffix("beta", number, doc)
         
     elif command in ['rc', '-rc']:
         number = args[1] if len(args) > 1 else "1"
-        return update_version_suffix("rc", number)
+        return update_version_suffix("rc", number, doc)
         
     elif command in ['hotfix', '-hf']:
         number = args[1] if len(args) > 1 else "1"
-        return update_version_suffix("hotfix", number)
+        return update_version_suffix("hotfix", number, doc)
         
     elif command in ['get-version']:
-        info = get_current_version_info()
+        info = get_current_version_info(doc)
         print(info['version'] if info and info['version'] else "0.1.0")
         return True
         
     elif command in ['get-suffix']:
-        info = get_current_version_info()
+        info = get_current_version_info(doc)
         print(info['suffix'] if info and info['suffix'] else "")
         return True
         
     elif command in ['get-full-version']:
-        info = get_current_version_info()
+        info = get_current_version_info(doc)
         version = info['version'] if info and info['version'] else "0.1.0"
         suffix = info['suffix'] if info and info['suffix'] else ""
         print(f"{version}{suffix}")
         return True
+    elif command in ['get-build']:
+        info = get_current_version_info(doc)
+        print(info['build'] if info and info['build'] else "")
+        return True
     elif command in ['git-info', 'gi']:
-        return update_git_info()
+        # Отдельная команда: поля коммита записываются сразу, как у остальных изменяющих команд
+        return update_git_info(doc, commit=True)
+    elif command in ['layout']:
+        if len(args) < 2:
+            print(doc.layout if doc else LAYOUT_INLINE)
+            return True
+        return set_version_layout(args[1].lower(), doc)
         
     else:
         print(f"❌ Unknown command: {command}")
@@ -660,6 +1029,17 @@ def show_help():
     print("  get-version              Получить базовую версию (X.Y.Z)")
     print("  get-suffix               Получить суффикс версии")
     print("  get-full-version         Получить полную версию с суффиксом")
+    print("  get-build                Получить номер сборки")
+    print("  git-info (gi)            Обновить информацию о git коммите")
+    print("  layout [inline|split]    Показать/сменить раскладку version.inc")
+    print("                           split: поля сборки и коммита в version_build.inc")
+    print("\n📦 Пакетный режим:")
+    print("  run CMD [ARGS] [CMD ...] [--json]")
+    print("                           Выполнить несколько команд за один запуск;")
+    print("                           --json - один JSON-документ с результатами")
+    print("\n🔬 Трассировка:")
+    print("  --trace FILE             Записать Chrome trace (и сводку FILE.txt);")
+    print("                           то же через $MIRGAME_TRACE, включая подпроцессы")
 
 if __name__ == "__main__":
     try:
@@ -667,7 +1047,7 @@ if __name__ == "__main__":
             print(f"❌ Version file not found: {VERSION_FILE}")
             sys.exit(1)
         
-        success = handle_command(sys.argv[1:])
+        success = handle_command(pipeline_trace.pop_trace_option(sys.argv[1:]))
         sys.exit(0 if success else 1)
     except Exception as e:
         print(f"💥 Unexpected error: {e}")